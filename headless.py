@@ -1,12 +1,42 @@
+import argparse
 from src.youtube_video import YouTubeVideo
-from src.transcribe_summarize import summary_by_chapters, create_shorts_by_chapters
+from src.transcribe_summarize import summary_by_chapters, create_shorts_by_chapters, FAILED_CHAPTER_TEXT, MISSING_CHAPTER_TEXT
+from src.streaming import stream_video_summary
+import src.profiling as profiling
 import dotenv
 import os
 dotenv.load_dotenv()
 
+parser = argparse.ArgumentParser(description="Create ideas for Shorts from a YouTube video.")
+parser.add_argument("--profile", action="store_true", help="Write a CPU profile of the run, see src/profiling.py")
+parser.add_argument(
+    "--stream", action="store_true",
+    help="Summarize long videos (e.g. livestreams) with bounded memory and print every chapter as soon as it is done, see src/streaming.py",
+)
+args = parser.parse_args()
+if args.profile:
+    profiling.configure_profiling(enabled=True)
+
 url = input("\n\nPlease enter the YouTube video URL: ")
-video = YouTubeVideo(url=url)
-video.get_data()
-ideas = create_shorts_by_chapters(video=video, api_key=os.getenv("OPENAI_API_KEY"))
-print("\n\nIdeas for Shorts:")
-print(ideas)
\ No newline at end of file
+if args.stream:
+    def print_chapter(chapter):
+        marker = FAILED_CHAPTER_TEXT if chapter["error"] else MISSING_CHAPTER_TEXT
+        print(chapter["summary"] or marker.format(heading=chapter["heading"], timestr=chapter["timestr"], error=chapter["error"]))
+        print()
+
+    with profiling.profile_run("headless-stream"):
+        video = YouTubeVideo(url=url)
+        # Only the page fields are loaded, the transcript is streamed
+        video.get_data(lazy=True)
+        video.release_page()
+        print("\n\nSummary by Chapters:\n")
+        summary = stream_video_summary(video, api_key=os.getenv("OPENAI_API_KEY"), on_chapter=print_chapter)
+    print("\n\nSummary of Entire Video:")
+    print(summary)
+else:
+    with profiling.profile_run("headless"):
+        video = YouTubeVideo(url=url)
+        video.get_data()
+        ideas = create_shorts_by_chapters(video=video, api_key=os.getenv("OPENAI_API_KEY"))
+    print("\n\nIdeas for Shorts:")
+    print(ideas)
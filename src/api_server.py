@@ -0,0 +1,267 @@
+"""
+This module provides a standalone HTTP service for loading and summarizing videos.
+The service keeps no session state: every request names its video by URL and all results live in the summary store,
+so any number of replicas can run behind one proxy. Results that are already stored are returned without loading
+the video. New results can be streamed as server-sent events, chapter summaries as soon as each one is done.
+Endpoints:
+    GET  /health: Liveness check.
+    POST /videos: Loads a video. Body: {"url": str, "languages": [str]}.
+    POST /summaries/<mode>: Returns or generates a summary, mode is "chapters", "video", "sentence" or "shorts".
+        Body: {"url": str, "languages": [str], "language": str, "stream": bool}. "language" is the transcript
+        language returned by /videos; with it, stored results are found without loading the video.
+        With "stream" (or "Accept: text/event-stream") the answer is an event stream of "chapter" events
+        ({"index", "summary"}), one "result" event with the response body and a final "done" (or "error") event.
+Functions:
+    create_server: Creates the HTTP server.
+"""
+# Native Libraries
+import argparse
+import json
+import os
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+# User-defined Libraries
+try:
+    import src.transcribe_summarize as ts
+    from src.deadline import Deadline
+    from src.summary_store import DEFAULT_DB_PATH, SummaryStore
+    from src.youtube_video import DEFAULT_LANGUAGES, YouTubeVideo
+    from src.logger import Logger
+except ImportError:
+    import transcribe_summarize as ts
+    from deadline import Deadline
+    from summary_store import DEFAULT_DB_PATH, SummaryStore
+    from youtube_video import DEFAULT_LANGUAGES, YouTubeVideo
+    from logger import Logger
+
+
+# Seconds a request may spend on loading and summarizing a video
+JOB_TIMEOUT = float(os.getenv("TUBE_TLDR_JOB_TIMEOUT", "90"))
+MODES = ("chapters", "video", "sentence", "shorts")
+# Upper bound for request bodies, they only carry a URL and options
+MAX_BODY_BYTES = 64 * 1024
+
+logger = Logger.create_logger(name="ApiServer")
+
+
+class ApiError(Exception):
+    """
+    An error that is answered with the given HTTP status.
+    """
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def run_mode(mode: str, video: YouTubeVideo, api_key: str, store: SummaryStore | None, deadline: Deadline, on_chapter=None):
+    """
+    Runs one summary mode on a loaded video. on_chapter is passed to summary_by_chapters().
+    """
+    if mode == "chapters":
+        return ts.summary_by_chapters(video, api_key, store=store, deadline=deadline, on_chapter=on_chapter)
+    if mode == "video":
+        return ts.summary_entire_video(video, api_key, store=store, deadline=deadline)
+    if mode == "sentence":
+        return ts.summary_in_one_sentence(video, api_key, store=store, deadline=deadline)
+    return ts.create_shorts_by_chapters(video, api_key, store=store, deadline=deadline)
+
+
+def _stored_result(video: YouTubeVideo, mode: str, store: SummaryStore | None):
+    cached = ts.cached_summary(video, mode, store)
+    if not cached or (mode == "chapters" and None in cached):
+        return None
+    return cached
+
+
+class SummaryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles one request. The store and the API key are set on the subclass created by create_server().
+    """
+    server_version = "TubeTLDR"
+    store: SummaryStore | None = None
+    api_key: str | None = None
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip("/")
+        try:
+            body = self._read_json()
+            if path == "/videos":
+                self._load_video(body)
+            elif path.startswith("/summaries/"):
+                self._summarize(path.split("/")[-1], body)
+            else:
+                raise ApiError(404, "not found")
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Request to {path} failed: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, "request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            raise ApiError(400, "request body is not valid JSON")
+        if not isinstance(body, dict) or not body.get("url"):
+            raise ApiError(400, "missing 'url'")
+        return body
+
+    def _loaded_video(self, body: dict, deadline: Deadline) -> YouTubeVideo:
+        video = YouTubeVideo(body["url"])
+        video.get_data(tuple(body.get("languages") or DEFAULT_LANGUAGES), deadline=deadline)
+        if not video.transcript:
+            raise ApiError(422, f"no transcript available for {body['url']}")
+        return video
+
+    def _load_video(self, body: dict) -> None:
+        video = self._loaded_video(body, Deadline(JOB_TIMEOUT))
+        if self.store is not None:
+            self.store.save_video(video)
+        duration = video.duration
+        self._send_json(200, {
+            "video_id": video.video_id,
+            "url": video.url,
+            "title": video.title,
+            "channel": video.channel,
+            "duration_seconds": int(duration.total_seconds()) if duration is not None else None,
+            "language": video.transcript_language,
+            "chapters": video.chapters,
+            "stored_modes": [mode for mode in MODES if _stored_result(video, mode, self.store)],
+        })
+
+    def _summarize(self, mode: str, body: dict) -> None:
+        if mode not in MODES:
+            raise ApiError(404, f"unknown summary mode: {mode}")
+        stream = bool(body.get("stream")) or "text/event-stream" in (self.headers.get("Accept") or "")
+        video = YouTubeVideo(body["url"])
+        if body.get("language"):
+            # The transcript language is part of the store key, with it the video does not have to be loaded
+            video.transcript_language = body["language"]
+            stored = _stored_result(video, mode, self.store)
+            if stored:
+                return self._send_result(self._result(video, mode, stored, cached=True), stream)
+
+        deadline = Deadline(JOB_TIMEOUT)
+        video = self._loaded_video(body, deadline)
+        stored = _stored_result(video, mode, self.store)
+        if stored:
+            return self._send_result(self._result(video, mode, stored, cached=True), stream)
+        if not stream:
+            result = run_mode(mode, video, self.api_key, self.store, deadline)
+            return self._send_json(200, self._result(video, mode, result, cached=False))
+        self._stream_mode(mode, video, deadline)
+
+    def _stream_mode(self, mode: str, video: YouTubeVideo, deadline: Deadline) -> None:
+        events = queue.Queue()
+
+        def run():
+            try:
+                result = run_mode(
+                    mode, video, self.api_key, self.store, deadline,
+                    on_chapter=lambda index, summary: events.put(("chapter", {"index": index, "summary": summary})),
+                )
+                events.put(("result", self._result(video, mode, result, cached=False)))
+                events.put(("done", {}))
+            except Exception as e:
+                logger.error(f"Summary {mode} of {video.video_id} failed: {e}")
+                events.put(("error", {"error": str(e)}))
+            events.put(None)
+
+        threading.Thread(target=run, daemon=True).start()
+        self._start_events()
+        while (event := events.get()) is not None:
+            try:
+                self._send_event(*event)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client is gone: stop the job at its next request
+                deadline.cancel()
+                return
+
+    def _result(self, video: YouTubeVideo, mode: str, result, cached: bool) -> dict:
+        return {
+            "video_id": video.video_id,
+            "mode": mode,
+            "language": video.transcript_language,
+            "cached": cached,
+            "missing": ts.missing_chapters(video) if mode == "chapters" else [],
+            "result": result,
+        }
+
+    def _send_result(self, payload: dict, stream: bool) -> None:
+        if not stream:
+            return self._send_json(200, payload)
+        self._start_events()
+        if payload["mode"] == "chapters":
+            for index, summary in enumerate(payload["result"]):
+                self._send_event("chapter", {"index": index, "summary": summary})
+        self._send_event("result", payload)
+        self._send_event("done", {})
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_events(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        # Proxies such as nginx buffer responses unless told otherwise
+        self.send_header("X-Accel-Buffering", "no")
+        self.end_headers()
+
+    def _send_event(self, event: str, data: dict) -> None:
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def create_server(
+    host: str = "127.0.0.1", port: int = 8000, store: SummaryStore | None = None, api_key: str | None = None
+) -> ThreadingHTTPServer:
+    """
+    Creates the HTTP server, every request is handled in its own thread.
+    Args:
+        host (str): The address to bind. Defaults to "127.0.0.1".
+        port (int): The port to bind, 0 for a free one. Defaults to 8000.
+        store (SummaryStore, optional): The summary store shared by all requests.
+        api_key (str, optional): The OpenAI API key. Defaults to the environment variable OPENAI_API_KEY.
+    Returns:
+        ThreadingHTTPServer: The server, start it with serve_forever().
+    """
+    handler = type("Handler", (SummaryRequestHandler,), {
+        "store": store,
+        "api_key": api_key or os.getenv("OPENAI_API_KEY"),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the Tube TLDR HTTP API.")
+    parser.add_argument("--host", default="0.0.0.0", help="The address to bind")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="The port to bind")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path of the summary store")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, store=SummaryStore(args.db))
+    logger.info(f"Serving on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,326 @@
+"""
+This module provides an asyncio API for loading and summarizing videos.
+Page downloads and LLM calls are awaited on one event loop instead of occupying a thread each, so a single loop
+can drive hundreds of videos at the same time. Only the transcript API (which has no async interface) and the
+CPU-bound parsing steps run in worker threads.
+The results are the same as those of the sync functions in transcribe_summarize: prompts, routing, the in-memory
+cache of the video and the summary store are shared.
+Classes:
+    AsyncSummarizer: Loads and summarizes videos with pooled async HTTP and OpenAI clients.
+Functions:
+    summarize_videos: Sync entry point that summarizes many videos on one event loop.
+"""
+# Native Libraries
+import asyncio
+# User-defined Libraries
+try:
+    import src.gpt_functions as gpt
+    import src.http_client as http_client
+    import src.transcribe_summarize as ts
+    from src.deadline import Deadline, DeadlineExceeded
+    from src.preprocessing import compact_transcript
+    from src.summary_store import SummaryStore
+    from src.youtube_video import DEFAULT_LANGUAGES, YouTubeVideo
+    from src.logger import Logger
+except ImportError:
+    import gpt_functions as gpt
+    import http_client
+    import transcribe_summarize as ts
+    from deadline import Deadline, DeadlineExceeded
+    from preprocessing import compact_transcript
+    from summary_store import SummaryStore
+    from youtube_video import DEFAULT_LANGUAGES, YouTubeVideo
+    from logger import Logger
+
+
+# LLM requests in flight at the same time, across all videos of a summarizer
+MAX_CONCURRENT_REQUESTS = 64
+MODES = ("chapters", "video", "sentence", "shorts")
+
+
+class AsyncSummarizer:
+    """
+    Loads and summarizes videos on an event loop. Use it as an async context manager, it owns its HTTP and
+    OpenAI clients (clients are bound to the loop they are used in).
+    Example:
+        async with AsyncSummarizer(api_key) as summarizer:
+            video = await summarizer.load_video(url)
+            chapters = await summarizer.summary_by_chapters(video)
+    Attributes:
+        api_key (str): The OpenAI API key.
+        store (SummaryStore | None): Persistent store to look up and save results.
+    """
+    def __init__(
+        self,
+        api_key: str,
+        store: SummaryStore | None = None,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+        http=None,
+        openai_client=None,
+    ):
+        """
+        Args:
+            api_key (str): The OpenAI API key.
+            store (SummaryStore, optional): Persistent store to look up and save results.
+            max_concurrent_requests (int): LLM requests in flight at the same time. Defaults to MAX_CONCURRENT_REQUESTS.
+            http (httpx.AsyncClient, optional): Client for page downloads. Defaults to http_client.create_async_client().
+            openai_client (openai.AsyncOpenAI, optional): Client for LLM calls. Defaults to a new AsyncOpenAI client.
+        """
+        self.api_key = api_key
+        self.store = store
+        self.logger = Logger.create_logger(name=self.__class__.__name__)
+        self._requests = asyncio.Semaphore(max_concurrent_requests)
+        self._http, self._owns_http = http, http is None
+        self._openai, self._owns_openai = openai_client, openai_client is None
+
+    async def __aenter__(self) -> "AsyncSummarizer":
+        if self._http is None:
+            self._http = http_client.create_async_client()
+        if self._openai is None:
+            from openai import AsyncOpenAI
+            self._openai = AsyncOpenAI(api_key=self.api_key, max_retries=gpt.MAX_RETRIES)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Closes the clients the summarizer has created.
+        """
+        if self._owns_http and self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._owns_openai and self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+
+    async def load_video(
+        self, url: str, languages: tuple = DEFAULT_LANGUAGES, deadline: Deadline | None = None
+    ) -> YouTubeVideo:
+        """
+        Loads a video like YouTubeVideo.get_data(): the page and the transcript are fetched at the same time,
+        the page fields are parsed and the parsed page is released.
+        Args:
+            url (str): The URL of the video.
+            languages (tuple[str]): Preferred transcript languages. Defaults to ("en", "de").
+            deadline (Deadline, optional): The deadline of the job, bounds the page request.
+        Returns:
+            YouTubeVideo: The loaded video.
+        Raises:
+            httpx.HTTPStatusError: If the page request returned an unsuccessful status code.
+            DeadlineExceeded: If the deadline has already expired.
+        """
+        video = YouTubeVideo(url)
+        video.get_data(languages, deadline=deadline, lazy=True)
+        timeout = None
+        if deadline is not None:
+            deadline.check()
+            timeout = deadline.timeout()
+        html, _ = await asyncio.gather(
+            http_client.fetch_async(self._http, video.url, timeout=timeout),
+            asyncio.to_thread(getattr, video, "transcript"),
+        )
+        video.soup = await asyncio.to_thread(video.parse_metadata, html)
+        await asyncio.to_thread(video.release_page)
+        return video
+
+    async def _create_completion(self, deadline: Deadline | None = None, **kwargs):
+        # Counterpart of gpt._create_completion: with a deadline the client does not retry on its own
+        timeout = gpt.REQUEST_TIMEOUT
+        client = self._openai
+        if deadline is not None:
+            deadline.check()
+            timeout = deadline.timeout(gpt.REQUEST_TIMEOUT)
+            client = client.with_options(max_retries=0)
+        return await client.chat.completions.create(timeout=timeout, **kwargs)
+
+    async def _complete_once(self, deadline: Deadline | None = None, **kwargs) -> tuple[str, str | None]:
+        async with self._requests:
+            response = await self._create_completion(deadline, **kwargs)
+            if not kwargs.get("stream"):
+                return response.choices[0].message.content, response.choices[0].finish_reason
+            result, finish_reason = "", None
+            async for chunk in response:
+                if deadline is not None and deadline.expired:
+                    await response.close()
+                    raise DeadlineExceeded("deadline expired while streaming")
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].delta.content is not None:
+                    result += chunk.choices[0].delta.content
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+            return result, finish_reason
+
+    async def complete_text(self, task: str, deadline: Deadline | None = None, model: str | None = None, **kwargs) -> str:
+        """
+        Sends a chat completion request for a task along the routing cascade, see gpt_functions.RoutedCompletion.
+        Args:
+            task (str): The task of the call, a key of model_router.TASK_POLICIES.
+            deadline (Deadline, optional): The deadline of the job.
+            model (str, optional): A model pinned by the caller instead of the routed one.
+            **kwargs: Further arguments of chat.completions.create, e.g. from gpt.chapter_summary_request().
+        Returns:
+            str: The text of the answer.
+        """
+        completion = gpt.RoutedCompletion(task, kwargs["messages"], model)
+        for attempt_model, max_tokens in completion.attempts():
+            try:
+                text, finish_reason = await self._complete_once(deadline, model=attempt_model, max_tokens=max_tokens, **kwargs)
+            except Exception as e:
+                completion.failed(e)
+                continue
+            if completion.finished(text, finish_reason):
+                return text
+
+    async def summary_by_chapters(self, video: YouTubeVideo, deadline: Deadline | None = None) -> list[str]:
+        """
+        Async counterpart of transcribe_summarize.summary_by_chapters(), with the same partial results on deadline.
+        All missing sections are requested at once; the summarizer's request limit bounds how many run.
+        """
+        cached = ts.cached_summary(video, "chapters", self.store)
+        if cached and None not in cached:
+            return cached
+        sections = await asyncio.to_thread(ts.build_sections, video)
+        chap_summaries = list(cached) if cached and len(cached) == len(sections) else [None] * len(sections)
+
+        tasks = {
+            asyncio.ensure_future(self.complete_text("chapter", deadline, **gpt.chapter_summary_request(sections[index]))): index
+            for index, summary in enumerate(chap_summaries) if summary is None
+        }
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining() if deadline else None) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        errors, failed = [], {}
+        for task in done:
+            try:
+                chap_summaries[tasks[task]] = task.result()
+            except Exception as e:
+                self.logger.error(f"Summary of chapter {tasks[task]} failed: {e}")
+                errors.append(e)
+                failed[tasks[task]] = str(e) or type(e).__name__
+        if errors and all(summary is None for summary in chap_summaries) and not pending:
+            raise errors[0]
+
+        video.summaries["chapters"] = chap_summaries
+        missing = ts.missing_chapters(video)
+        if missing:
+            self.logger.warning(f"{len(missing)} of {len(sections)} chapters missing, returning partial result")
+            return ts.with_missing_chapters(chap_summaries, sections, failed)
+        ts.store_summary(video, "chapters", chap_summaries, self.store, sections=sections)
+        return chap_summaries
+
+    async def summary_entire_video(
+        self, video: YouTubeVideo, hierarchical: bool = True, deadline: Deadline | None = None
+    ) -> str:
+        """
+        Async counterpart of transcribe_summarize.summary_entire_video().
+        """
+        cached = ts.cached_summary(video, "video", self.store)
+        if cached:
+            return cached
+        if hierarchical:
+            ts.cached_summary(video, "chapters", self.store)
+        condensed = ts.condensed_source(video) if hierarchical else None
+        if condensed:
+            summary = await self.complete_text("unified", deadline, **gpt.unified_summary_request(condensed))
+        else:
+            summary = await self.complete_text(
+                "video", deadline, **gpt.whole_transcript_summary_request(compact_transcript(video.transcript))
+            )
+        ts.store_summary(video, "video", summary, self.store)
+        return summary
+
+    async def summary_in_one_sentence(
+        self, video: YouTubeVideo, hierarchical: bool = True, deadline: Deadline | None = None
+    ) -> str:
+        """
+        Async counterpart of transcribe_summarize.summary_in_one_sentence().
+        """
+        cached = ts.cached_summary(video, "sentence", self.store)
+        if cached:
+            return cached
+        if hierarchical and not ts.cached_summary(video, "video", self.store):
+            ts.cached_summary(video, "chapters", self.store)
+        condensed = ts.condensed_source(video, include_video_summary=True) if hierarchical else None
+        source = condensed or compact_transcript(video.transcript)
+        summary = await self.complete_text("sentence", deadline, **gpt.one_sentence_summary_request(source, video.title))
+        ts.store_summary(video, "sentence", summary, self.store)
+        return summary
+
+    async def create_shorts_by_chapters(self, video: YouTubeVideo, deadline: Deadline | None = None) -> list[dict]:
+        """
+        Async counterpart of transcribe_summarize.create_shorts_by_chapters(). The chapters are scripted concurrently.
+        """
+        cached = ts.cached_summary(video, "shorts", self.store)
+        if cached:
+            return cached
+        sections = await asyncio.to_thread(ts.build_sections, video, True)
+
+        async def script(section: dict) -> dict:
+            chapter_script = await self.complete_text("rework", deadline, **gpt.rework_transcript_request(section))
+            shorts_script = await self.complete_text("shorts", deadline, **gpt.shorts_script_request(chapter_script))
+            return {"heading": section["heading"], "script": shorts_script}
+
+        shorts_per_chapter = list(await asyncio.gather(*(script(section) for section in sections)))
+        ts.store_summary(video, "shorts", shorts_per_chapter, self.store, sections=sections)
+        return shorts_per_chapter
+
+    async def summarize(
+        self, url: str, mode: str = "chapters", languages: tuple = DEFAULT_LANGUAGES, deadline: Deadline | None = None
+    ):
+        """
+        Loads a video and runs one summary mode on it.
+        Args:
+            url (str): The URL of the video.
+            mode (str): "chapters", "video", "sentence" or "shorts". Defaults to "chapters".
+            languages (tuple[str]): Preferred transcript languages. Defaults to ("en", "de").
+            deadline (Deadline, optional): The deadline of the job.
+        Returns:
+            The result of the mode, see the summary methods.
+        Raises:
+            ValueError: If the mode is unknown or the video has no transcript.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown summary mode: {mode}")
+        video = await self.load_video(url, languages, deadline)
+        if not video.transcript:
+            raise ValueError(f"No transcript available for {url}")
+        if mode == "chapters":
+            return await self.summary_by_chapters(video, deadline)
+        if mode == "video":
+            return await self.summary_entire_video(video, deadline=deadline)
+        if mode == "sentence":
+            return await self.summary_in_one_sentence(video, deadline=deadline)
+        return await self.create_shorts_by_chapters(video, deadline)
+
+    async def summarize_many(
+        self, urls: list[str], mode: str = "chapters", languages: tuple = DEFAULT_LANGUAGES, timeout: float | None = None
+    ) -> list:
+        """
+        Summarizes many videos concurrently. A failing video does not stop the others.
+        Args:
+            urls (list[str]): The URLs of the videos.
+            mode (str): The summary mode. Defaults to "chapters".
+            languages (tuple[str]): Preferred transcript languages. Defaults to ("en", "de").
+            timeout (float, optional): Seconds each video may take.
+        Returns:
+            list: Per URL the result of the mode, or the exception that stopped it.
+        """
+        return await asyncio.gather(
+            *(self.summarize(url, mode, languages, Deadline(timeout)) for url in urls), return_exceptions=True
+        )
+
+
+def summarize_videos(
+    urls: list[str], api_key: str, mode: str = "chapters", store: SummaryStore | None = None,
+    max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS, timeout: float | None = None,
+) -> list:
+    """
+    Summarizes many videos on a new event loop, for callers without one. See AsyncSummarizer.summarize_many().
+    """
+    async def run() -> list:
+        async with AsyncSummarizer(api_key, store=store, max_concurrent_requests=max_concurrent_requests) as summarizer:
+            return await summarizer.summarize_many(urls, mode, timeout=timeout)
+
+    return asyncio.run(run())
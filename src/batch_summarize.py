@@ -0,0 +1,272 @@
+"""
+This module provides an offline bulk mode for summarizing many YouTube videos through the OpenAI Batch API.
+All chapter and whole-video requests are written to one JSONL batch file, submitted at once and matched back
+to their videos and sections by custom IDs once the batch has completed.
+Functions:
+    build_batch_requests: Creates the batch request lines for a list of loaded videos.
+    write_batch_file: Writes batch request lines to a JSONL file.
+    submit_batch: Uploads a batch file and starts the batch job.
+    wait_for_batch: Polls a batch job until it has finished.
+    collect_results: Downloads the batch output and assigns the summaries to their videos.
+    run_batch: Runs the complete bulk workflow for a list of URLs.
+"""
+# Native Libraries
+import argparse
+import json
+import os
+import time
+# User-defined Libraries
+try:
+    import src.gpt_functions as gpt
+    import src.model_router as model_router
+    import src.preprocessing as preprocessing
+    import src.profiling as profiling
+    from src.youtube_video import YouTubeVideo
+    from src.transcribe_summarize import build_sections
+    from src.logger import Logger
+except ImportError:
+    import gpt_functions as gpt
+    import model_router
+    import preprocessing
+    import profiling
+    from youtube_video import YouTubeVideo
+    from transcribe_summarize import build_sections
+    from logger import Logger
+
+
+CUSTOM_ID_SEPARATOR = "::"
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINISHED_STATES = ("completed", "failed", "expired", "cancelled")
+
+logger = Logger.create_logger(name="BatchSummarize")
+
+
+def _custom_id(video_id: str, kind: str, index: int | None = None) -> str:
+    parts = [video_id, kind] if index is None else [video_id, kind, str(index)]
+    return CUSTOM_ID_SEPARATOR.join(parts)
+
+
+def _parse_custom_id(custom_id: str) -> tuple[str, str, int | None]:
+    parts = custom_id.split(CUSTOM_ID_SEPARATOR)
+    index = int(parts[2]) if len(parts) > 2 else None
+    return parts[0], parts[1], index
+
+
+def _request_line(custom_id: str, messages: list[dict], model: str, task: str) -> dict:
+    input_tokens = preprocessing.estimate_tokens("".join(message["content"] for message in messages))
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": messages,
+            "temperature": 0.08,
+            "max_tokens": model_router.output_budget(task, input_tokens),
+        },
+    }
+
+
+@profiling.profiled
+def build_batch_requests(videos: list[YouTubeVideo], model: str = gpt.DEFAULT_MODEL) -> list[dict]:
+    """
+    Creates one request per chapter and one whole-video request for every video.
+    The output budget of every request is sized by the model router; there is no cascade in batch mode.
+    Args:
+        videos (list[YouTubeVideo]): Videos whose data has already been loaded with get_data().
+        model (str): The model to use for all requests. Defaults to 'gpt-4o-mini'.
+    Returns:
+        list[dict]: Batch request lines with custom IDs in the form "<video_id>::<kind>[::<index>]".
+    """
+    requests = []
+    for video in videos:
+        if not video.transcript:
+            logger.error(f"Skipping {video.video_id}: no transcript available")
+            continue
+        sections = build_sections(video) or []
+        for index, section in enumerate(sections):
+            requests.append(_request_line(
+                _custom_id(video.video_id, "chapter", index), gpt.chapter_summary_messages(section), model, "chapter"
+            ))
+        unified_transcript = preprocessing.compact_transcript(video.transcript)
+        requests.append(_request_line(
+            _custom_id(video.video_id, "video"), gpt.whole_transcript_summary_messages(unified_transcript), model, "video"
+        ))
+    logger.info(f"Prepared {len(requests)} batch requests for {len(videos)} videos")
+    return requests
+
+
+def write_batch_file(requests: list[dict], path: str) -> str:
+    """
+    Writes batch request lines to a JSONL file.
+    Args:
+        requests (list[dict]): The request lines created by build_batch_requests().
+        path (str): The path of the JSONL file.
+    Returns:
+        str: The path of the written file.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        for request in requests:
+            file.write(json.dumps(request, ensure_ascii=False) + "\n")
+    logger.info(f"Wrote {len(requests)} requests to {path}")
+    return path
+
+
+def submit_batch(path: str, client) -> str:
+    """
+    Uploads the batch file and creates the batch job.
+    Args:
+        path (str): The path of the JSONL batch file.
+        client: An OpenAI client (or a compatible stub).
+    Returns:
+        str: The ID of the created batch.
+    """
+    with open(path, "rb") as file:
+        batch_file = client.files.create(file=file, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    logger.info(f"Submitted batch {batch.id} from {path}")
+    return batch.id
+
+
+def wait_for_batch(batch_id: str, client, poll_interval: float = 60, timeout: float | None = None):
+    """
+    Polls the batch job until it has reached a final state.
+    Args:
+        batch_id (str): The ID of the batch.
+        client: An OpenAI client (or a compatible stub).
+        poll_interval (float): Seconds between two status requests. Defaults to 60.
+        timeout (float, optional): Maximum number of seconds to wait. Defaults to None (wait forever).
+    Returns:
+        The final batch object.
+    Raises:
+        TimeoutError: If the batch has not finished within the timeout.
+    """
+    started = time.monotonic()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        logger.info(f"Batch {batch_id} status: {batch.status}")
+        if batch.status in FINISHED_STATES:
+            return batch
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {timeout} seconds")
+        time.sleep(poll_interval)
+
+
+def _read_output_lines(client, file_id: str | None) -> list[dict]:
+    if not file_id:
+        return []
+    content = client.files.content(file_id).text
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+@profiling.profiled
+def collect_results(batch, client, videos: list[YouTubeVideo]) -> dict[str, dict]:
+    """
+    Downloads the batch output and matches every answer back to its video and section.
+    Requests without a line in the output or error file (e.g. in an expired batch) are reported as errors.
+    The summaries are also stored on the videos, so the regular summary functions reuse them; chapter summaries
+    only once every chapter of the video has been summarized.
+    Args:
+        batch: The finished batch object.
+        client: An OpenAI client (or a compatible stub).
+        videos (list[YouTubeVideo]): The videos that were part of the batch.
+    Returns:
+        dict: Results per video ID with the keys 'title', 'channel', 'chapters' (list with one entry per section,
+            None where the summary is missing), 'video' (str) and 'errors' (list).
+    """
+    videos_by_id = {video.video_id: video for video in videos}
+    results = {
+        video.video_id: {"title": video.title, "channel": video.channel, "chapters": [], "video": None, "errors": []}
+        for video in videos
+    }
+    # The custom IDs build_batch_requests() has written for every video
+    expected = set()
+    for video in videos:
+        if not video.transcript:
+            continue
+        results[video.video_id]["chapters"] = [None] * len(build_sections(video) or [])
+        expected.update(_custom_id(video.video_id, "chapter", index) for index in range(len(results[video.video_id]["chapters"])))
+        expected.add(_custom_id(video.video_id, "video"))
+
+    lines = _read_output_lines(client, batch.output_file_id) + _read_output_lines(client, getattr(batch, "error_file_id", None))
+    for line in lines:
+        video_id, kind, index = _parse_custom_id(line["custom_id"])
+        if video_id not in results:
+            logger.error(f"Unknown custom ID in batch output: {line['custom_id']}")
+            continue
+        expected.discard(line["custom_id"])
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            results[video_id]["errors"].append({"custom_id": line["custom_id"], "error": line.get("error") or response.get("body")})
+            continue
+        content = response["body"]["choices"][0]["message"]["content"]
+        if kind == "chapter":
+            if index < len(results[video_id]["chapters"]):
+                results[video_id]["chapters"][index] = content
+            else:
+                logger.error(f"Chapter index out of range in batch output: {line['custom_id']}")
+        else:
+            results[video_id]["video"] = content
+    for custom_id in sorted(expected):
+        results[_parse_custom_id(custom_id)[0]]["errors"].append({"custom_id": custom_id, "error": "missing from batch output"})
+    if expected:
+        logger.error(f"{len(expected)} requests are missing from the output of batch {batch.id}")
+
+    for video_id, result in results.items():
+        video = videos_by_id[video_id]
+        if result["chapters"] and None not in result["chapters"]:
+            video.summaries["chapters"] = result["chapters"]
+        if result["video"]:
+            video.summaries["video"] = result["video"]
+    return results
+
+
+def run_batch(urls: list[str], api_key: str, path: str = "batch_requests.jsonl", poll_interval: float = 60, client=None) -> dict[str, dict]:
+    """
+    Loads all videos, submits their chapter and whole-video requests as one batch and waits for the results.
+    Args:
+        urls (list[str]): The YouTube video URLs.
+        api_key (str): The OpenAI API key.
+        path (str): The path of the JSONL batch file. Defaults to "batch_requests.jsonl".
+        poll_interval (float): Seconds between two status requests. Defaults to 60.
+        client (optional): A client to use instead of a new OpenAI client.
+    Returns:
+        dict: Results per video ID, see collect_results().
+    """
+    client = client or gpt.get_client(api_key)
+    with profiling.profile_run("batch"):
+        videos = []
+        for url in urls:
+            video = YouTubeVideo(url=url)
+            video.get_data()
+            videos.append(video)
+
+        write_batch_file(build_batch_requests(videos), path)
+        batch_id = submit_batch(path, client)
+        batch = wait_for_batch(batch_id, client, poll_interval=poll_interval)
+        if batch.status != "completed":
+            logger.error(f"Batch {batch_id} finished with status {batch.status}")
+        return collect_results(batch, client, videos)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarize many YouTube videos with the OpenAI Batch API.")
+    parser.add_argument("url_file", help="Text file with one YouTube URL per line")
+    parser.add_argument("--batch-file", default="batch_requests.jsonl", help="Path of the JSONL batch file")
+    parser.add_argument("--output", default="batch_results.json", help="Path of the JSON result file")
+    parser.add_argument("--poll-interval", type=float, default=60, help="Seconds between status checks")
+    parser.add_argument("--profile", action="store_true", help="Write a CPU profile of the run, see src/profiling.py")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.configure_profiling(enabled=True)
+
+    with open(args.url_file, encoding="utf-8") as file:
+        urls = [line.strip() for line in file if line.strip()]
+    results = run_batch(urls, api_key=os.getenv("OPENAI_API_KEY"), path=args.batch_file, poll_interval=args.poll_interval)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
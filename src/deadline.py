@@ -0,0 +1,71 @@
+"""
+This module provides the per-job deadline that is passed down into every page fetch and LLM call of a summary job.
+Classes:
+    Deadline: A point in time after which a job stops waiting and returns what it has.
+    DeadlineExceeded: Raised when a call is started or continued after its deadline.
+"""
+# Native Libraries
+import threading
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    The deadline of the job has expired or the job has been cancelled.
+    """
+
+
+class Deadline:
+    """
+    A monotonic deadline that can also be cancelled early, e.g. when the user starts a new job.
+    Deadlines are shared between threads: all calls of one job see the same expiry and cancellation.
+    Attributes:
+        seconds (float | None): The time budget of the job, None for no time limit.
+    """
+    def __init__(self, seconds: float | None = None):
+        self.seconds = seconds
+        self._expires_at = None if seconds is None else time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> float | None:
+        """
+        Returns:
+            float: Seconds left until the deadline (0 if expired or cancelled).
+            None: If the deadline has no time limit and is not cancelled.
+        """
+        if self._cancelled.is_set():
+            return 0.0
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def timeout(self, default: float | None = None) -> float | None:
+        """
+        Returns the timeout for a single call: the remaining time, capped at the call's own default timeout.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(remaining, default)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """
+        Expires the deadline immediately. Running calls stop at their next check.
+        """
+        self._cancelled.set()
+
+    def check(self) -> None:
+        """
+        Raises:
+            DeadlineExceeded: If the deadline has expired or has been cancelled.
+        """
+        if self.expired:
+            raise DeadlineExceeded("cancelled" if self.cancelled else f"deadline of {self.seconds} seconds exceeded")
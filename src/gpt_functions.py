@@ -1,213 +1,626 @@
-from openai import OpenAI
+import json
 import os
+import time
+from functools import lru_cache
 from typing import List, Dict
+try:
+    import src.model_router as model_router
+    from src.deadline import Deadline, DeadlineExceeded
+    from src.hedging import Hedger
+    from src.preprocessing import compact_section, estimate_tokens
+    from src.profiling import profiled
+except ImportError:
+    import model_router
+    from deadline import Deadline, DeadlineExceeded
+    from hedging import Hedger
+    from preprocessing import compact_section, estimate_tokens
+    from profiling import profiled
 
 
-def get_chapter_summary(section: Dict, model: str = 'gpt-4o-mini', api_key=os.getenv("OPENAI_API_KEY")) -> str:
+# Default number of retries of the OpenAI client
+MAX_RETRIES = 2
+# Cheapest model of the routing cascade, used by the Batch API mode
+DEFAULT_MODEL = model_router.CASCADE[0]
+# Upper bound in seconds for a single request, also without a job deadline
+REQUEST_TIMEOUT = 120
+
+# Hedging of slow requests is opt-in, see configure_hedging()
+_hedger: Hedger | None = Hedger() if os.getenv("TUBE_TLDR_HEDGING") else None
+
+CHAPTER_SUMMARY_PROMPT = 'Summarize the following section of the video. \
+    Use the provided content to generate a summary of the section. \
+    Stay in the original language. \
+    Explain the content short and conversational as a bullet point. \
+    Do not write things like "They mention the importance" or "the speaker says". \
+    If they talk about the 5 things or the 9 types or something like that, list them. \
+    Answer the question thats given in the topic or chapter title if available. \
+    Put the topic with timestamp (in h, min, sec) [if available] in the format "hh:mm:ss" or "mm:ss" as a heading in the format: "Heading Topic (00:34)"\
+    Every Heading should be a markdown ## heading. If there is no heading title (eg. just Chapter 1), create a heading out of the content provided. \
+    Try to keep it as short as possible, but as long as necessary.'
+
+WHOLE_TRANSCRIPT_SUMMARY_PROMPT = 'Summarize the following transcript of a video. \
+    Use the provided content to generate a summary of the entire video. \
+    Stay in the original language. \
+    Explain the content in a short, conversational way as bullet points. \
+    Do not write things like "They mention the importance" or "the speaker says". \
+    If the video discusses lists (e.g., 5 things, 9 types), enumerate them. \
+    If there are questions in the title or main topic, answer them. \
+    Try to keep the summary as short as possible, but as long as necessary to cover the main points.'
+
+REWORK_TRANSCRIPT_PROMPT = 'Rework the following transcript item to a more readable format.\
+    Stay in the original language!  \
+    Do not change the content, just make it more readable. \
+    Shorten this into whole sentences. I want you to build whole sentences with the timestamps, but keep it as short as it makes sense to get a whole and finished sentence. \
+    You are allowed to polish that sentence and add punctuation, etc.'
+
+SHORTS_SCRIPT_PROMPT = 'Create a Voiceover for short-form content based on the provided trancript. \
+    Stay in the original language and keep it short, engaging and conversational! \
+    Create a HOOK at the beginning of the video like "Hast du dich schon mal gefragt, ...?" \
+    and a CALL TO ACTION at the end of the video, e.g to check out the full video on the channel. \
+    Make it as short as possible! No AI slop or unnecessary words. Absolutely laidback and on point. \
+    Create a smooth text without timestamps or block elements to that it can immediately be sythezized to Voice. \
+    '
+
+# Appended to the system prompt of packed requests, which handle several parts of one task in a single call
+PACKED_OUTPUT_PROMPT = 'You get several parts, each starting with a line "### Part <id>". \
+    Handle every part on its own exactly as described above. \
+    Answer with a JSON object that maps the id of every part to the result for that part.'
+
+# System prompt of the combined request, which writes the chapter, whole-video and one-sentence summaries in one call
+COMBINED_SUMMARY_PROMPT = 'You get the sections of a video, each starting with a line "### Part <id>". \
+    Write three summaries of the video and answer with a JSON object. \
+    "chapters" maps the id of every part to its summary, written like this: ' + CHAPTER_SUMMARY_PROMPT + ' \
+    "video" is the summary of the entire video, written like this: ' + WHOLE_TRANSCRIPT_SUMMARY_PROMPT + ' \
+    "sentence" summarizes the entire video in EXACTLY ONE SENTENCE. It can be longer if necessary to conserve information. \
+    Add the title as a markdown #### heading to the sentence.'
+
+# System prompt of questions about a video, answered from retrieved transcript passages
+QUESTION_ANSWER_PROMPT = 'Answer the question about the video using only the provided transcript passages. \
+    Every passage starts with its timestamp in square brackets. \
+    Answer in the language of the question, short and to the point. \
+    Cite the timestamps of the passages you use in the format "(mm:ss)" or "(hh:mm:ss)" right after the statement they support. \
+    If the passages do not answer the question, say that the video does not seem to cover it.'
+
+
+def chapter_summary_messages(section: Dict) -> List[Dict]:
     """
-    Generates a summary for a given section of a video using the specified OpenAI model.
-    Model can convert timedelta to string format. (impressive)
+    Builds the chat messages for summarizing a single section of a video.
     Args:
-        section (dict): The section of the video to summarize.
+        section (dict): The section of the video to summarize, sent in the compact format of compact_section().
             keys: 'timestamp' (timedelta), 'heading' (str), content (str)
-        model (str, optional): The model to use for generating the summary. Defaults to 'gpt-4o-mini'.
     Returns:
-        str: The generated summary of the section.
+        list[dict]: The system and user messages for the chat completion.
+    """
+    return [
+        {'role': 'system', 'content': CHAPTER_SUMMARY_PROMPT},
+        {'role': 'user', 'content': compact_section(section)}
+    ]
+
+
+def whole_transcript_summary_messages(transcript: str) -> List[Dict]:
+    """
+    Builds the chat messages for summarizing an entire transcript.
+    Args:
+        transcript (str): The transcript of the video as a single string.
+    Returns:
+        list[dict]: The system and user messages for the chat completion.
+    """
+    return [
+        {'role': 'system', 'content': WHOLE_TRANSCRIPT_SUMMARY_PROMPT},
+        {'role': 'user', 'content': transcript}
+    ]
+
+
+@lru_cache(maxsize=16)
+def get_client(api_key: str, max_retries: int = MAX_RETRIES):
+    """
+    Returns an OpenAI client per API key, so connections are pooled across requests.
+    openai is only imported on first use, it dominates the import time of the app.
+    Args:
+        api_key (str): The OpenAI API key.
+        max_retries (int): Retries of failed requests. Defaults to MAX_RETRIES.
+    Returns:
+        openai.OpenAI: The shared client.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, max_retries=max_retries)
+
+
+def _is_fatal(error: Exception) -> bool:
+    # Errors a stronger model cannot fix; openai is already imported once a request has failed
+    from openai import AuthenticationError, PermissionDeniedError
+    return isinstance(error, (AuthenticationError, PermissionDeniedError))
+
+
+def _create_completion(api_key: str, deadline: Deadline | None = None, **kwargs):
+    """
+    Sends a chat completion request that never waits longer than the job's deadline.
+    The request timeout is the remaining time of the deadline, capped at REQUEST_TIMEOUT.
+    With a job deadline the client does not retry on its own: a missing result is retried by the next job instead.
+    Args:
+        api_key (str): The OpenAI API key.
+        deadline (Deadline, optional): The deadline of the job, or of a hedged attempt (see hedging.py).
+        **kwargs: The arguments of chat.completions.create.
+    Returns:
+        The chat completion (or the stream if stream=True).
+    Raises:
+        DeadlineExceeded: If the deadline has already expired.
+    """
+    timeout = REQUEST_TIMEOUT
+    if deadline is not None:
+        deadline.check()
+        timeout = deadline.timeout(REQUEST_TIMEOUT)
+    # Hedged attempts always get a deadline of their own; only the job's deadline decides about retries
+    job_deadline = getattr(deadline, "parent", deadline)
+    client = get_client(api_key, max_retries=0) if job_deadline is not None else get_client(api_key)
+    return client.chat.completions.create(timeout=timeout, **kwargs)
+
+
+@profiled
+def _read_stream(response, deadline: Deadline | None = None) -> tuple[str, str | None]:
+    """
+    Joins the content of a streamed completion. The stream is closed as soon as the deadline expires.
+    Returns:
+        tuple[str, str | None]: The text and the finish reason of the completion.
     """
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {'role': 'system', 
-            'content': 
-                'Summarize the following section of the video. \
-                    Use the provided content to generate a summary of the section. \
-                    Stay in the original language. \
-                    Explain the content short and conversational as a bullet point. \
-                    Do not write things like "They mention the importance" or "the speaker says". \
-                    If they talk about the 5 things or the 9 types or something like that, list them. \
-                    Answer the question thats given in the topic or chapter title if available. \
-                    Put the topic with timestamp (in h, min, sec) [if available] in the format "hh:mm:ss" or "mm:ss" as a heading in the format: "Heading Topic (00:34)"\
-                    Every Heading should be a markdown ## heading. If there is no heading title (eg. just Chapter 1), create a heading out of the content provided. \
-                    Try to keep it as short as possible, but as long as necessary.'},
-
-            {'role': 'user', 'content': str(section)}
-        ],
-        temperature=0.08,
-        max_tokens=1024,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0,
-        stream=True
-    )
-
-    result = ""
+    result, finish_reason = "", None
     for chunk in response:
+        if deadline is not None and deadline.expired:
+            response.close()
+            raise DeadlineExceeded("deadline expired while streaming")
+        if not chunk.choices:
+            continue
         if chunk.choices[0].delta.content is not None:
             result += chunk.choices[0].delta.content
+        finish_reason = chunk.choices[0].finish_reason or finish_reason
+    return result, finish_reason
+
+
+def _complete_once(api_key: str, deadline: Deadline | None = None, **kwargs) -> tuple[str, str | None]:
+    """
+    Sends one chat completion request and returns its text and finish reason.
+    If hedging is enabled, slow requests are duplicated and the first answer is used. Hedged requests are
+    always streamed and the response of the losing attempt is closed, so it stops generating (and being billed).
+    """
+    def attempt(attempt_deadline: Deadline | None) -> tuple[str, str | None]:
+        response = _create_completion(api_key, attempt_deadline, **kwargs)
+        if kwargs.get("stream"):
+            return _read_stream(response, attempt_deadline)
+        return response.choices[0].message.content, response.choices[0].finish_reason
+
+    def hedged_attempt(attempt_deadline: Deadline) -> tuple[str, str | None]:
+        response = _create_completion(api_key, attempt_deadline, **{**kwargs, "stream": True})
+        attempt_deadline.on_cancel(response.close)
+        return _read_stream(response, attempt_deadline)
 
-    return result
+    if _hedger is None:
+        return attempt(deadline)
+    return _hedger.run(hedged_attempt, deadline)
 
 
-def get_whole_transcript_summary(transcript: str, api_key=os.getenv("OPENAI_API_KEY")) -> str:
+class RoutedCompletion:
     """
-    Generates a summary for the entire transcript. 
+    The routing policy of one completion, shared by the sync functions in this module and the async API.
+    The model and max_tokens of every attempt are chosen by the model router. If a call fails or its answer is cut
+    off at the output budget, the next model of the cascade is tried. Every attempt is recorded for the router.
+    The caller only sends the requests:
+        completion = RoutedCompletion(task, kwargs["messages"], model)
+        for attempt_model, max_tokens in completion.attempts():
+            try:
+                text, finish_reason = send(model=attempt_model, max_tokens=max_tokens, **kwargs)
+            except Exception as e:
+                completion.failed(e)
+                continue
+            if completion.finished(text, finish_reason):
+                return text
+    Attributes:
+        task (str): The task of the call, a key of model_router.TASK_POLICIES.
+        input_tokens (int): The estimated tokens of the messages.
+    """
+    def __init__(self, task: str, messages: List[Dict], model: str | None = None):
+        """
+        Args:
+            task (str): The task of the call, a key of model_router.TASK_POLICIES.
+            messages (list[dict]): The messages of the request.
+            model (str, optional): A model pinned by the caller instead of the routed one.
+        """
+        self.task = task
+        self.input_tokens = estimate_tokens("".join(message["content"] for message in messages))
+        self._attempts = model_router.route(task, self.input_tokens, model)
+        self._model, self._last, self._started = None, False, None
+
+    def attempts(self):
+        """
+        Yields:
+            tuple[str, int]: The model and max_tokens of the next attempt.
+        """
+        for number, (model, max_tokens) in enumerate(self._attempts, start=1):
+            self._model, self._last, self._started = model, number == len(self._attempts), time.monotonic()
+            yield model, max_tokens
+
+    def failed(self, error: Exception) -> None:
+        """
+        Records a failed attempt.
+        Raises:
+            Exception: The error itself if the deadline expired, a stronger model cannot fix it or it was the last attempt.
+        """
+        if isinstance(error, DeadlineExceeded) or _is_fatal(error):
+            raise error
+        model_router.record_call(self.task, self._model, self.input_tokens, 0, time.monotonic() - self._started, outcome="error")
+        if self._last:
+            raise error
+
+    def finished(self, text: str | None, finish_reason: str | None) -> bool:
+        """
+        Records an answered attempt.
+        Returns:
+            bool: True if the answer is the result, False if it was cut off and the next model is tried.
+        """
+        outcome = "length" if finish_reason == "length" and not self._last else "ok"
+        model_router.record_call(
+            self.task, self._model, self.input_tokens, estimate_tokens(text or ""), time.monotonic() - self._started, outcome
+        )
+        return outcome == "ok"
+
+
+def _complete_text(api_key: str, task: str, deadline: Deadline | None = None, model: str | None = None, **kwargs) -> str:
+    """
+    Sends a chat completion request for a task along the routing cascade (see RoutedCompletion) and returns the text.
+    Args:
+        api_key (str): The OpenAI API key.
+        task (str): The task of the call, a key of model_router.TASK_POLICIES.
+        deadline (Deadline, optional): The deadline of the job.
+        model (str, optional): A model pinned by the caller instead of the routed one.
+        **kwargs: Further arguments of chat.completions.create.
+    Returns:
+        str: The text of the answer.
+    """
+    completion = RoutedCompletion(task, kwargs["messages"], model)
+    for attempt_model, max_tokens in completion.attempts():
+        try:
+            text, finish_reason = _complete_once(api_key, deadline, model=attempt_model, max_tokens=max_tokens, **kwargs)
+        except Exception as e:
+            completion.failed(e)
+            continue
+        if completion.finished(text, finish_reason):
+            return text
+
+
+def configure_hedging(enabled: bool = True, **options) -> Hedger | None:
+    """
+    Turns hedging of slow requests on or off.
+    Args:
+        enabled (bool): Whether requests are hedged. Defaults to True.
+        **options: Options of Hedger, e.g. percentile or max_hedge_rate.
+    Returns:
+        Hedger: The new hedger, or None if hedging is disabled.
     """
-    client = OpenAI(api_key=api_key)
+    global _hedger
+    _hedger = Hedger(**options) if enabled else None
+    return _hedger
+
+
+def hedging_stats() -> dict | None:
+    """
+    Returns:
+        dict: The hedge counts and tail latencies of Hedger.stats(), or None if hedging is disabled.
+    """
+    return _hedger.stats() if _hedger else None
+
 
-    response = client.chat.completions.create(
-        model='gpt-4o-mini',
-        messages=[
-            {'role': 'system',
-            'content':
-                'Summarize the following transcript of a video. \
-                Use the provided content to generate a summary of the entire video. \
+def _request(messages: List[Dict], temperature: float = 0.08, stream: bool = False) -> Dict:
+    request = {
+        "messages": messages,
+        "temperature": temperature,
+        "top_p": 1,
+        "frequency_penalty": 0,
+        "presence_penalty": 0,
+    }
+    if stream:
+        request["stream"] = True
+    return request
+
+
+def chapter_summary_request(section: Dict) -> Dict:
+    """
+    Builds the request arguments (messages and sampling) for summarizing a single section, see get_chapter_summary().
+    The request builders are shared by the sync functions in this module and the async API.
+    """
+    return _request(chapter_summary_messages(section), stream=True)
+
+
+def whole_transcript_summary_request(transcript: str) -> Dict:
+    return _request(whole_transcript_summary_messages(transcript))
+
+
+def one_sentence_summary_request(transcript: str, title: str = "") -> Dict:
+    return _request([
+        {'role': 'system', 
+        'content': 
+            'Try to summarize the following transcript in EXACTLY ONE SENTENCE. It can be longer if necessary to conserve information.\
+            Here is the available title: ' + title + '\n\n Add the title as a markdown #### heading.'},
+
+        {'role': 'user', 'content': transcript}
+
+    ])
+
+
+def minimal_chapter_summary_request(section: Dict) -> Dict:
+    return _request([
+        {'role': 'system', 
+        'content': 
+            'Summarize the following chapter of a podcast as short as possible in max. 1-2 bullet points.\
+                Stay in the original language. Keep the heading.'},
+
+        {'role': 'user', 'content': str(section)}
+
+    ])
+
+
+def unified_summary_request(sections: List[Dict] | str) -> Dict:
+    return _request([
+        {'role': 'system', 
+        'content': 
+            'Summarize the following outline of a podcast. \
+                Do not only list the topics they talk about, but briefly explain every idea you mention in the summary. \
                 Stay in the original language. \
-                Explain the content in a short, conversational way as bullet points. \
-                Do not write things like "They mention the importance" or "the speaker says". \
-                If the video discusses lists (e.g., 5 things, 9 types), enumerate them. \
-                If there are questions in the title or main topic, answer them. \
-                Try to keep the summary as short as possible, but as long as necessary to cover the main points.'},
-
-            {'role': 'user', 'content': transcript}
-        ],
-        temperature=0.08,
-        max_tokens=1024,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0,
-    )
-    result = response.choices[0].message.content
-    return result
-
-
-def get_one_sentence_summary(transcript: str, title="", api_key=os.getenv("OPENAI_API_KEY")) -> str:
+                Still try to keep it as short as possible. Use bullet points if possible.'},
+
+        {'role': 'user', 'content': str(sections)}
+
+    ])
+
+
+def rework_transcript_request(transcript_item: dict) -> Dict:
+    return _request([
+        {'role': 'system', 'content': REWORK_TRANSCRIPT_PROMPT},
+        {'role': 'user', 'content': compact_section(transcript_item)}
+    ], temperature=0.1)
+
+
+def shorts_script_request(cleaned_transcript: str) -> Dict:
+    return _request([
+        {'role': 'system', 'content': SHORTS_SCRIPT_PROMPT},
+        {'role': 'user', 'content': cleaned_transcript}
+    ], temperature=0.1)
+
+
+def question_request(question: str, passages: List[str], title: str = "") -> Dict:
+    """
+    Builds the request for answering a question from transcript passages, see answer_question().
+    """
+    context = "\n\n".join(passages)
+    return _request([
+        {'role': 'system', 'content': QUESTION_ANSWER_PROMPT + (' The title of the video is: ' + title if title else '')},
+        {'role': 'user', 'content': f"{context}\n\nQuestion: {question}"}
+    ])
+
+
+def packed_request(system_prompt: str, parts: List[str], temperature: float = 0.08) -> Dict:
+    """
+    Builds one request that handles several parts of the same task, e.g. several small chapters.
+    The answer is constrained by a JSON schema with one required string per part id ("p0", "p1", ...),
+    so the system prompt is sent once and the answer can be split back into parts with parse_packed_results().
+    Args:
+        system_prompt (str): The prompt of the single-part task.
+        parts (list[str]): The user content of every part.
+        temperature (float): The sampling temperature. Defaults to 0.08.
+    Returns:
+        dict: The request arguments (messages, response_format and sampling).
+    """
+    ids = [f"p{index}" for index in range(len(parts))]
+    request = _request([
+        {'role': 'system', 'content': system_prompt + ' ' + PACKED_OUTPUT_PROMPT},
+        {'role': 'user', 'content': "\n\n".join(f"### Part {part_id}\n{part}" for part_id, part in zip(ids, parts))}
+    ], temperature=temperature)
+    request["response_format"] = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "packed_results",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {part_id: {"type": "string"} for part_id in ids},
+                "required": ids,
+                "additionalProperties": False,
+            },
+        },
+    }
+    return request
+
+
+@profiled
+def parse_packed_results(text: str | None, count: int) -> List[str | None]:
+    """
+    Splits the answer of a packed request into the results of its parts.
+    Returns:
+        list[str | None]: The result per part, None for parts that are missing or empty (or all, if the answer is not valid JSON).
+    """
+    try:
+        results = json.loads(text or "")
+    except json.JSONDecodeError:
+        return [None] * count
+    if not isinstance(results, dict):
+        return [None] * count
+    parsed = []
+    for index in range(count):
+        result = results.get(f"p{index}")
+        parsed.append(result.strip() if isinstance(result, str) and result.strip() else None)
+    return parsed
+
+
+def combined_summary_request(sections: List[Dict], title: str = "") -> Dict:
+    """
+    Builds one request for the chapter summaries, the whole-video summary and the one-sentence summary of a video.
+    The answer is constrained by a JSON schema, see parse_combined_summary().
+    Args:
+        sections (list[dict]): The linked sections of the video.
+        title (str): The title of the video. Defaults to "".
+    Returns:
+        dict: The request arguments (messages, response_format and sampling).
+    """
+    ids = [f"p{index}" for index in range(len(sections))]
+    parts = "\n\n".join(f"### Part {part_id}\n{compact_section(section)}" for part_id, section in zip(ids, sections))
+    request = _request([
+        {'role': 'system', 'content': COMBINED_SUMMARY_PROMPT},
+        {'role': 'user', 'content': f"Title: {title}\n\n{parts}"}
+    ])
+    request["response_format"] = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "combined_summary",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "chapters": {
+                        "type": "object",
+                        "properties": {part_id: {"type": "string"} for part_id in ids},
+                        "required": ids,
+                        "additionalProperties": False,
+                    },
+                    "video": {"type": "string"},
+                    "sentence": {"type": "string"},
+                },
+                "required": ["chapters", "video", "sentence"],
+                "additionalProperties": False,
+            },
+        },
+    }
+    return request
+
+
+@profiled
+def parse_combined_summary(text: str | None, count: int) -> Dict:
+    """
+    Splits the answer of a combined request into its products.
+    Returns:
+        dict: keys 'chapters' (list[str | None], one per section), 'video' (str | None) and 'sentence' (str | None).
+            Missing, empty or unparseable products are None.
+    """
+    try:
+        results = json.loads(text or "")
+    except json.JSONDecodeError:
+        results = {}
+    if not isinstance(results, dict):
+        results = {}
+    products = {"chapters": parse_packed_results(json.dumps(results.get("chapters")), count)}
+    for product in ("video", "sentence"):
+        value = results.get(product)
+        products[product] = value.strip() if isinstance(value, str) and value.strip() else None
+    return products
+
+
+def _complete_packed(api_key: str, task: str, request: Dict, count: int, deadline: Deadline | None = None) -> List[str | None]:
+    return parse_packed_results(_complete_text(api_key, task, deadline, **request), count)
+
+
+def get_chapter_summary(section: Dict, model: str | None = None, api_key=os.getenv("OPENAI_API_KEY"), deadline: Deadline | None = None) -> str:
+    """
+    Generates a summary for a given section of a video using the specified OpenAI model.
+    Model can convert timedelta to string format. (impressive)
+    Args:
+        section (dict): The section of the video to summarize.
+            keys: 'timestamp' (timedelta), 'heading' (str), content (str)
+        model (str, optional): Pins the model instead of routing it by section size. Defaults to None.
+        deadline (Deadline, optional): The deadline of the job, the stream is abandoned when it expires.
+    Returns:
+        str: The generated summary of the section.
+    Raises:
+        DeadlineExceeded: If the deadline expired before the summary was complete.
+    """
+    return _complete_text(api_key, "chapter", deadline, model=model, **chapter_summary_request(section))
+
+
+def get_whole_transcript_summary(transcript: str, api_key=os.getenv("OPENAI_API_KEY"), deadline: Deadline | None = None) -> str:
+    """
+    Generates a summary for the entire transcript. 
+    """
+    return _complete_text(api_key, "video", deadline, **whole_transcript_summary_request(transcript))
+
+
+def get_one_sentence_summary(transcript: str, title="", api_key=os.getenv("OPENAI_API_KEY"), deadline: Deadline | None = None) -> str:
     """
     Generates a one-sentence summary for the entire transcript. 
     """
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model='gpt-4o-mini',
-        messages=[
-            {'role': 'system', 
-            'content': 
-                'Try to summarize the following transcript in EXACTLY ONE SENTENCE. It can be longer if necessary to conserve information.\
-                Here is the available title: ' + title + '\n\n Add the title as a markdown #### heading.'},
-
-            {'role': 'user', 'content': transcript}
-        ],
-        temperature=0.08,
-        max_tokens=1024,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0,
-    )
-    result = response.choices[0].message.content
-    return result
-
-
-def get_minimal_chapter_summary(api_key: str, section: Dict, model: str = 'gpt-4o-mini') -> str:
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {'role': 'system', 
-            'content': 
-                'Summarize the following chapter of a podcast as short as possible in max. 1-2 bullet points.\
-                    Stay in the original language. Keep the heading.'},
-
-            {'role': 'user', 'content': str(section)}
-        ],
-        temperature=0.08,
-        max_tokens=256,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0,
-    )
-
-    result = response.choices[0].message.content
-    return result
-
-
-def get_unified_summary(api_key: str, sections: List[Dict]) -> str:
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model='gpt-4o-mini',
-        messages=[
-            {'role': 'system', 
-            'content': 
-                'Summarize the following outline of a podcast. \
-                    Do not only list the topics they talk about, but briefly explain every idea you mention in the summary. \
-                    Still try to keep it as short as possible. Use bullet points if possible.'},
-
-            {'role': 'user', 'content': str(sections)}
-        ],
-        temperature=0.08,
-        max_tokens=512,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0,
-    )
-    
-    result = response.choices[0].message.content
-    return result
-
-
-def rework_transcript_to_sentences(transcript_item: dict) -> dict:
-    """
-    """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model='gpt-4o-mini',
-        messages=[
-            {'role': 'system', 
-            'content': 
-                'Rework the following transcript item to a more readable format.\
-                Stay in the original language!  \
-                Do not change the content, just make it more readable. \
-                Shorten this into whole sentences. I want you to build whole sentences with the timestamps, but keep it as short as it makes sense to get a whole and finished sentence. \
-                You are allowed to polish that sentence and add punctuation, etc.'},
-
-            {'role': 'user', 'content': str(transcript_item)}
-        ],
-        temperature=0.1,
-        max_tokens=512,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0,
-    )
-    result = response.choices[0].message.content
-    return result
+    return _complete_text(api_key, "sentence", deadline, **one_sentence_summary_request(transcript, title))
+
+
+def get_minimal_chapter_summary(api_key: str, section: Dict, model: str | None = None, deadline: Deadline | None = None) -> str:
+    return _complete_text(api_key, "minimal_chapter", deadline, model=model, **minimal_chapter_summary_request(section))
+
+
+def get_unified_summary(api_key: str, sections: List[Dict] | str, deadline: Deadline | None = None) -> str:
+    """
+    Generates a summary of the entire video from its (chapter) summaries.
+    """
+    return _complete_text(api_key, "unified", deadline, **unified_summary_request(sections))
+
+
+def rework_transcript_to_sentences(transcript_item: dict, deadline: Deadline | None = None) -> dict:
+    """
+    """
+    return _complete_text(os.getenv("OPENAI_API_KEY"), "rework", deadline, **rework_transcript_request(transcript_item))
     
 
-def create_shorts_script(cleaned_transcript: str):
-    """
-    """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model='gpt-4o',
-        messages=[
-            {'role': 'system', 
-            'content': 
-                'Create a Voiceover for short-form content based on the provided trancript. \
-                Stay in the original language and keep it short, engaging and conversational! \
-                Create a HOOK at the beginning of the video like "Hast du dich schon mal gefragt, ...?" \
-                and a CALL TO ACTION at the end of the video, e.g to check out the full video on the channel. \
-                Make it as short as possible! No AI slop or unnecessary words. Absolutely laidback and on point. \
-                Create a smooth text without timestamps or block elements to that it can immediately be sythezized to Voice. \
-                '},
-
-            {'role': 'user', 'content': cleaned_transcript}
-        ],
-        temperature=0.1,
-        max_tokens=512,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0,
-    )
-    result = response.choices[0].message.content
-    return result
+def create_shorts_script(cleaned_transcript: str, deadline: Deadline | None = None):
+    """
+    """
+    return _complete_text(os.getenv("OPENAI_API_KEY"), "shorts", deadline, **shorts_script_request(cleaned_transcript))
+
+
+def get_packed_chapter_summaries(sections: List[Dict], api_key=os.getenv("OPENAI_API_KEY"), deadline: Deadline | None = None) -> List[str | None]:
+    """
+    Summarizes several sections in one request, see get_chapter_summary() and packed_request().
+    Args:
+        sections (list[dict]): The sections to summarize.
+        deadline (Deadline, optional): The deadline of the job.
+    Returns:
+        list[str | None]: The summary per section, None where the answer could not be parsed.
+    """
+    request = packed_request(CHAPTER_SUMMARY_PROMPT, [compact_section(section) for section in sections])
+    return _complete_packed(api_key, "packed_chapters", request, len(sections), deadline)
+
+
+def rework_transcripts_to_sentences(transcript_items: List[dict], deadline: Deadline | None = None) -> List[str | None]:
+    """
+    Packed counterpart of rework_transcript_to_sentences().
+    """
+    request = packed_request(REWORK_TRANSCRIPT_PROMPT, [compact_section(item) for item in transcript_items], temperature=0.1)
+    return _complete_packed(os.getenv("OPENAI_API_KEY"), "packed_rework", request, len(transcript_items), deadline)
+
+
+def create_shorts_scripts(cleaned_transcripts: List[str], deadline: Deadline | None = None) -> List[str | None]:
+    """
+    Packed counterpart of create_shorts_script().
+    """
+    request = packed_request(SHORTS_SCRIPT_PROMPT, cleaned_transcripts, temperature=0.1)
+    return _complete_packed(os.getenv("OPENAI_API_KEY"), "packed_shorts", request, len(cleaned_transcripts), deadline)
+
+
+def get_combined_summary(sections: List[Dict], title: str = "", api_key=os.getenv("OPENAI_API_KEY"), deadline: Deadline | None = None) -> Dict:
+    """
+    Generates the chapter summaries, the whole-video summary and the one-sentence summary in one request.
+    Args:
+        sections (list[dict]): The linked sections of the video.
+        title (str): The title of the video. Defaults to "".
+        deadline (Deadline, optional): The deadline of the job.
+    Returns:
+        dict: The products, see parse_combined_summary().
+    """
+    request = combined_summary_request(sections, title)
+    return parse_combined_summary(_complete_text(api_key, "combined", deadline, **request), len(sections))
+
+
+def answer_question(question: str, passages: List[str], title: str = "", api_key=os.getenv("OPENAI_API_KEY"), deadline: Deadline | None = None) -> str:
+    """
+    Answers a question about a video from the passages of its transcript that match the question.
+    Args:
+        question (str): The question of the user.
+        passages (list[str]): The passages, each starting with its timestamp in square brackets.
+        title (str): The title of the video. Defaults to "".
+        deadline (Deadline, optional): The deadline of the job.
+    Returns:
+        str: The answer with the cited timestamps.
+    """
+    return _complete_text(api_key, "qa", deadline, **question_request(question, passages, title))
@@ -0,0 +1,214 @@
+"""
+This module provides hedged requests to cut the tail latency of LLM calls.
+If a request has not returned after a latency percentile learned from recent requests, a duplicate is sent.
+Whichever attempt finishes first wins and the other one is cancelled. A cap on the share of hedged requests
+keeps the extra cost bounded.
+Classes:
+    Hedger: Runs calls with hedging and keeps latency and hedge statistics.
+"""
+# Native Libraries
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, TypeVar
+# User-defined Libraries
+try:
+    from src.deadline import Deadline, DeadlineExceeded
+    from src.logger import Logger
+except ImportError:
+    from deadline import Deadline, DeadlineExceeded
+    from logger import Logger
+
+
+T = TypeVar("T")
+logger = Logger.create_logger(name="Hedging")
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _AttemptDeadline(Deadline):
+    """
+    The deadline of a single attempt: it expires with the job's deadline or when the attempt is cancelled.
+    Attributes:
+        parent (Deadline | None): The deadline of the job.
+    """
+    def __init__(self, parent: Deadline | None):
+        super().__init__()
+        self.parent = parent
+        self._on_cancel: list[Callable[[], None]] = []
+        self._callback_lock = threading.Lock()
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """
+        Runs the callback once the attempt is cancelled (at once if it already is), e.g. to close its response.
+        """
+        with self._callback_lock:
+            if not self.cancelled:
+                self._on_cancel.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        super().cancel()
+        with self._callback_lock:
+            callbacks, self._on_cancel = self._on_cancel, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Closing a cancelled attempt failed: {e}")
+
+    def remaining(self) -> float | None:
+        own = super().remaining()
+        if own == 0 or self.parent is None:
+            return own
+        return self.parent.remaining()
+
+
+class Hedger:
+    """
+    Sends a duplicate of slow requests and keeps the first answer.
+    Attributes:
+        percentile (float): Latency percentile of recent requests after which a duplicate is sent.
+        max_hedge_rate (float): Maximum share of requests that may be hedged.
+        min_samples (int): Number of observed latencies needed before hedging starts.
+        min_delay (float): Lower bound in seconds for the hedge delay.
+    """
+    def __init__(
+        self,
+        percentile: float = 0.9,
+        max_hedge_rate: float = 0.1,
+        min_samples: int = 20,
+        window: int = 200,
+        min_delay: float = 1.0,
+        max_workers: int = 32,
+    ):
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Latency of every request as seen by the caller
+        self._request_latencies: deque[float] = deque(maxlen=window)
+        # Latency of the first attempt alone; cancelled attempts count with the time they had taken so far
+        self._primary_latencies: deque[float] = deque(maxlen=window)
+
+    def hedge_delay(self) -> float | None:
+        """
+        Returns:
+            float: Seconds after which a duplicate is sent.
+            None: If there are not enough observed latencies yet.
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            return max(self.min_delay, _percentile(list(self._latencies), self.percentile))
+
+    def _may_hedge(self) -> bool:
+        with self._lock:
+            return self.hedges + 1 <= self.max_hedge_rate * self.requests
+
+    def _attempt(self, call: Callable[[Deadline], T], attempt_deadline: Deadline) -> tuple[T, float]:
+        started = time.monotonic()
+        result = call(attempt_deadline)
+        latency = time.monotonic() - started
+        with self._lock:
+            self._latencies.append(latency)
+        return result, latency
+
+    def run(self, call: Callable[[Deadline], T], deadline: Deadline | None = None) -> T:
+        """
+        Runs the call and, if it is slow, a duplicate of it.
+        Args:
+            call (Callable[[Deadline], T]): Performs the request. It gets the attempt's deadline and should stop
+                (e.g. close its stream) once that deadline has expired; it can register the cleanup with
+                attempt_deadline.on_cancel() to stop the losing attempt right away.
+            deadline (Deadline, optional): The deadline of the job.
+        Returns:
+            T: The result of the first successful attempt.
+        Raises:
+            Exception: The error of the last attempt if no attempt succeeded.
+        """
+        with self._lock:
+            self.requests += 1
+        started = time.monotonic()
+        primary_deadline = _AttemptDeadline(deadline)
+        primary = self._executor.submit(self._attempt, call, primary_deadline)
+        attempts = {primary: primary_deadline}
+
+        delay = self.hedge_delay()
+        if delay is not None and deadline is not None:
+            delay = deadline.timeout(delay)
+        if delay is not None and not wait([primary], timeout=delay).done and self._may_hedge():
+            with self._lock:
+                self.hedges += 1
+            logger.info(f"Request still running after {delay:.1f}s, sending a hedged duplicate")
+            hedge_deadline = _AttemptDeadline(deadline)
+            attempts[self._executor.submit(self._attempt, call, hedge_deadline)] = hedge_deadline
+
+        pending = set(attempts)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining() if deadline else None, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                try:
+                    result, _ = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                for other in pending:
+                    attempts[other].cancel()
+                self._record(started, primary, future)
+                return result
+        for other in pending:
+            attempts[other].cancel()
+        self._record(started, primary, None)
+        raise error or DeadlineExceeded("no attempt finished before the deadline")
+
+    def _record(self, started: float, primary, winner) -> None:
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._request_latencies.append(elapsed)
+            if winner is not None and winner is not primary:
+                self.hedge_wins += 1
+            if primary.done() and not primary.exception():
+                self._primary_latencies.append(primary.result()[1])
+            else:
+                self._primary_latencies.append(elapsed)
+
+    def stats(self) -> dict:
+        """
+        Returns the hedge counts and the tail latency with hedging compared to the first attempts alone.
+        The latency of a cancelled first attempt is only known up to its cancellation, so the values without
+        hedging are lower bounds.
+        Returns:
+            dict: keys 'requests', 'hedges', 'hedge_rate', 'hedge_wins', 'p50', 'p95', 'p99',
+                'p95_without_hedging', 'p99_without_hedging' (seconds, None without data).
+        """
+        with self._lock:
+            latencies, primaries = list(self._request_latencies), list(self._primary_latencies)
+            requests, hedges, wins = self.requests, self.hedges, self.hedge_wins
+        return {
+            "requests": requests,
+            "hedges": hedges,
+            "hedge_rate": hedges / requests if requests else 0.0,
+            "hedge_wins": wins,
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "p99": _percentile(latencies, 0.99),
+            "p95_without_hedging": _percentile(primaries, 0.95),
+            "p99_without_hedging": _percentile(primaries, 0.99),
+        }
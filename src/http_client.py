@@ -0,0 +1,184 @@
+"""
+This module provides the shared HTTP session used to fetch YouTube pages.
+The session keeps connections alive in a pool, negotiates compression, applies strict timeouts and bounded retries,
+and revalidates pages it has already downloaded with ETag / Last-Modified.
+Functions:
+    get_session: Returns the process-wide requests session.
+    fetch: Downloads a page, reusing the cached copy if the server reports it unchanged.
+    create_async_client: Returns a pooled asynchronous client for use in an event loop.
+    fetch_async: The asynchronous counterpart of fetch.
+"""
+# Native Libraries
+import threading
+from collections import OrderedDict
+# External Libraries
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+# User-defined Libraries
+try:
+    from src.logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 15
+MAX_RETRIES = 3
+POOL_SIZE = 16
+# Number of pages kept for conditional revalidation
+PAGE_CACHE_SIZE = 128
+
+logger = Logger.create_logger(name="HttpClient")
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_page_cache: "OrderedDict[str, dict]" = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+
+def _accept_encoding() -> str:
+    # urllib3 only decodes brotli if one of the brotli packages is installed
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return "gzip, deflate"
+    return "gzip, deflate, br"
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide session with keep-alive connection pooling and retries.
+    Retries cover connection errors and the status codes 429, 500, 502, 503 and 504 with exponential backoff.
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": _accept_encoding()})
+            _session = session
+        return _session
+
+
+def _conditional_headers(url: str) -> tuple[dict | None, dict]:
+    # Validators of a cached copy turn the request into a conditional one
+    with _page_cache_lock:
+        cached = _page_cache.get(url)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return cached, headers
+
+
+def _reuse_cached(url: str, cached: dict) -> bytes:
+    logger.info(f"Not modified, using cached page for {url}")
+    with _page_cache_lock:
+        _page_cache.move_to_end(url)
+    return cached["content"]
+
+
+def _remember(url: str, headers, content: bytes) -> bytes:
+    # Only pages with validators can be revalidated, others are not kept
+    etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+    if etag or last_modified:
+        with _page_cache_lock:
+            _page_cache[url] = {"etag": etag, "last_modified": last_modified, "content": content}
+            _page_cache.move_to_end(url)
+            while len(_page_cache) > PAGE_CACHE_SIZE:
+                _page_cache.popitem(last=False)
+    return content
+
+
+def fetch(url: str, timeout: float | None = None) -> bytes:
+    """
+    Downloads a page through the shared session.
+    If the page has been downloaded before with an ETag or Last-Modified header, the request is conditional
+    and a 304 answer returns the cached content without downloading the page again.
+    Args:
+        url (str): The URL of the page.
+        timeout (float, optional): Upper bound in seconds for connecting and reading. Defaults to the module timeouts.
+    Returns:
+        bytes: The (decompressed) content of the page.
+    Raises:
+        requests.exceptions.HTTPError: If the request returned an unsuccessful status code.
+        requests.exceptions.Timeout: If the server did not answer in time.
+    """
+    cached, headers = _conditional_headers(url)
+    if timeout is None:
+        request_timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    else:
+        request_timeout = (min(CONNECT_TIMEOUT, timeout), min(READ_TIMEOUT, timeout))
+    response = get_session().get(url, headers=headers, timeout=request_timeout)
+    if response.status_code == 304 and cached:
+        return _reuse_cached(url, cached)
+    response.raise_for_status()
+    return _remember(url, response.headers, response.content)
+
+
+def clear_cache() -> None:
+    """
+    Forgets all pages kept for revalidation.
+    """
+    with _page_cache_lock:
+        _page_cache.clear()
+
+
+def create_async_client():
+    """
+    Creates an asynchronous HTTP client with the same pooling, compression and timeouts as the shared session.
+    Asynchronous clients belong to the event loop they are used in, so every async caller creates and closes its own.
+    Connection errors are retried, unlike the shared session the client does not retry on error status codes.
+    Returns:
+        httpx.AsyncClient: The client.
+    """
+    import httpx
+    return httpx.AsyncClient(
+        headers={"Accept-Encoding": _accept_encoding()},
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=POOL_SIZE * 4, max_keepalive_connections=POOL_SIZE),
+        transport=httpx.AsyncHTTPTransport(retries=MAX_RETRIES),
+        follow_redirects=True,
+    )
+
+
+async def fetch_async(client, url: str, timeout: float | None = None) -> bytes:
+    """
+    Downloads a page with an asynchronous client, see fetch(). Both share the cache of revalidated pages.
+    Args:
+        client (httpx.AsyncClient): The client, see create_async_client().
+        url (str): The URL of the page.
+        timeout (float, optional): Upper bound in seconds for connecting and reading. Defaults to the client's timeouts.
+    Returns:
+        bytes: The (decompressed) content of the page.
+    Raises:
+        httpx.HTTPStatusError: If the request returned an unsuccessful status code.
+        httpx.TimeoutException: If the server did not answer in time.
+    """
+    import httpx
+    cached, headers = _conditional_headers(url)
+    request_timeout = httpx.USE_CLIENT_DEFAULT
+    if timeout is not None:
+        request_timeout = httpx.Timeout(min(READ_TIMEOUT, timeout), connect=min(CONNECT_TIMEOUT, timeout))
+    response = await client.get(url, headers=headers, timeout=request_timeout)
+    if response.status_code == 304 and cached:
+        return _reuse_cached(url, cached)
+    response.raise_for_status()
+    return _remember(url, response.headers, response.content)
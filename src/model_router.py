@@ -0,0 +1,186 @@
+"""
+This module picks the model and the output budget of every LLM call.
+The decision depends on the task, the size of the input and the configured latency and cost targets.
+Calls start with the cheapest model that meets the targets and escalate along a cascade to stronger models if a
+call fails or its answer is cut off at the output budget.
+Functions:
+    configure_routing: Sets the latency and cost targets and turns the cascade on or off.
+    choose_model: Returns the model and output budget of the first attempt of a call.
+    route: Returns the (model, max_tokens) attempts of a call.
+    route_label: Returns a stable name of the routing policy, used as model key in the summary store.
+    record_call: Logs and aggregates the outcome of a call.
+    routing_stats: Returns the aggregated calls, tokens, latency and cost per task and model.
+"""
+# Native Libraries
+import os
+import threading
+# User-defined Libraries
+try:
+    from src.logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+# Estimates per model: USD per 1M input/output tokens, fixed overhead in seconds, output tokens per second
+# and the context window in tokens
+MODEL_PROFILES = {
+    "gpt-4o-mini": {"input_cost": 0.15, "output_cost": 0.60, "overhead": 0.5, "tokens_per_second": 80, "context_window": 128_000},
+    "gpt-4o": {"input_cost": 2.50, "output_cost": 10.00, "overhead": 0.8, "tokens_per_second": 50, "context_window": 128_000},
+}
+# Models ordered from cheap to strong
+CASCADE = ("gpt-4o-mini", "gpt-4o")
+
+# Output budget per task: a share of the input tokens, clamped to [min_tokens, max_tokens]
+TASK_POLICIES = {
+    "chapter": {"output_ratio": 0.35, "min_tokens": 256, "max_tokens": 1024},
+    "video": {"output_ratio": 0.1, "min_tokens": 384, "max_tokens": 1024},
+    "unified": {"output_ratio": 0.3, "min_tokens": 256, "max_tokens": 512},
+    "sentence": {"output_ratio": 0.0, "min_tokens": 192, "max_tokens": 192},
+    "minimal_chapter": {"output_ratio": 0.2, "min_tokens": 96, "max_tokens": 256},
+    "rework": {"output_ratio": 1.2, "min_tokens": 256, "max_tokens": 1024},
+    "shorts": {"output_ratio": 0.5, "min_tokens": 256, "max_tokens": 512},
+    # Packed requests answer for several sections at once, see gpt_functions.packed_request()
+    "packed_chapters": {"output_ratio": 0.35, "min_tokens": 512, "max_tokens": 2048},
+    "packed_rework": {"output_ratio": 1.2, "min_tokens": 512, "max_tokens": 4096},
+    "packed_shorts": {"output_ratio": 0.5, "min_tokens": 512, "max_tokens": 2048},
+    # Chapter, whole-video and one-sentence summary in one answer
+    "combined": {"output_ratio": 0.45, "min_tokens": 768, "max_tokens": 4096},
+    # Answer to a question about a video from the retrieved transcript passages, see video_qa.py
+    "qa": {"output_ratio": 0.2, "min_tokens": 192, "max_tokens": 512},
+}
+# Escalated attempts get a larger output budget, since a cut-off answer is one reason to escalate
+ESCALATION_TOKEN_FACTOR = 2
+ESCALATION_MAX_TOKENS = 2048
+
+logger = Logger.create_logger(name="ModelRouter")
+_config = {
+    "max_latency": float(os.getenv("TUBE_TLDR_MAX_LATENCY")) if os.getenv("TUBE_TLDR_MAX_LATENCY") else None,
+    "max_cost": float(os.getenv("TUBE_TLDR_MAX_COST")) if os.getenv("TUBE_TLDR_MAX_COST") else None,
+    "cascade": os.getenv("TUBE_TLDR_CASCADE", "1") != "0",
+}
+_stats: dict[tuple[str, str], dict] = {}
+_stats_lock = threading.Lock()
+
+
+def configure_routing(max_latency: float | None = None, max_cost: float | None = None, cascade: bool = True) -> None:
+    """
+    Sets the routing targets.
+    Args:
+        max_latency (float, optional): Predicted seconds a call may take. Models above it are skipped.
+        max_cost (float, optional): Predicted USD a call may cost. Models above it are skipped.
+        cascade (bool): Escalate to stronger models on failure or cut-off answers. Defaults to True.
+    """
+    _config.update(max_latency=max_latency, max_cost=max_cost, cascade=cascade)
+
+
+def output_budget(task: str, input_tokens: int) -> int:
+    policy = TASK_POLICIES[task]
+    return int(min(policy["max_tokens"], max(policy["min_tokens"], policy["output_ratio"] * input_tokens)))
+
+
+def _profile(model: str) -> dict:
+    # Pinned models without a profile are estimated like the strongest known model
+    return MODEL_PROFILES.get(model, MODEL_PROFILES[CASCADE[-1]])
+
+
+def predict_latency(model: str, output_tokens: int) -> float:
+    profile = _profile(model)
+    return profile["overhead"] + output_tokens / profile["tokens_per_second"]
+
+
+def predict_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    profile = _profile(model)
+    return (input_tokens * profile["input_cost"] + output_tokens * profile["output_cost"]) / 1_000_000
+
+
+def choose_model(task: str, input_tokens: int) -> tuple[str, int]:
+    """
+    Returns the model and max_tokens of the first attempt of a call, see route().
+    """
+    max_tokens = output_budget(task, input_tokens)
+    for candidate in CASCADE:
+        latency_ok = _config["max_latency"] is None or predict_latency(candidate, max_tokens) <= _config["max_latency"]
+        cost_ok = _config["max_cost"] is None or predict_cost(candidate, input_tokens, max_tokens) <= _config["max_cost"]
+        if latency_ok and cost_ok:
+            return candidate, max_tokens
+    return CASCADE[0], max_tokens
+
+
+def route(task: str, input_tokens: int, model: str | None = None) -> list[tuple[str, int]]:
+    """
+    Returns the attempts of a call in the order they are tried.
+    The first attempt uses the cheapest model whose predicted latency and cost meet the targets (the cheapest
+    model if none does). With the cascade enabled, the stronger models follow with a larger output budget.
+    Args:
+        task (str): The task, a key of TASK_POLICIES.
+        input_tokens (int): The estimated number of input tokens.
+        model (str, optional): A model pinned by the caller; it is used without cascade.
+    Returns:
+        list[tuple[str, int]]: (model, max_tokens) per attempt.
+    """
+    if model is not None:
+        return [(model, output_budget(task, input_tokens))]
+    first_model, max_tokens = choose_model(task, input_tokens)
+    start = CASCADE.index(first_model)
+    attempts = [(first_model, max_tokens)]
+    if _config["cascade"]:
+        escalated_tokens = max(max_tokens, min(ESCALATION_MAX_TOKENS, max_tokens * ESCALATION_TOKEN_FACTOR))
+        attempts += [(candidate, escalated_tokens) for candidate in CASCADE[start + 1:]]
+    logger.info(
+        f"Routing {task} ({input_tokens} input tokens) to {attempts[0][0]} with max_tokens={max_tokens}, "
+        f"predicted {predict_latency(attempts[0][0], max_tokens):.1f}s / "
+        f"${predict_cost(attempts[0][0], input_tokens, max_tokens):.5f}"
+        + (f", escalation: {', '.join(candidate for candidate, _ in attempts[1:])}" if len(attempts) > 1 else "")
+    )
+    return attempts
+
+
+def route_label() -> str:
+    """
+    Returns a name of the routing policy, e.g. "gpt-4o-mini>gpt-4o".
+    Results are stored under this name, because the model of a single call depends on its input.
+    """
+    return ">".join(CASCADE) if _config["cascade"] else CASCADE[0]
+
+
+def record_call(task: str, model: str, input_tokens: int, output_tokens: int, latency: float, outcome: str = "ok") -> None:
+    """
+    Logs the outcome of a call and adds it to the statistics.
+    Args:
+        task (str): The task of the call.
+        model (str): The model that handled the call.
+        input_tokens (int): Input tokens of the call.
+        output_tokens (int): Output tokens of the call.
+        latency (float): Seconds the call took.
+        outcome (str): "ok", or the reason of an escalation ("error", "length"). Defaults to "ok".
+    """
+    cost = predict_cost(model, input_tokens, output_tokens)
+    logger.info(f"{task} on {model}: {outcome}, {input_tokens}+{output_tokens} tokens, {latency:.1f}s, ${cost:.5f}")
+    with _stats_lock:
+        entry = _stats.setdefault(
+            (task, model), {"calls": 0, "escalations": 0, "input_tokens": 0, "output_tokens": 0, "latency": 0.0, "cost": 0.0}
+        )
+        entry["calls"] += 1
+        entry["escalations"] += outcome != "ok"
+        entry["input_tokens"] += input_tokens
+        entry["output_tokens"] += output_tokens
+        entry["latency"] += latency
+        entry["cost"] += cost
+
+
+def routing_stats() -> dict[str, dict]:
+    """
+    Returns:
+        dict: Per "<task>:<model>" the number of calls and escalations, the token sums, the mean latency
+            in seconds and the summed cost in USD.
+    """
+    with _stats_lock:
+        return {
+            f"{task}:{model}": {**entry, "latency": entry["latency"] / entry["calls"]}
+            for (task, model), entry in _stats.items()
+        }
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
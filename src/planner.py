@@ -0,0 +1,262 @@
+"""
+This module chooses how a video is processed, based on the predicted cost and latency of each pipeline shape.
+The planner looks at the transcript tokens, the number of chapters and their size distribution and builds the
+requests every strategy would send, so the predictions use the same prompts, routing and output budgets as the run.
+Strategies:
+    single: One request for the entire video (the combined request for chapters, the whole transcript for the video summary).
+    chapters: One request per chapter, sent in parallel.
+    merged: Adjacent small chapters are packed into one request each.
+    map_reduce: The chapters are summarized first (per chapter or merged) and the video summary is built from them.
+The combined request and packed chapters are opt-in (ts.COMBINED_ENABLED, ts.PACK_SMALL_SECTIONS), the strategies
+that use them are only planned when they are enabled.
+Functions:
+    video_stats: Returns the token and chapter statistics the planner decides on.
+    candidate_plans: Returns the predicted calls, tokens, latency and cost of every enabled strategy.
+    plan_video: Chooses the cheapest feasible strategy that meets the latency target.
+    run_plan: Runs a plan.
+    summarize_planned: Returns a cached or stored result, or plans and runs the summary.
+    format_plan: Describes a plan in one line.
+"""
+# Native Libraries
+import math
+import statistics
+from typing import Callable
+# User-defined Libraries
+try:
+    import src.gpt_functions as gpt
+    import src.model_router as model_router
+    import src.preprocessing as preprocessing
+    import src.transcribe_summarize as ts
+    from src.deadline import Deadline
+    from src.summary_store import SummaryStore
+    from src.youtube_video import YouTubeVideo
+    from src.logger import Logger
+except ImportError:
+    import gpt_functions as gpt
+    import model_router
+    import preprocessing
+    import transcribe_summarize as ts
+    from deadline import Deadline
+    from summary_store import SummaryStore
+    from youtube_video import YouTubeVideo
+    from logger import Logger
+
+
+PLAN_MODES = ("chapters", "video")
+# Transcript tokens up to which a whole-video summary from one request keeps the details of every part
+SINGLE_MAX_TOKENS = 12_000
+# Share of the output budget a summary actually uses on average, for the input of the reduce step
+EXPECTED_OUTPUT_SHARE = 0.5
+
+logger = Logger.create_logger(name="Planner")
+
+
+def _request_tokens(request: dict) -> int:
+    return preprocessing.estimate_tokens("".join(message["content"] for message in request["messages"]))
+
+
+def video_stats(sections: list[dict]) -> dict:
+    """
+    Args:
+        sections (list[dict]): The linked sections of the video.
+    Returns:
+        dict: keys 'transcript_tokens', 'chapters', 'min_chapter_tokens', 'median_chapter_tokens',
+            'max_chapter_tokens' and 'small_chapters' (chapters up to ts.PACK_SECTION_MAX_TOKENS).
+    """
+    tokens = [preprocessing.estimate_tokens(section["content"]) for section in sections] or [0]
+    return {
+        "transcript_tokens": sum(tokens),
+        "chapters": len(sections),
+        "min_chapter_tokens": min(tokens),
+        "median_chapter_tokens": int(statistics.median(tokens)),
+        "max_chapter_tokens": max(tokens),
+        "small_chapters": sum(token <= ts.PACK_SECTION_MAX_TOKENS for token in tokens),
+    }
+
+
+def _call(task: str, request: dict) -> dict:
+    input_tokens = _request_tokens(request)
+    model, output_tokens = model_router.choose_model(task, input_tokens)
+    return {
+        "task": task,
+        "model": model,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "latency": model_router.predict_latency(model, output_tokens),
+        "cost": model_router.predict_cost(model, input_tokens, output_tokens),
+        "fits_context": input_tokens + output_tokens <= model_router.MODEL_PROFILES.get(
+            model, model_router.MODEL_PROFILES[model_router.CASCADE[-1]]
+        )["context_window"],
+    }
+
+
+def _stage_latency(calls: list[dict], workers: int) -> float:
+    # Parallel calls run in waves of `workers`, every wave takes as long as its slowest call
+    latencies = sorted((call["latency"] for call in calls), reverse=True)
+    return sum(latencies[start] for start in range(0, len(latencies), workers))
+
+
+def _plan(strategy: str, mode: str, stages: list[list[dict]], workers: int, **details) -> dict:
+    calls = [call for stage in stages for call in stage]
+    return {
+        "strategy": strategy,
+        "mode": mode,
+        "calls": len(calls),
+        "input_tokens": sum(call["input_tokens"] for call in calls),
+        "output_tokens": sum(call["output_tokens"] for call in calls),
+        "latency": sum(_stage_latency(stage, workers) for stage in stages),
+        "cost": sum(call["cost"] for call in calls),
+        "feasible": all(call["fits_context"] for call in calls),
+        **details,
+    }
+
+
+def _reduce_call(map_calls: list[dict]) -> dict:
+    # The reduce step reads the chapter summaries, estimated from the output budgets of the map step
+    expected = sum(call["output_tokens"] for call in map_calls) * EXPECTED_OUTPUT_SHARE
+    placeholder = "x" * int(expected * preprocessing.CHARS_PER_TOKEN)
+    return _call("unified", gpt.unified_summary_request(placeholder))
+
+
+def candidate_plans(
+    video: YouTubeVideo, mode: str = "chapters", sections: list[dict] | None = None, workers: int = ts.MAX_PARALLEL_REQUESTS,
+    combined: bool = ts.COMBINED_ENABLED, pack: bool = ts.PACK_SMALL_SECTIONS,
+) -> list[dict]:
+    """
+    Predicts every enabled strategy for a summary mode.
+    Args:
+        video (YouTubeVideo): The loaded video.
+        mode (str): "chapters" or "video". Defaults to "chapters".
+        sections (list[dict], optional): The linked sections. Defaults to ts.build_sections(video).
+        workers (int): Requests sent at the same time. Defaults to ts.MAX_PARALLEL_REQUESTS.
+        combined (bool): Plan the combined request for chapters. Defaults to ts.COMBINED_ENABLED.
+        pack (bool): Plan merged chapters. Defaults to ts.PACK_SMALL_SECTIONS.
+    Returns:
+        list[dict]: One plan per strategy with the keys 'strategy', 'mode', 'calls', 'input_tokens',
+            'output_tokens' (at most), 'latency' (seconds), 'cost' (USD), 'feasible' and 'pack'.
+    Raises:
+        ValueError: If the mode cannot be planned.
+    """
+    if mode not in PLAN_MODES:
+        raise ValueError(f"Cannot plan summary mode: {mode}")
+    sections = sections if sections is not None else ts.build_sections(video)
+    stats = video_stats(sections)
+    per_chapter = [_call("chapter", gpt.chapter_summary_request(section)) for section in sections]
+    groups = ts.pack_sections(sections) if pack else []
+    merged = [
+        _call("chapter", gpt.chapter_summary_request(sections[group[0]])) if len(group) == 1
+        else _call("packed_chapters", gpt.packed_request(gpt.CHAPTER_SUMMARY_PROMPT, [preprocessing.compact_section(sections[index]) for index in group]))
+        for group in groups
+    ]
+
+    plans = []
+    if mode == "chapters":
+        if combined:
+            single = _plan("single", mode, [[_call("combined", gpt.combined_summary_request(sections, video.title or ""))]], workers, pack=False)
+            single["feasible"] = single["feasible"] and stats["transcript_tokens"] <= ts.COMBINED_MAX_TOKENS
+            plans.append(single)
+        plans.append(_plan("chapters", mode, [per_chapter], workers, pack=False))
+        if pack and len(groups) < len(sections):
+            plans.append(_plan("merged", mode, [merged], workers, pack=True))
+    else:
+        transcript = preprocessing.compact_transcript(video.transcript)
+        single = _plan("single", mode, [[_call("video", gpt.whole_transcript_summary_request(transcript))]], workers, pack=False)
+        single["feasible"] = single["feasible"] and stats["transcript_tokens"] <= SINGLE_MAX_TOKENS
+        plans.append(single)
+        plans.append(_plan("map_reduce", mode, [per_chapter, [_reduce_call(per_chapter)]], workers, pack=False))
+        if pack and len(groups) < len(sections):
+            plans.append(_plan("map_reduce", mode, [merged, [_reduce_call(merged)]], workers, pack=True))
+    for plan in plans:
+        plan["stats"] = stats
+    return plans
+
+
+def plan_video(
+    video: YouTubeVideo, mode: str = "chapters", max_latency: float | None = None, sections: list[dict] | None = None,
+    combined: bool = ts.COMBINED_ENABLED, pack: bool = ts.PACK_SMALL_SECTIONS,
+) -> dict:
+    """
+    Chooses the cheapest feasible strategy whose predicted latency meets the target.
+    If no strategy meets the target, the fastest feasible one is chosen.
+    Args:
+        video (YouTubeVideo): The loaded video.
+        mode (str): "chapters" or "video". Defaults to "chapters".
+        max_latency (float, optional): Target in seconds for the predicted latency.
+        sections (list[dict], optional): The linked sections. Defaults to ts.build_sections(video).
+        combined (bool): Consider the combined request for chapters. Defaults to ts.COMBINED_ENABLED.
+        pack (bool): Consider merged chapters. Defaults to ts.PACK_SMALL_SECTIONS.
+    Returns:
+        dict: The chosen plan (see candidate_plans()) with the other plans under 'alternatives'.
+    """
+    plans = candidate_plans(video, mode, sections, combined=combined, pack=pack)
+    feasible = [plan for plan in plans if plan["feasible"]] or plans
+    in_time = [plan for plan in feasible if max_latency is None or plan["latency"] <= max_latency]
+    chosen = min(in_time, key=lambda plan: plan["cost"]) if in_time else min(feasible, key=lambda plan: plan["latency"])
+    chosen = {**chosen, "alternatives": [plan for plan in plans if plan is not chosen]}
+    logger.info(f"Plan for {video.video_id}: {format_plan(chosen)}")
+    for plan in chosen["alternatives"]:
+        logger.info(f"    Alternative: {format_plan(plan)}")
+    return chosen
+
+
+def format_plan(plan: dict) -> str:
+    """
+    Returns e.g. "chapters/merged: 4 calls, 5200 input + 4096 output tokens, ~14.3s, ~$0.00324".
+    """
+    strategy = plan["strategy"] + (" (merged)" if plan["strategy"] == "map_reduce" and plan["pack"] else "")
+    return (
+        f"{plan['mode']}/{strategy}: {plan['calls']} call{'s' if plan['calls'] != 1 else ''}, "
+        f"{plan['input_tokens']} input + {plan['output_tokens']} output tokens, "
+        f"~{plan['latency']:.1f}s, ~${plan['cost']:.5f}" + ("" if plan["feasible"] else " (not feasible)")
+    )
+
+
+def run_plan(
+    video: YouTubeVideo, plan: dict, api_key: str, store: SummaryStore | None = None, deadline: Deadline | None = None
+):
+    """
+    Runs a plan of plan_video().
+    Returns:
+        The result of the planned mode, see ts.summary_by_chapters() and ts.summary_entire_video().
+    """
+    if plan["mode"] == "chapters":
+        if plan["strategy"] == "single":
+            results = ts.summary_combined(video, api_key, store=store, deadline=deadline, max_tokens=math.inf)
+            if results is not None:
+                return results["chapters"]
+        return ts.summary_by_chapters(video, api_key, store=store, deadline=deadline, pack=plan["pack"])
+    if plan["strategy"] == "single":
+        # Chapter summaries that exist already are still used, they are a shorter input than the transcript
+        return ts.summary_entire_video(video, api_key, store=store, deadline=deadline)
+    ts.summary_by_chapters(video, api_key, store=store, deadline=deadline, pack=plan["pack"])
+    return ts.summary_entire_video(video, api_key, store=store, deadline=deadline)
+
+
+def summarize_planned(
+    video: YouTubeVideo, mode: str, api_key: str, store: SummaryStore | None = None, deadline: Deadline | None = None,
+    combined: bool = ts.COMBINED_ENABLED, pack: bool = ts.PACK_SMALL_SECTIONS, on_plan: Callable[[dict], None] | None = None,
+):
+    """
+    Returns the result of a summary mode, planning and running it only if it is neither cached nor stored.
+    Planning builds the sections and every request of the video, which a cached result does not need.
+    Args:
+        video (YouTubeVideo): The loaded video.
+        mode (str): "chapters" or "video".
+        api_key (str): The OpenAI API key.
+        store (SummaryStore, optional): Persistent store to look up and save the result.
+        deadline (Deadline, optional): The deadline of the job.
+        combined (bool): Consider the combined request for chapters. Defaults to ts.COMBINED_ENABLED.
+        pack (bool): Consider merged chapters. Defaults to ts.PACK_SMALL_SECTIONS.
+        on_plan (Callable[[dict], None], optional): Called with the chosen plan before it runs.
+    Returns:
+        The result of the mode, see run_plan().
+    """
+    if ts.cached_summary(video, mode, store):
+        # Partial chapter results are completed without planning again
+        if mode == "chapters":
+            return ts.summary_by_chapters(video, api_key, store=store, deadline=deadline, pack=pack)
+        return ts.summary_entire_video(video, api_key, store=store, deadline=deadline)
+    plan = plan_video(video, mode, combined=combined, pack=pack)
+    if on_plan is not None:
+        on_plan(plan)
+    return run_plan(video, plan, api_key, store=store, deadline=deadline)
@@ -0,0 +1,118 @@
+"""
+This module precomputes the most likely summaries of a video in the background while the user is still reading.
+The summary functions fill the video's cache and the summary store as usual, so the first click on a summary
+button only has to pick up the result (or wait for the part that is still running).
+Classes:
+    Prefetcher: Runs the prefetch jobs of one session on a single low-priority worker.
+"""
+# Native Libraries
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+# User-defined Libraries
+try:
+    import src.transcribe_summarize as ts
+    from src.deadline import Deadline
+    from src.summary_store import SummaryStore
+    from src.youtube_video import YouTubeVideo
+    from src.logger import Logger
+except ImportError:
+    import transcribe_summarize as ts
+    from deadline import Deadline
+    from summary_store import SummaryStore
+    from youtube_video import YouTubeVideo
+    from logger import Logger
+
+
+# Prefetching costs API calls, so it is off unless enabled
+PREFETCH_ENABLED = os.getenv("TUBE_TLDR_PREFETCH", "0") == "1"
+# Modes in the order users usually click them; the video summary is cheap once the chapters exist
+PREFETCH_MODES = ("chapters", "video")
+# Seconds a prefetch job may run before it gives up
+PREFETCH_TIMEOUT = 180
+# Parallel chapter requests of a prefetch job, lower than for a click to leave room for foreground jobs
+PREFETCH_PARALLEL_REQUESTS = 2
+
+SUMMARY_FUNCTIONS = {
+    "chapters": lambda video, api_key, store, deadline: ts.summary_by_chapters(
+        video, api_key, store=store, deadline=deadline, max_workers=PREFETCH_PARALLEL_REQUESTS
+    ),
+    "video": lambda video, api_key, store, deadline: ts.summary_entire_video(video, api_key, store=store, deadline=deadline),
+    "sentence": lambda video, api_key, store, deadline: ts.summary_in_one_sentence(video, api_key, store=store, deadline=deadline),
+    "shorts": lambda video, api_key, store, deadline: ts.create_shorts_by_chapters(video, api_key, store=store, deadline=deadline),
+}
+
+
+class Prefetcher:
+    """
+    Runs prefetch jobs for the current video of a session, one mode after the other.
+    Starting a job for another video or calling cancel() stops the running job at its next request.
+    """
+    def __init__(self):
+        self.logger = Logger.create_logger(name=self.__class__.__name__)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._deadline: Deadline | None = None
+        self._video: YouTubeVideo | None = None
+        self._futures: dict[str, Future] = {}
+
+    def start(
+        self,
+        video: YouTubeVideo,
+        api_key: str,
+        store: SummaryStore | None = None,
+        modes: tuple = PREFETCH_MODES,
+        timeout: float = PREFETCH_TIMEOUT,
+    ) -> None:
+        """
+        Cancels the previous job and queues the summaries of the given video.
+        Args:
+            video (YouTubeVideo): The loaded video.
+            api_key (str): The OpenAI API key.
+            store (SummaryStore, optional): Persistent store the results are saved to.
+            modes (tuple): The summary modes to precompute, in order. Defaults to PREFETCH_MODES.
+            timeout (float): Seconds the job may run. Defaults to PREFETCH_TIMEOUT.
+        """
+        self.cancel()
+        if not video.transcript:
+            return
+        deadline = Deadline(timeout)
+        self._deadline, self._video = deadline, video
+        self._futures = {
+            mode: self._executor.submit(self._run, mode, video, api_key, store, deadline) for mode in modes
+        }
+        self.logger.info(f"Prefetching {', '.join(modes)} for {video.video_id}")
+
+    def _run(self, mode: str, video: YouTubeVideo, api_key: str, store: SummaryStore | None, deadline: Deadline) -> None:
+        if deadline.expired:
+            return
+        try:
+            SUMMARY_FUNCTIONS[mode](video, api_key, store, deadline)
+            self.logger.info(f"Prefetched {mode} for {video.video_id}")
+        except Exception as e:
+            # A failed prefetch is not an error for the user, the click runs the job again
+            self.logger.info(f"Prefetch of {mode} for {video.video_id} stopped: {e}")
+
+    def wait(self, video: YouTubeVideo, mode: str, timeout: float | None = None) -> bool:
+        """
+        Waits for a running prefetch of the mode, so a click does not send the same requests again.
+        Args:
+            video (YouTubeVideo): The video the click is for.
+            mode (str): The summary mode of the click.
+            timeout (float, optional): Maximum seconds to wait.
+        Returns:
+            bool: True if a prefetch of the mode has finished, False if there was none or it is still running.
+        """
+        future = self._futures.get(mode) if video is self._video else None
+        if future is None or future.cancelled():
+            return False
+        wait([future], timeout=timeout)
+        return future.done()
+
+    def cancel(self) -> None:
+        """
+        Stops the current job: queued modes are dropped and running requests end at their next deadline check.
+        """
+        if self._deadline is not None:
+            self._deadline.cancel()
+        for future in self._futures.values():
+            future.cancel()
+        self._futures, self._video, self._deadline = {}, None, None
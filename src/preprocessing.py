@@ -0,0 +1,218 @@
+"""
+This module turns transcripts and linked sections into a compact, deterministic text format before they are sent to the model.
+Auto-generated captions contain rolling duplicates, sound markers and filler words, and the Python repr of a section adds
+timedelta reprs, duplicate fields and quotes. All of that costs prompt tokens without adding information.
+Functions:
+    estimate_tokens: Estimates the number of tokens of a text.
+    format_timestamp: Formats seconds or a timedelta as "m:ss" or "h:mm:ss".
+    chapter_starts: Converts chapters to sorted (seconds, heading) pairs.
+    heading_at: Returns the heading of the chapter a point in time falls into.
+    clean_caption_text: Removes sound markers, filler words and surplus whitespace from a caption line.
+    clean_transcript: Cleans transcript entries and removes the overlap between consecutive captions.
+    iter_clean_transcript: Generator version of clean_transcript for streamed transcripts.
+    compact_transcript: Joins a cleaned transcript into a single string.
+    compact_section: Serializes a linked section into a minimal text block.
+"""
+# Native Libraries
+import re
+from datetime import timedelta
+from typing import Iterable, Iterator
+# User-defined Libraries
+try:
+    from src.logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+CHARS_PER_TOKEN = 4
+MAX_OVERLAP_WORDS = 20
+
+SOUND_MARKER_REGEX = re.compile(r"\[[^\]]{0,40}\]|\([A-Za-zÄÖÜäöü ]{0,20}(?:music|musik|applause|applaus|laughter|lachen)\)|♪+|>>", re.IGNORECASE)
+# "um" is left out on purpose, it is a regular word in German
+FILLER_REGEX = re.compile(r"\b(?:uh|uhm|umm|erm|hmm+|äh|ähm|öhm)\b[,.]?", re.IGNORECASE)
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+logger = Logger.create_logger(name="Preprocessing")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text (about four characters per token for English and German).
+    Args:
+        text (str): The text to measure.
+    Returns:
+        int: The estimated number of tokens.
+    """
+    if not text:
+        return 0
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+
+def format_timestamp(value: timedelta | float | int) -> str:
+    """
+    Formats a point in time as "m:ss" or "h:mm:ss".
+    Args:
+        value (timedelta | float | int): The point in time as timedelta or in seconds.
+    Returns:
+        str: The formatted timestamp.
+    """
+    seconds = int(value.total_seconds() if isinstance(value, timedelta) else value)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def chapter_starts(chapters: list[dict] | None) -> list[tuple[float, str]]:
+    """
+    Converts chapters to (seconds, heading) pairs, sorted by their start.
+    Args:
+        chapters (list[dict], optional): Chapters with 'timestamp' ("m:ss", "h:mm:ss" or timedelta) and 'content' or 'heading' keys.
+    Returns:
+        list[tuple[float, str]]: The start in seconds and the heading of every chapter.
+    """
+    starts = []
+    for chapter in chapters or []:
+        timestamp = chapter["timestamp"]
+        if hasattr(timestamp, "total_seconds"):
+            seconds = timestamp.total_seconds()
+        else:
+            seconds = 0
+            for part in str(timestamp).split(":"):
+                seconds = seconds * 60 + int(part)
+        starts.append((float(seconds), chapter.get("heading") or chapter.get("content")))
+    return sorted(starts)
+
+
+def heading_at(starts: list[tuple[float, str]], seconds: float) -> str | None:
+    """
+    Args:
+        starts (list[tuple[float, str]]): The chapter starts of chapter_starts().
+        seconds (float): The point in time.
+    Returns:
+        str: The heading of the chapter the point in time falls into, or None if it lies before the first chapter.
+    """
+    heading = None
+    for start, title in starts:
+        if start > seconds:
+            break
+        heading = title
+    return heading
+
+
+def clean_caption_text(text: str) -> str:
+    """
+    Removes sound markers like [Music], filler words and surplus whitespace from a caption line.
+    Args:
+        text (str): The caption text.
+    Returns:
+        str: The cleaned caption text (may be empty).
+    """
+    text = SOUND_MARKER_REGEX.sub(" ", text)
+    text = FILLER_REGEX.sub(" ", text)
+    return WHITESPACE_REGEX.sub(" ", text).strip()
+
+
+def _remove_overlap(previous_words: list[str], words: list[str]) -> list[str]:
+    """
+    Drops the beginning of a caption if it repeats the end of the previous one (rolling auto-captions).
+    """
+    max_overlap = min(len(previous_words), len(words), MAX_OVERLAP_WORDS)
+    lowered_previous = [word.lower() for word in previous_words[-max_overlap:]]
+    lowered = [word.lower() for word in words[:max_overlap]]
+    for size in range(max_overlap, 0, -1):
+        if lowered_previous[-size:] == lowered[:size]:
+            # Single repeated words are often intended ("very very"), unless the whole caption is repeated
+            if size >= 2 or size == len(words):
+                return words[size:]
+            break
+    return words
+
+
+def clean_transcript(transcript: list[dict]) -> list[dict]:
+    """
+    Cleans every transcript entry and removes the overlap between consecutive captions.
+    The original entries are not modified. Entries that are empty after cleaning are dropped.
+    Args:
+        transcript (list[dict]): The transcript entries with at least a 'text' key.
+    Returns:
+        list[dict]: Copies of the remaining entries with cleaned 'text'.
+    """
+    return list(iter_clean_transcript(transcript))
+
+
+def iter_clean_transcript(transcript: Iterable[dict]) -> Iterator[dict]:
+    """
+    Cleans transcript entries one by one, see clean_transcript(). Only the last MAX_OVERLAP_WORDS words are kept
+    between entries, so a streamed transcript is never held in memory as a whole.
+    Args:
+        transcript (Iterable[dict]): The transcript entries with at least a 'text' key.
+    Yields:
+        dict: Copies of the remaining entries with cleaned 'text'.
+    """
+    previous_words: list[str] = []
+    for entry in transcript:
+        words = clean_caption_text(entry["text"]).split(" ")
+        words = [word for word in words if word]
+        words = _remove_overlap(previous_words, words)
+        if not words:
+            continue
+        yield {**entry, "text": " ".join(words)}
+        previous_words = (previous_words + words)[-MAX_OVERLAP_WORDS:]
+
+
+def log_token_savings(label: str, original: str, compact: str) -> int:
+    """
+    Logs how many prompt tokens the compact format saves compared to the original input.
+    Args:
+        label (str): A short description of the request.
+        original (str): The input as it would have been sent before.
+        compact (str): The input that is actually sent.
+    Returns:
+        int: The estimated number of saved tokens.
+    """
+    before, after = estimate_tokens(original), estimate_tokens(compact)
+    saved = before - after
+    share = saved / before * 100 if before else 0
+    logger.info(f"{label}: {before} -> {after} tokens (saved {saved}, {share:.0f}%)")
+    return saved
+
+
+def compact_transcript(transcript: list[dict]) -> str:
+    """
+    Joins the cleaned transcript into a single string.
+    Args:
+        transcript (list[dict]): The transcript entries with a 'text' key.
+    Returns:
+        str: The cleaned transcript text.
+    """
+    compact = " ".join(entry["text"] for entry in clean_transcript(transcript))
+    log_token_savings("Transcript", " ".join(entry["text"] for entry in transcript), compact)
+    return compact
+
+
+def compact_section(section: dict) -> str:
+    """
+    Serializes a linked section into a minimal text block:
+        ## Heading (mm:ss)
+        content
+    Sections created for short form content additionally list their timestamped transcript lines as "[m:ss] text".
+    Args:
+        section (dict): The section with keys 'heading', 'content' and optionally 'timestr', 'timestamp' and 'transcript'.
+    Returns:
+        str: The compact text representation of the section.
+    """
+    heading = section.get("heading") or section.get("topic") or ""
+    timestr = section.get("timestr")
+    if not timestr and isinstance(section.get("timestamp"), timedelta):
+        timestr = format_timestamp(section["timestamp"])
+    lines = [f"## {heading} ({timestr})" if timestr else f"## {heading}"]
+    content = section.get("content")
+    if content:
+        lines.append(WHITESPACE_REGEX.sub(" ", content).strip())
+    for entry in section.get("transcript", []):
+        lines.append(f"[{format_timestamp(float(entry['timestr']))}] {entry['text']}")
+    compact = "\n".join(lines)
+    log_token_savings(f"Section '{heading}'", str(section), compact)
+    return compact
@@ -0,0 +1,164 @@
+"""
+This module provides opt-in profiling of the CPU time spent in our own code.
+A run (a headless call, a batch or a UI job) is profiled if profiling is enabled and the run is sampled. While a run
+is profiled, every function marked with @profiled is measured with cProfile, in whichever thread it runs, and the
+measurements are merged into one profile that is written when the run ends:
+    <output_dir>/<name>-<timestamp>-<pid>.prof   pstats dump, for snakeviz, flameprof, gprof2dot or pstats
+    <output_dir>/<name>-<timestamp>-<pid>.txt    the top functions by cumulative time
+Outside of profiled runs a marked function costs one attribute lookup, so sampled profiling can stay on in production.
+Environment:
+    TUBE_TLDR_PROFILE: "1" to enable profiling.
+    TUBE_TLDR_PROFILE_RATE: Share of runs that are profiled, e.g. "0.01". Defaults to 1.
+    TUBE_TLDR_PROFILE_DIR: Directory of the profile dumps. Defaults to "profiles".
+Functions:
+    configure_profiling: Enables or disables profiling at runtime.
+    profile_run: Context manager that profiles one run if it is sampled.
+    profiled: Decorator that marks a function to be measured in profiled runs.
+"""
+# Native Libraries
+import functools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, TypeVar
+# User-defined Libraries
+try:
+    from src.logger import Logger
+except ImportError:
+    from logger import Logger
+
+
+# Number of functions listed in the text summary of a run
+SUMMARY_LINES = 40
+
+F = TypeVar("F", bound=Callable)
+logger = Logger.create_logger(name="Profiling")
+_config = {
+    "enabled": os.getenv("TUBE_TLDR_PROFILE", "0") == "1",
+    "sample_rate": float(os.getenv("TUBE_TLDR_PROFILE_RATE", "1")),
+    "output_dir": os.getenv("TUBE_TLDR_PROFILE_DIR", "profiles"),
+}
+# Runs that are currently profiled; marked functions report to the most recent one
+_active_runs: list["ProfileRun"] = []
+_active_lock = threading.Lock()
+# Marks threads that already run under a profiler, cProfile cannot be nested in one thread
+_thread_state = threading.local()
+
+
+def configure_profiling(enabled: bool = True, sample_rate: float = 1.0, output_dir: str | None = None) -> None:
+    """
+    Sets the profiling options, overriding the environment.
+    Args:
+        enabled (bool): Whether runs are profiled. Defaults to True.
+        sample_rate (float): Share of runs that are profiled. Defaults to 1.0.
+        output_dir (str, optional): Directory of the profile dumps. Defaults to the current one.
+    """
+    _config.update(enabled=enabled, sample_rate=sample_rate)
+    if output_dir is not None:
+        _config["output_dir"] = output_dir
+
+
+class ProfileRun:
+    """
+    Collects the measurements of one profiled run.
+    Attributes:
+        name (str): The name of the run, used in the file names.
+        path (str | None): The path of the .prof dump once the run has been saved.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.path: str | None = None
+        self._stats = None
+        self._lock = threading.Lock()
+
+    def add(self, profile) -> None:
+        import pstats
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def save(self, output_dir: str) -> str | None:
+        """
+        Writes the merged profile and its text summary.
+        Returns:
+            str: The path of the .prof dump.
+            None: If no marked function ran during the run.
+        """
+        import io
+        import pstats
+        with self._lock:
+            if self._stats is None:
+                return None
+            os.makedirs(output_dir, exist_ok=True)
+            base = os.path.join(output_dir, f"{self.name}-{time.strftime('%Y%m%d_%H%M%S')}-{os.getpid()}")
+            self._stats.dump_stats(f"{base}.prof")
+            summary = io.StringIO()
+            pstats.Stats(f"{base}.prof", stream=summary).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+        with open(f"{base}.txt", "w", encoding="utf-8") as file:
+            file.write(summary.getvalue())
+        self.path = f"{base}.prof"
+        return self.path
+
+
+@contextmanager
+def profile_run(name: str, enabled: bool | None = None):
+    """
+    Profiles the marked functions that run until the block ends, if the run is sampled.
+    Args:
+        name (str): The name of the run, e.g. "headless" or "ui-chapters".
+        enabled (bool, optional): Profile this run regardless of the configuration (True) or not at all (False).
+            Defaults to None (the configuration and sample rate decide).
+    Yields:
+        ProfileRun | None: The profiled run, or None if the run is not profiled.
+    """
+    if enabled is None:
+        enabled = _config["enabled"] and random.random() < _config["sample_rate"]
+    if not enabled:
+        yield None
+        return
+    run = ProfileRun(name)
+    with _active_lock:
+        _active_runs.append(run)
+    try:
+        yield run
+    finally:
+        with _active_lock:
+            _active_runs.remove(run)
+        path = run.save(_config["output_dir"])
+        if path:
+            logger.info(f"Profile of {name} written to {path}")
+
+
+def profiled(function: F) -> F:
+    """
+    Marks a function to be measured with cProfile while a run is profiled.
+    Calls inside an already measured call of the same thread are part of that measurement.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _active_runs or getattr(_thread_state, "profiling", False):
+            return function(*args, **kwargs)
+        with _active_lock:
+            run = _active_runs[-1] if _active_runs else None
+        if run is None:
+            return function(*args, **kwargs)
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) owns this thread
+            return function(*args, **kwargs)
+        _thread_state.profiling = True
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            _thread_state.profiling = False
+            run.add(profile)
+
+    return wrapper
@@ -0,0 +1,224 @@
+"""
+This module summarizes very long videos (e.g. 8-12 hour livestreams) with a bounded-memory generator pipeline.
+The regular path keeps the whole transcript, its cleaned copy and every joined section in memory at once. Here the
+transcript entries flow one by one through timestamp conversion, cleaning and section assembly, and each finished
+section is summarized while the following ones are still being assembled:
+    video.iter_transcript() -> preprocessing.iter_clean_transcript() -> iter_sections() -> iter_chapter_summaries()
+At most max_in_flight sections are held by pending requests and one section is being assembled, so peak memory
+does not grow with the length of the video. Videos without chapters are split by tokens, since topic segmentation
+needs the whole transcript.
+Functions:
+    iter_sections: Assembles streamed transcript entries into sections, yielding each as soon as it is complete.
+    iter_chapter_summaries: Summarizes streamed sections with a bounded number of requests in flight.
+    stream_chapter_summaries: Runs the whole pipeline for a video.
+    stream_video_summary: Builds the whole-video summary from the streamed chapter summaries.
+"""
+# Native Libraries
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator
+# User-defined Libraries
+try:
+    import src.gpt_functions as gpt
+    import src.preprocessing as preprocessing
+    import src.transcribe_summarize as ts
+    from src.deadline import Deadline, DeadlineExceeded
+    from src.youtube_video import YouTubeVideo
+    from src.logger import Logger
+except ImportError:
+    import gpt_functions as gpt
+    import preprocessing
+    import transcribe_summarize as ts
+    from deadline import Deadline, DeadlineExceeded
+    from youtube_video import YouTubeVideo
+    from logger import Logger
+
+
+# Sections summarized at the same time, which is also the number of assembled sections held in memory
+MAX_IN_FLIGHT = ts.MAX_PARALLEL_REQUESTS
+# Chapter summaries are folded into one partial summary once they exceed this many tokens
+REDUCE_TOKEN_BUDGET = 6000
+
+logger = Logger.create_logger(name="Streaming")
+
+
+def _section(start: float, heading: str, texts: list[str]) -> dict:
+    return {
+        "timestr": preprocessing.format_timestamp(start),
+        "timestamp": timedelta(seconds=start),
+        "heading": heading,
+        "content": " ".join(texts),
+    }
+
+
+def _iter_outline_sections(entries: Iterable[dict], chapters: list[dict]) -> Iterator[dict]:
+    # Same assignment as link_content_to_outline(): an entry belongs to the chapter its end timestamp falls into
+    starts = preprocessing.chapter_starts(chapters)
+    position, texts = -1, []
+    for entry in entries:
+        seconds = entry["timestamp"].total_seconds()
+        while position + 1 < len(starts) and seconds >= starts[position + 1][0]:
+            if position >= 0:
+                yield _section(*starts[position], texts)
+            position, texts = position + 1, []
+        if position >= 0:
+            texts.append(entry["text"])
+    for remaining in range(max(position, 0), len(starts)):
+        yield _section(*starts[remaining], texts if remaining == position else [])
+
+
+def _iter_token_sections(entries: Iterable[dict], target_tokens: int, min_tokens: int, max_tokens: int) -> Iterator[dict]:
+    # Same boundaries as link_transcript_without_outline(), decided one entry later since the next entry
+    # is only known once it arrives. The last closed section is held back until it is clear whether a
+    # too small last section has to be merged into it.
+    held, texts, tokens, start, previous, number = None, [], 0, None, None, 0
+    for entry in entries:
+        if previous is not None:
+            pause = entry["start"] - (previous["start"] + previous.get("duration", 0))
+            at_boundary = pause >= ts.SECTION_PAUSE_SECONDS or previous["text"].rstrip().endswith((".", "!", "?"))
+            if (tokens >= target_tokens and at_boundary) or tokens >= max_tokens:
+                if held is not None:
+                    number += 1
+                    yield _section(held[0], f"Chapter {number}", held[1])
+                held, texts, tokens, start = (start, texts, tokens), [], 0, entry["start"]
+        if start is None:
+            start = entry["start"]
+        texts.append(entry["text"])
+        tokens += preprocessing.estimate_tokens(entry["text"]) + 1
+        previous = entry
+    if held is not None and texts and tokens < min_tokens and held[2] + tokens <= max_tokens:
+        held, texts = (held[0], held[1] + texts, held[2] + tokens), []
+    for group_start, group_texts, _ in ([held] if held else []) + ([(start, texts, tokens)] if texts else []):
+        number += 1
+        yield _section(group_start, f"Chapter {number}", group_texts)
+
+
+def iter_sections(
+    entries: Iterable[dict],
+    chapters: list[dict] | None = None,
+    target_tokens: int = ts.SECTION_TARGET_TOKENS,
+    min_tokens: int = ts.SECTION_MIN_TOKENS,
+    max_tokens: int = ts.SECTION_MAX_TOKENS,
+) -> Iterator[dict]:
+    """
+    Assembles cleaned transcript entries into sections and yields every section as soon as it is complete.
+    Args:
+        entries (Iterable[dict]): Transcript entries in order, with 'text', 'start', 'duration' and 'timestamp' keys.
+        chapters (list[dict], optional): The chapters of the video. Without chapters the transcript is split by tokens.
+        target_tokens (int): Preferred number of tokens per synthetic section.
+        min_tokens (int): Minimum number of tokens of the last synthetic section before it is merged.
+        max_tokens (int): Maximum number of tokens per synthetic section.
+    Yields:
+        dict: Sections in the format of link_content_to_outline() with keys 'timestr', 'timestamp', 'heading' and 'content'.
+    """
+    if chapters:
+        yield from _iter_outline_sections(entries, chapters)
+    else:
+        yield from _iter_token_sections(entries, target_tokens, min_tokens, max_tokens)
+
+
+def _chapter_result(index: int, heading: str, timestr: str, future: Future, deadline: Deadline | None) -> dict:
+    summary, error = None, None
+    try:
+        summary = future.result(timeout=deadline.remaining() if deadline else None)
+    except (TimeoutError, DeadlineExceeded):
+        logger.warning(f"Summary of chapter {index} ({heading}) was not finished in time")
+    except Exception as e:
+        logger.error(f"Summary of chapter {index} ({heading}) failed: {e}")
+        error = str(e) or type(e).__name__
+    return {"index": index, "heading": heading, "timestr": timestr, "summary": summary, "error": error}
+
+
+def iter_chapter_summaries(
+    sections: Iterable[dict], api_key: str, deadline: Deadline | None = None, max_in_flight: int = MAX_IN_FLIGHT
+) -> Iterator[dict]:
+    """
+    Summarizes streamed sections and yields the summaries in order.
+    The next section is only taken from the stream while fewer than max_in_flight requests are pending,
+    so a slow model also slows down the assembly instead of piling up sections in memory.
+    Args:
+        sections (Iterable[dict]): The sections, e.g. from iter_sections().
+        api_key (str): The OpenAI API key.
+        deadline (Deadline, optional): The deadline of the job. No new sections are started once it has expired.
+        max_in_flight (int): Maximum number of pending requests. Defaults to MAX_IN_FLIGHT.
+    Yields:
+        dict: 'index', 'heading', 'timestr', 'summary' (None if the summary failed or was not finished in time)
+            and 'error' (the error message if the summary failed, else None).
+    """
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    in_flight: deque = deque()
+    try:
+        for index, section in enumerate(sections):
+            if deadline is not None and deadline.expired:
+                logger.warning(f"Deadline expired, no sections are summarized after chapter {index - 1}")
+                break
+            future = executor.submit(gpt.get_chapter_summary, section, api_key=api_key, deadline=deadline)
+            in_flight.append((index, section["heading"], section["timestr"], future))
+            while in_flight and (len(in_flight) >= max_in_flight or in_flight[0][-1].done()):
+                yield _chapter_result(*in_flight.popleft(), deadline)
+        while in_flight:
+            yield _chapter_result(*in_flight.popleft(), deadline)
+    finally:
+        # Do not wait for stuck calls, they end on their own once the request timeout has passed
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_chapter_summaries(
+    video: YouTubeVideo, api_key: str, deadline: Deadline | None = None, languages: tuple | None = None,
+    max_in_flight: int = MAX_IN_FLIGHT,
+) -> Iterator[dict]:
+    """
+    Summarizes a video by chapters with the streaming pipeline.
+    The transcript is streamed from the fetched track unless the video has loaded it already.
+    Args:
+        video (YouTubeVideo): The video, e.g. configured with get_data(lazy=True).
+        api_key (str): The OpenAI API key.
+        deadline (Deadline, optional): The deadline of the job.
+        languages (tuple[str], optional): Preferred transcript languages. Defaults to the languages of the video.
+        max_in_flight (int): Maximum number of pending requests. Defaults to MAX_IN_FLIGHT.
+    Yields:
+        dict: The chapter summaries, see iter_chapter_summaries().
+    """
+    entries = video.__dict__["transcript"] if "transcript" in video.__dict__ else video.iter_transcript(languages)
+    sections = iter_sections(preprocessing.iter_clean_transcript(entries), video.chapters)
+    yield from iter_chapter_summaries(sections, api_key, deadline=deadline, max_in_flight=max_in_flight)
+
+
+def stream_video_summary(
+    video: YouTubeVideo, api_key: str, deadline: Deadline | None = None, languages: tuple | None = None,
+    max_in_flight: int = MAX_IN_FLIGHT, on_chapter: Callable[[dict], None] | None = None,
+) -> str:
+    """
+    Builds the whole-video summary from the streamed chapter summaries.
+    Chapter summaries are folded into one partial summary whenever they exceed REDUCE_TOKEN_BUDGET tokens,
+    so neither memory nor the input of the final request grows with the length of the video.
+    Args:
+        video (YouTubeVideo): The video, e.g. configured with get_data(lazy=True).
+        api_key (str): The OpenAI API key.
+        deadline (Deadline, optional): The deadline of the job.
+        languages (tuple[str], optional): Preferred transcript languages. Defaults to the languages of the video.
+        max_in_flight (int): Maximum number of pending requests. Defaults to MAX_IN_FLIGHT.
+        on_chapter (Callable[[dict], None], optional): Called with every chapter summary as soon as it is done.
+    Returns:
+        str: The summary of the entire video.
+    Raises:
+        RuntimeError: If no chapter could be summarized.
+    """
+    partial, tokens = [], 0
+    for chapter in stream_chapter_summaries(video, api_key, deadline, languages, max_in_flight):
+        if on_chapter is not None:
+            on_chapter(chapter)
+        if chapter["summary"] is None:
+            continue
+        partial.append(chapter["summary"])
+        tokens += preprocessing.estimate_tokens(chapter["summary"])
+        if tokens >= REDUCE_TOKEN_BUDGET:
+            logger.info(f"Folding {len(partial)} chapter summaries ({tokens} tokens) into a partial summary")
+            partial = [gpt.get_unified_summary(api_key=api_key, sections="\n\n".join(partial), deadline=deadline)]
+            tokens = preprocessing.estimate_tokens(partial[0])
+    if not partial:
+        raise RuntimeError(f"No chapter of video {video.video_id} could be summarized")
+    summary = gpt.get_unified_summary(api_key=api_key, sections="\n\n".join(partial), deadline=deadline)
+    video.summaries["video"] = summary
+    return summary
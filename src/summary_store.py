@@ -0,0 +1,363 @@
+"""
+This module provides a persistent SQLite store for loaded videos, their sections and all generated summaries.
+Summaries are indexed by video ID, transcript language, mode and model, so a repeated request is a lookup instead of a generation.
+Transcripts and summaries are also indexed in an FTS5 full-text index to answer "which video talked about X" offline.
+Classes:
+    SummaryStore: Saves, retrieves and searches videos, sections, chapter summaries, whole-video summaries and Shorts scripts.
+"""
+# Native Libraries
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+# User-defined Libraries
+try:
+    from src.preprocessing import chapter_starts, heading_at
+    from src.logger import Logger
+except ImportError:
+    from preprocessing import chapter_starts, heading_at
+    from logger import Logger
+
+
+DEFAULT_DB_PATH = os.getenv("TUBE_TLDR_DB", "tube_tldr.db")
+# Length of the transcript passages that are indexed for full-text search
+SEARCH_CHUNK_SECONDS = 30
+SEARCH_TERM_REGEX = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    channel TEXT,
+    duration_seconds INTEGER,
+    description TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos (channel);
+
+CREATE TABLE IF NOT EXISTS sections (
+    video_id TEXT NOT NULL REFERENCES videos (video_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    heading TEXT,
+    start_seconds REAL,
+    content TEXT,
+    PRIMARY KEY (video_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL DEFAULT '',
+    mode TEXT NOT NULL,
+    model TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    heading TEXT,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (video_id, language, mode, model, position)
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_mode_model ON summaries (mode, model);
+
+-- Full-text search: documents live in a regular table, the FTS5 index mirrors them via triggers
+CREATE TABLE IF NOT EXISTS search_documents (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    heading TEXT,
+    start_seconds REAL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_documents_video_kind ON search_documents (video_id, kind);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5 (
+    heading, content,
+    content = 'search_documents', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS search_documents_insert AFTER INSERT ON search_documents BEGIN
+    INSERT INTO search_index (rowid, heading, content) VALUES (new.id, new.heading, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS search_documents_delete AFTER DELETE ON search_documents BEGIN
+    INSERT INTO search_index (search_index, rowid, heading, content) VALUES ('delete', old.id, old.heading, old.content);
+END;
+"""
+
+
+def _match_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches documents containing all terms (or their prefixes for the last term).
+    """
+    terms = SEARCH_TERM_REGEX.findall(query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class SummaryStore:
+    """
+    Persistent store for videos and generated summaries.
+    Modes used by transcribe_summarize: "chapters", "video", "sentence" and "shorts".
+    Multi-part results (chapters, shorts) are stored as one row per position.
+    """
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self.logger = Logger.create_logger(name=self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA foreign_keys=ON")
+            self._connection.executescript(SCHEMA)
+        self.logger.info(f"Opened summary store at {path}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def save_video(self, video) -> None:
+        """
+        Inserts or updates the metadata of a loaded video and adds its transcript to the full-text index.
+        Args:
+            video (YouTubeVideo): The video whose data has been loaded with get_data().
+        """
+        duration = getattr(video, "duration", None)
+        duration_seconds = int(duration.total_seconds()) if hasattr(duration, "total_seconds") else None
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                INSERT INTO videos (video_id, url, title, channel, duration_seconds, description, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (video_id) DO UPDATE SET
+                    url = excluded.url, title = excluded.title, channel = excluded.channel,
+                    duration_seconds = excluded.duration_seconds, description = excluded.description,
+                    updated_at = excluded.updated_at
+                """,
+                (video.video_id, video.url, getattr(video, "title", None), getattr(video, "channel", None),
+                 duration_seconds, getattr(video, "description", None), self._now()),
+            )
+        self.index_transcript(video.video_id, getattr(video, "transcript", None), getattr(video, "chapters", None))
+
+    def index_transcript(self, video_id: str, transcript: list[dict], chapters: list[dict] | None = None, replace: bool = False) -> int:
+        """
+        Adds the transcript of a video to the full-text index in passages of about SEARCH_CHUNK_SECONDS.
+        Indexing is incremental: a video whose transcript is already indexed is skipped unless replace is set.
+        Args:
+            video_id (str): The YouTube video ID.
+            transcript (list[dict]): Transcript entries with 'text' and 'start' keys.
+            chapters (list[dict], optional): Chapters used to attach a heading to every passage.
+            replace (bool): Re-index an already indexed transcript. Defaults to False.
+        Returns:
+            int: The number of indexed passages.
+        """
+        if not transcript:
+            return 0
+        if not replace:
+            with self._lock:
+                indexed = self._connection.execute(
+                    "SELECT 1 FROM search_documents WHERE video_id = ? AND kind = 'transcript' LIMIT 1", (video_id,)
+                ).fetchone()
+            if indexed:
+                return 0
+        starts = chapter_starts(chapters)
+        passages, texts, passage_start = [], [], None
+        for entry in transcript:
+            if passage_start is None:
+                passage_start = float(entry["start"])
+            texts.append(entry["text"])
+            if float(entry["start"]) - passage_start >= SEARCH_CHUNK_SECONDS:
+                passages.append((passage_start, " ".join(texts)))
+                texts, passage_start = [], None
+        if texts:
+            passages.append((passage_start, " ".join(texts)))
+
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM search_documents WHERE video_id = ? AND kind = 'transcript'", (video_id,))
+            self._connection.executemany(
+                "INSERT INTO search_documents (video_id, kind, heading, start_seconds, content) VALUES (?, 'transcript', ?, ?, ?)",
+                [(video_id, heading_at(starts, start), start, text) for start, text in passages],
+            )
+        self.logger.info(f"Indexed {len(passages)} transcript passages of {video_id}")
+        return len(passages)
+
+    def search(self, query: str, limit: int = 10, kind: str | None = None) -> list[dict]:
+        """
+        Full-text search over all indexed transcripts and summaries, best matches first (BM25).
+        Args:
+            query (str): Free text; all terms have to occur, the last one may be a prefix.
+            limit (int): Maximum number of hits. Defaults to 10.
+            kind (str, optional): Only return hits of one kind, "transcript" or "summary:<mode>".
+        Returns:
+            list[dict]: Hits with 'video_id', 'title', 'channel', 'kind', 'heading', 'start_seconds', 'snippet' and 'score'.
+        """
+        match = _match_query(query)
+        if not match:
+            return []
+        sql = """
+            SELECT d.video_id, v.title, v.channel, d.kind, d.heading, d.start_seconds,
+                   snippet(search_index, 1, '**', '**', '…', 16) AS snippet,
+                   bm25(search_index) AS score
+            FROM search_index
+            JOIN search_documents AS d ON d.id = search_index.rowid
+            LEFT JOIN videos AS v ON v.video_id = d.video_id
+            WHERE search_index MATCH ?
+        """
+        parameters = [match]
+        if kind:
+            sql += " AND d.kind = ?"
+            parameters.append(kind)
+        sql += " ORDER BY score LIMIT ?"
+        parameters.append(limit)
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_sections(self, video_id: str, sections: list[dict]) -> None:
+        """
+        Replaces the stored sections of a video.
+        Args:
+            video_id (str): The YouTube video ID.
+            sections (list[dict]): Sections with 'heading', 'timestamp' (timedelta) and 'content' keys.
+        """
+        rows = [
+            (video_id, position, section.get("heading"), section["timestamp"].total_seconds(), section.get("content"))
+            for position, section in enumerate(sections)
+        ]
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sections WHERE video_id = ?", (video_id,))
+            self._connection.executemany(
+                "INSERT INTO sections (video_id, position, heading, start_seconds, content) VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def save_summaries(
+        self,
+        video_id: str,
+        mode: str,
+        model: str,
+        contents: list[str],
+        headings: list[str] | None = None,
+        language: str | None = None,
+        starts: list[float] | None = None,
+    ) -> None:
+        """
+        Replaces the stored result of one summary mode.
+        Args:
+            video_id (str): The YouTube video ID.
+            mode (str): The summary mode, e.g. "chapters" or "video".
+            model (str): The model that generated the result.
+            contents (list[str]): The generated texts in order (a single element for whole-video modes).
+            headings (list[str], optional): A heading per content, e.g. the chapter titles of Shorts scripts.
+            language (str, optional): The language code of the summarized transcript.
+            starts (list[float], optional): The start of each part in seconds, used for search hits.
+        """
+        headings = headings or [None] * len(contents)
+        starts = starts or [None] * len(contents)
+        created_at = self._now()
+        rows = [
+            (video_id, language or "", mode, model, position, heading, content, created_at)
+            for position, (heading, content) in enumerate(zip(headings, contents))
+        ]
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM summaries WHERE video_id = ? AND language = ? AND mode = ? AND model = ?",
+                (video_id, language or "", mode, model),
+            )
+            self._connection.executemany(
+                """
+                INSERT INTO summaries (video_id, language, mode, model, position, heading, content, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            # The index holds the latest result of each mode
+            self._connection.execute("DELETE FROM search_documents WHERE video_id = ? AND kind = ?", (video_id, f"summary:{mode}"))
+            self._connection.executemany(
+                "INSERT INTO search_documents (video_id, kind, heading, start_seconds, content) VALUES (?, ?, ?, ?, ?)",
+                [(video_id, f"summary:{mode}", heading, start, content) for heading, start, content in zip(headings, starts, contents)],
+            )
+
+    def get_summaries(self, video_id: str, mode: str, model: str, language: str | None = None) -> list[dict]:
+        """
+        Looks up the stored result of one summary mode.
+        Args:
+            video_id (str): The YouTube video ID.
+            mode (str): The summary mode.
+            model (str): The model that generated the result.
+            language (str, optional): The language code of the summarized transcript.
+        Returns:
+            list[dict]: The stored parts in order with 'heading', 'content' and 'created_at' keys (empty if nothing is stored).
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT heading, content, created_at FROM summaries
+                WHERE video_id = ? AND language = ? AND mode = ? AND model = ?
+                ORDER BY position
+                """,
+                (video_id, language or "", mode, model),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_video(self, video_id: str) -> dict | None:
+        """
+        Returns the stored metadata of a video, or None if it is unknown.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_sections(self, video_id: str) -> list[dict]:
+        """
+        Returns the stored sections of a video in order.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT heading, start_seconds, content FROM sections WHERE video_id = ? ORDER BY position", (video_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def videos_by_channel(self, channel: str) -> list[dict]:
+        """
+        Returns all stored videos of a channel, most recently updated first.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM videos WHERE channel = ? ORDER BY updated_at DESC", (channel,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def summaries_for_video(self, video_id: str) -> list[dict]:
+        """
+        Lists every stored summary part of a video with its language, mode and model.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT language, mode, model, position, heading, content, created_at FROM summaries
+                WHERE video_id = ? ORDER BY mode, model, position
+                """,
+                (video_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Search stored transcripts and summaries.")
+    parser.add_argument("query", help="The search terms")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path of the summary store")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of hits")
+    args = parser.parse_args()
+
+    store = SummaryStore(args.db)
+    for hit in store.search(args.query, limit=args.limit):
+        start = int(hit["start_seconds"] or 0)
+        print(f"{hit['video_id']} [{start // 60}:{start % 60:02d}] {hit['title']} - {hit['heading'] or hit['kind']}")
+        print(f"    {hit['snippet']}")
@@ -0,0 +1,163 @@
+"""
+This module finds topic boundaries in transcripts of videos without chapters.
+It follows the TextTiling idea: the transcript is cut into small blocks, neighbouring windows of blocks are compared
+by the cosine similarity of their TF-IDF vectors and the deepest similarity valleys become section boundaries.
+Everything runs on the CPU with NumPy and needs no network access.
+Functions:
+    segment_by_topics: Splits transcript entries into headed sections at topic changes.
+"""
+# Native Libraries
+import re
+from datetime import timedelta
+# External Libraries
+import numpy as np
+# User-defined Libraries
+try:
+    from src.preprocessing import estimate_tokens, format_timestamp
+except ImportError:
+    from preprocessing import estimate_tokens, format_timestamp
+
+
+WORD_REGEX = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+STOPWORDS = frozenset("""
+    the and that this with you for are was have not but they what all there can just about like would
+    your from one our out know going get got yeah really very think because when some also then them
+    der die das und ist nicht ich sie ein eine den dem des mit auf sich für von auch wir aber noch
+    wie man wenn dann oder schon mal was hat sind war ganz einfach also halt jetzt eben genau
+""".split())
+
+
+def _tokenize(text: str) -> list[str]:
+    return [word for word in WORD_REGEX.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _block_matrix(blocks: list[str]) -> tuple[np.ndarray, list[str]]:
+    """
+    Builds the TF-IDF matrix (blocks x vocabulary) of the transcript blocks.
+    """
+    vocabulary: dict[str, int] = {}
+    rows, cols = [], []
+    for row, text in enumerate(blocks):
+        for word in _tokenize(text):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    counts = np.zeros((len(blocks), max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(blocks)) / (1 + document_frequency)) + 1.0
+    terms = sorted(vocabulary, key=vocabulary.get)
+    return counts * idf.astype(np.float32), terms
+
+
+def _gap_similarities(matrix: np.ndarray, window: int) -> np.ndarray:
+    """
+    Cosine similarity between the `window` blocks before and after every gap between two blocks.
+    """
+    cumulative = np.vstack([np.zeros((1, matrix.shape[1]), dtype=matrix.dtype), np.cumsum(matrix, axis=0)])
+    gaps = np.arange(1, matrix.shape[0])
+    left = cumulative[gaps] - cumulative[np.maximum(gaps - window, 0)]
+    right = cumulative[np.minimum(gaps + window, matrix.shape[0])] - cumulative[gaps]
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    return np.einsum("ij,ij->i", left, right) / np.where(norms == 0, 1, norms)
+
+
+def _depth_scores(similarities: np.ndarray, window: int) -> np.ndarray:
+    """
+    How deep every gap lies in a similarity valley compared to the highest point on both sides.
+    """
+    padded = np.pad(similarities, window, mode="edge")
+    views = np.lib.stride_tricks.sliding_window_view(padded, window + 1)
+    left_peaks = views[:len(similarities)].max(axis=1)
+    right_peaks = views[window:window + len(similarities)].max(axis=1)
+    return (left_peaks - similarities) + (right_peaks - similarities)
+
+
+def _heading(matrix: np.ndarray, terms: list[str], first_block: int, last_block: int, count: int = 3) -> str:
+    weights = matrix[first_block:last_block].sum(axis=0)
+    top = np.argsort(weights)[::-1][:count]
+    return ", ".join(terms[index] for index in top if weights[index] > 0).capitalize()
+
+
+def segment_by_topics(
+    content: list[dict],
+    block_size: int = 8,
+    window: int = 6,
+    min_tokens: int = 400,
+    max_tokens: int = 2500,
+) -> list[dict]:
+    """
+    Splits the transcript into sections at topic changes.
+    Valley bottoms are taken as boundaries in the order of their depth score, as long as they are deeper than
+    mean + std / 2 of all depth scores and every resulting section keeps at least min_tokens.
+    Sections that are still longer than max_tokens are split at the valley that balances both halves best.
+    Args:
+        content (list[dict]): The transcript entries with 'text' and 'start' keys.
+        block_size (int): Number of captions per block. Defaults to 8.
+        window (int): Number of blocks compared on each side of a gap. Defaults to 6.
+        min_tokens (int): Minimum number of tokens per section. Defaults to 400.
+        max_tokens (int): Maximum number of tokens per section. Defaults to 2500.
+    Returns:
+        list[dict]: Sections in the format of link_content_to_outline
+            keys: 'timestr' (str), 'timestamp' (timedelta), 'heading' (str), 'content' (str)
+    """
+    if not content:
+        return []
+    blocks = [" ".join(entry["text"] for entry in content[i:i + block_size]) for i in range(0, len(content), block_size)]
+    block_tokens = np.array([estimate_tokens(block) + block_size for block in blocks])
+    cumulative_tokens = np.concatenate([[0], np.cumsum(block_tokens)])
+    matrix, terms = _block_matrix(blocks)
+
+    boundaries: list[int] = []
+    if len(blocks) > 1:
+        depths = _depth_scores(_gap_similarities(matrix, window), window)
+        # Stricter than the classic TextTiling cutoff (mean - std / 2): caption noise creates many shallow valleys
+        cutoff = depths.mean() + depths.std() / 2
+        # Only the bottom of a valley is a candidate, not its slopes
+        is_valley = np.ones(len(depths), dtype=bool)
+        is_valley[1:] &= depths[1:] >= depths[:-1]
+        is_valley[:-1] &= depths[:-1] > depths[1:]
+        gap_order = np.argsort(depths)[::-1]
+
+        def fits(boundary: int, chosen: list[int]) -> bool:
+            previous = max((b for b in chosen if b < boundary), default=0)
+            following = min((b for b in chosen if b > boundary), default=len(blocks))
+            return (cumulative_tokens[boundary] - cumulative_tokens[previous] >= min_tokens
+                    and cumulative_tokens[following] - cumulative_tokens[boundary] >= min_tokens)
+
+        for gap in gap_order:
+            if depths[gap] <= cutoff:
+                break
+            if is_valley[gap] and fits(gap + 1, boundaries):
+                boundaries.append(int(gap + 1))
+
+        # Split sections that are still too long at their deepest gap
+        changed = True
+        while changed:
+            changed = False
+            edges = [0] + sorted(boundaries) + [len(blocks)]
+            for start, end in zip(edges, edges[1:]):
+                if cumulative_tokens[end] - cumulative_tokens[start] <= max_tokens or end - start < 2:
+                    continue
+                middle = (cumulative_tokens[start] + cumulative_tokens[end]) / 2
+                candidates = [
+                    boundary for boundary in range(start + 1, end)
+                    if is_valley[boundary - 1] and fits(boundary, boundaries)
+                ]
+                # Inside a single long topic the valleys are shallow, so prefer the one that balances both halves
+                best = min(candidates, key=lambda boundary: abs(cumulative_tokens[boundary] - middle), default=None)
+                boundaries.append(best if best is not None else (start + end) // 2)
+                changed = True
+                break
+
+    sections = []
+    edges = [0] + sorted(boundaries) + [len(blocks)]
+    for start, end in zip(edges, edges[1:]):
+        first_entry = start * block_size
+        start_seconds = content[first_entry]["start"]
+        sections.append({
+            "timestr": format_timestamp(start_seconds),
+            "timestamp": timedelta(seconds=start_seconds),
+            "heading": _heading(matrix, terms, start, end) or f"Chapter {len(sections) + 1}",
+            "content": " ".join(blocks[start:end]),
+        })
+    return sections
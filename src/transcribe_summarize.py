@@ -1,18 +1,54 @@
 # Native Libraries
+import copy
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-# External Libraries
-from openai import OpenAI # OR: from openai import AzureOpenAI
+from typing import Callable
 # User-defined Libraries
 try:
     import src.gpt_functions as gpt
+    import src.model_router as model_router
+    from src.deadline import Deadline
+    import src.preprocessing as preprocessing
+    from src.profiling import profiled
+    from src.summary_store import SummaryStore
     from src.youtube_video import YouTubeVideo
     from src.logger import Logger
 except ImportError:
     from youtube_video import YouTubeVideo
     from logger import Logger
     import gpt_functions as gpt
+    import model_router
+    from deadline import Deadline
+    import preprocessing
+    from profiling import profiled
+    from summary_store import SummaryStore
+
+
+# Token budget of synthetic sections for videos without chapters
+SECTION_TARGET_TOKENS = 1500
+SECTION_MIN_TOKENS = 400
+SECTION_MAX_TOKENS = 2500
+# A gap between two captions of at least this length is treated as a natural boundary
+SECTION_PAUSE_SECONDS = 1.5
+# How videos without chapters are split: "topics" (topic boundaries) or "tokens" (token-balanced)
+SYNTHETIC_SEGMENTATION = "topics"
+# Number of sections that are summarized at the same time
+MAX_PARALLEL_REQUESTS = 8
+# Packing of adjacent small sections into one request, see pack_sections()
+PACK_SMALL_SECTIONS = os.getenv("TUBE_TLDR_PACK_SECTIONS", "0") == "1"
+# Input tokens of one packed request and the size up to which a section counts as small
+PACK_TOKEN_BUDGET = 3000
+PACK_SECTION_MAX_TOKENS = 800
+# Videos up to this many section tokens get the chapter, video and sentence summaries from one request
+COMBINED_ENABLED = os.getenv("TUBE_TLDR_COMBINED", "0") == "1"
+COMBINED_MAX_TOKENS = 6000
+COMBINED_MODES = ("chapters", "video", "sentence")
+# Shown in place of chapters whose summary was not finished before the deadline
+MISSING_CHAPTER_TEXT = "## {heading} ({timestr})\n_This chapter was not summarized in time. Summarize again to retry it._"
+# Shown in place of chapters whose summary failed with an error
+FAILED_CHAPTER_TEXT = "## {heading} ({timestr})\n_Summarizing this chapter failed: {error}_"
 
 
 class YouTubeTranscribeSummarize(Logger):
@@ -52,6 +88,7 @@ class YouTubeTranscribeSummarize(Logger):
         return chapters
 
 
+    @profiled
     def link_content_to_outline(self, content: list, outline: list, short_form: bool = False) -> list[dict]:
         """
         Group the transcript content into sections based on the video outline
@@ -92,48 +129,88 @@ class YouTubeTranscribeSummarize(Logger):
         return outline
 
 
-    def link_transcript_without_outline(self, content):
-
-        # TODO: Work in progress
-
-        # get max length of content
-        content_length = content[-1]["timestamp"] # get timedelta object of last entry
-
-        total_duration = content_length.total_seconds() / 60  # Convert total duration to minutes
+    @profiled
+    def link_transcript_without_outline(
+        self,
+        content: list,
+        target_tokens: int = SECTION_TARGET_TOKENS,
+        min_tokens: int = SECTION_MIN_TOKENS,
+        max_tokens: int = SECTION_MAX_TOKENS,
+    ) -> list[dict]:
+        """
+        Splits a transcript without chapters into synthetic sections of balanced token count.
+        Once a section has reached the target size it is closed at the next caption pause or sentence end,
+        at the latest when it reaches the maximum size. A too small last section is merged into the previous one,
+        unless both together would exceed the maximum size.
+        Args:
+            content (list): List of dictionaries containing the transcript content
+                keys: 'text' (str), 'start' (float), 'duration' (float)
+            target_tokens (int): Preferred number of tokens per section.
+            min_tokens (int): Minimum number of tokens of the last section before it is merged.
+            max_tokens (int): Maximum number of tokens per section, also after the merge.
+        Returns:
+            list: List of dictionaries in the format of link_content_to_outline
+                keys: 'timestr' (str), 'timestamp' (timedelta), 'heading' (str), 'content' (str)
+        """
+        groups = []
+        current, current_tokens = [], 0
+        for index, entry in enumerate(content):
+            current.append(entry["text"])
+            current_tokens += preprocessing.estimate_tokens(entry["text"]) + 1
+            if index + 1 == len(content):
+                break
+            next_entry = content[index + 1]
+            pause = next_entry["start"] - (entry["start"] + entry.get("duration", 0))
+            at_boundary = pause >= SECTION_PAUSE_SECONDS or entry["text"].rstrip().endswith((".", "!", "?"))
+            if (current_tokens >= target_tokens and at_boundary) or current_tokens >= max_tokens:
+                groups.append((current, current_tokens, next_entry["start"]))
+                current, current_tokens = [], 0
+        if current:
+            if groups and current_tokens < min_tokens and groups[-1][1] + current_tokens <= max_tokens:
+                previous, previous_tokens, _ = groups.pop()
+                current, current_tokens = previous + current, previous_tokens + current_tokens
+            groups.append((current, current_tokens, None))
 
-        # Determine chunk length based on total duration
-        if total_duration <= 15:
-            chunk_length = timedelta(minutes=total_duration)
-        elif 15 < total_duration <= 45:
-            chunk_length = timedelta(minutes=5)
-        elif 45 < total_duration <= 90:
-            chunk_length = timedelta(minutes=10)
-        else:
-            chunk_length = timedelta(minutes=15)
-            
         sections = []
-        section = {"timestamp": content[0]["timestamp"], "content": []}
-
-        for entry in content:
-            if entry["timestamp"] < section["timestamp"] + chunk_length:
-                section["content"].append(entry["text"])
-            else:
-                section["content"] = " ".join(section["content"])
-                sections.append(section)
-                section = {"timestamp": entry["timestamp"], "content": [entry["text"]]}
-
-        section["content"] = " ".join(section["content"])
-        sections.append(section)
-
-        for section in sections:
-            section["topic"] = f"Chapter {sections.index(section) + 1}"
-            section["start_time"] = str(section["timestamp"])
-            section_length_words = len(section["content"].split())
-            print("Section length: ", section_length_words)
-
+        start = content[0]["start"] if content else 0
+        for number, (texts, tokens, next_start) in enumerate(groups, start=1):
+            sections.append({
+                "timestr": preprocessing.format_timestamp(start),
+                "timestamp": timedelta(seconds=start),
+                "heading": f"Chapter {number}",
+                "content": " ".join(texts),
+            })
+            start = next_start
+        self.logger.info(f"Split transcript into {len(sections)} synthetic sections (target {target_tokens} tokens)")
         return sections
 
 
+    @profiled
+    def link_transcript_by_topics(
+        self,
+        content: list,
+        min_tokens: int = SECTION_MIN_TOKENS,
+        max_tokens: int = SECTION_MAX_TOKENS,
+    ) -> list[dict]:
+        """
+        Splits a transcript without chapters into sections at topic changes (see topic_segmentation).
+        Args:
+            content (list): List of dictionaries containing the transcript content
+                keys: 'text' (str), 'start' (float)
+            min_tokens (int): Minimum number of tokens per section.
+            max_tokens (int): Maximum number of tokens per section.
+        Returns:
+            list: List of dictionaries in the format of link_content_to_outline
+                keys: 'timestr' (str), 'timestamp' (timedelta), 'heading' (str), 'content' (str)
+        """
+        # Imported here, NumPy is only needed for videos without chapters
+        try:
+            from src.topic_segmentation import segment_by_topics
+        except ImportError:
+            from topic_segmentation import segment_by_topics
+        sections = segment_by_topics(content, min_tokens=min_tokens, max_tokens=max_tokens)
+        self.logger.info(f"Split transcript into {len(sections)} topic sections")
+        return sections
 
 
 def example_summary(url: str, api_key=os.getenv('OPENAI_API_KEY')):
@@ -152,7 +229,7 @@ def example_summary(url: str, api_key=os.getenv('OPENAI_API_KEY')):
         print(ErrorMessage)
         return ErrorMessage
     
-    if obj.duration < timedelta(minutes=20):
+    if obj.duration is not None and obj.duration < timedelta(minutes=20):
         unified_transcript = " ".join([item["text"] for item in obj.transcript])
 
         summary = obj.get_whole_transcript_summary(unified_transcript)
@@ -221,76 +298,445 @@ def example_summary(url: str, api_key=os.getenv('OPENAI_API_KEY')):
     return chap_summaries
 
 
-def summary_by_chapters(video: YouTubeVideo, api_key: str) -> list[str]:
+@profiled
+def build_sections(video: YouTubeVideo, short_form: bool = False, segmentation: str = SYNTHETIC_SEGMENTATION) -> list[dict]:
+    """
+    Links the transcript of the video to its chapters without modifying the video's own chapter list.
+    Videos without chapters are split into synthetic sections instead.
+    Args:
+        video (YouTubeVideo): The YouTube video object.
+        short_form (bool): Flag to keep the timestamped transcript for short form content. Defaults to False.
+        segmentation (str): How to split videos without chapters, "topics" or "tokens". Defaults to SYNTHETIC_SEGMENTATION.
+    Returns:
+        list[dict]: The sections with keys 'timestr', 'timestamp', 'heading' and 'content'.
+            Videos without chapters are split into synthetic sections.
+    """
+    obj = YouTubeTranscribeSummarize(youtube_video=video)
+    content = preprocessing.clean_transcript(video.transcript)
+    if not video.chapters:
+        if segmentation == "topics":
+            return obj.link_transcript_by_topics(content)
+        return obj.link_transcript_without_outline(content)
+    outline = obj.convert_timestamps_to_timedelta(copy.deepcopy(video.chapters))
+    return obj.link_content_to_outline(content=content, outline=outline, short_form=short_form)
+
+
+def cached_summary(video: YouTubeVideo, mode: str, store: SummaryStore | None = None):
+    """
+    Returns the result of a summary mode from the video's in-memory cache or from the summary store.
+    Results found in the store are copied into the in-memory cache.
+    Args:
+        video (YouTubeVideo): The YouTube video object.
+        mode (str): The summary mode ("chapters", "video", "sentence" or "shorts").
+        store (SummaryStore, optional): The persistent summary store.
+    Returns:
+        The cached result, or None if the mode has not been generated yet.
+    """
+    if video.summaries.get(mode):
+        return video.summaries[mode]
+    if store is None:
+        return None
+    # The routing policy is part of the key, read at every lookup since configure_routing() can change it
+    rows = store.get_summaries(video.video_id, mode, model_router.route_label(), language=video.transcript_language)
+    if not rows:
+        return None
+    if mode == "chapters":
+        result = [row["content"] for row in rows]
+    elif mode == "shorts":
+        result = [{"heading": row["heading"], "script": row["content"]} for row in rows]
+    else:
+        result = rows[0]["content"]
+    video.summaries[mode] = result
+    return result
+
+
+def store_summary(video: YouTubeVideo, mode: str, result, store: SummaryStore | None = None, sections: list[dict] | None = None):
+    """
+    Puts the result of a summary mode into the video's in-memory cache and, if given, into the summary store.
+    """
+    video.summaries[mode] = result
+    if store is None:
+        return
+    store.save_video(video)
+    if sections:
+        store.save_sections(video.video_id, sections)
+    headings = [section["heading"] for section in sections] if sections else None
+    starts = [section["timestamp"].total_seconds() for section in sections] if sections else None
+    if mode == "shorts":
+        contents = [item["script"] for item in result]
+        headings = [item["heading"] for item in result]
+    elif mode == "chapters":
+        contents = result
+    else:
+        contents = [result]
+    store.save_summaries(
+        video.video_id, mode, model_router.route_label(), contents, headings=headings, language=video.transcript_language, starts=starts
+    )
+
+
+def pack_sections(
+    sections: list[dict], indices: list[int] | None = None, token_budget: int = PACK_TOKEN_BUDGET,
+    max_section_tokens: int = PACK_SECTION_MAX_TOKENS,
+) -> list[list[int]]:
+    """
+    Groups adjacent small sections so that each group can be handled by one request.
+    A group only holds consecutive sections and stays within the token budget. Sections above max_section_tokens
+    form a group of their own.
+    Args:
+        sections (list[dict]): The linked sections.
+        indices (list[int], optional): The indices of the sections to group, in order. Defaults to all sections.
+        token_budget (int): Maximum input tokens of a group. Defaults to PACK_TOKEN_BUDGET.
+        max_section_tokens (int): Maximum tokens of a section that is packed. Defaults to PACK_SECTION_MAX_TOKENS.
+    Returns:
+        list[list[int]]: The section indices per group.
+    """
+    groups, group, group_tokens = [], [], 0
+    for index in range(len(sections)) if indices is None else indices:
+        tokens = preprocessing.estimate_tokens(preprocessing.compact_section(sections[index]))
+        adjacent = group and group[-1] == index - 1
+        if tokens > max_section_tokens or not adjacent or group_tokens + tokens > token_budget:
+            if group:
+                groups.append(group)
+            group, group_tokens = [], 0
+        group.append(index)
+        group_tokens += tokens
+        if tokens > max_section_tokens:
+            groups.append(group)
+            group, group_tokens = [], 0
+    if group:
+        groups.append(group)
+    return groups
+
+
+def _complete_group(items: list, single: Callable, packed: Callable, logger=None) -> list[str]:
+    """
+    Runs a task for a group of items: one packed request for several items, the single request for one item.
+    Items whose part of the packed answer is missing or invalid are retried with single requests.
+    """
+    if len(items) == 1:
+        return [single(items[0])]
+    results = packed(items)
+    retries = [index for index, result in enumerate(results) if result is None]
+    if retries and logger is not None:
+        logger.warning(f"Packed answer incomplete for {len(retries)} of {len(items)} parts, retrying them one by one")
+    for index in retries:
+        results[index] = single(items[index])
+    return results
+
+
+def missing_chapters(video: YouTubeVideo) -> list[int]:
+    """
+    Returns the indices of the chapters whose summary is still missing after a job ran into its deadline.
+    """
+    return [index for index, summary in enumerate(video.summaries.get("chapters") or []) if summary is None]
+
+
+def with_missing_chapters(
+    chap_summaries: list[str | None], sections: list[dict], errors: dict[int, str] | None = None
+) -> list[str]:
+    """
+    Replaces the summaries of missing chapters for display: by FAILED_CHAPTER_TEXT if the chapter failed with
+    an error, otherwise by MISSING_CHAPTER_TEXT (not finished before the deadline).
+    Args:
+        chap_summaries (list[str | None]): The chapter summaries, None where missing.
+        sections (list[dict]): The linked sections.
+        errors (dict[int, str], optional): The error message per failed chapter index.
+    Returns:
+        list[str]: The summaries with a marker for every missing chapter.
+    """
+    errors = errors or {}
+    return [
+        summary if summary is not None else (FAILED_CHAPTER_TEXT if index in errors else MISSING_CHAPTER_TEXT).format(
+            heading=section["heading"], timestr=preprocessing.format_timestamp(section["timestamp"]), error=errors.get(index)
+        )
+        for index, (summary, section) in enumerate(zip(chap_summaries, sections))
+    ]
+
+
+def summary_by_chapters(
+    video: YouTubeVideo, api_key: str, store: SummaryStore | None = None, deadline: Deadline | None = None,
+    max_workers: int = MAX_PARALLEL_REQUESTS, on_chapter: Callable[[int, str], None] | None = None,
+    pack: bool = PACK_SMALL_SECTIONS,
+) -> list[str]:
     """
     Summarizes the YouTube video by chapters.
-    Converts chapter timestamps to timedelta objects and links the transcript content. 
+    Converts chapter timestamps to timedelta objects and links the transcript content.
+    Videos without chapters are split into synthetic sections. All sections are summarized in parallel.
+    If the deadline expires, the chapters finished so far are returned and the missing ones are replaced by
+    MISSING_CHAPTER_TEXT, chapters that failed with an error by FAILED_CHAPTER_TEXT. Both stay None in the
+    video's cache, so the next call only summarizes those chapters.
     Args:
         video (YouTubeVideo): The YouTube video object.
         api_key (str): The OpenAI API key.
+        store (SummaryStore, optional): Persistent store to look up and save the result (only once it is complete).
+        deadline (Deadline, optional): The deadline of the job. Defaults to None (wait for all chapters).
+        max_workers (int): Number of sections summarized at the same time. Defaults to MAX_PARALLEL_REQUESTS.
+        on_chapter (Callable[[int, str], None], optional): Called with the index and summary of every newly
+            summarized chapter as soon as it is done, e.g. to stream it. Runs in a worker thread.
+        pack (bool): Summarize adjacent small sections in one request, see pack_sections(). Defaults to PACK_SMALL_SECTIONS.
     Returns:
         list[str]: A list of chapter summaries.
     """
+    cached = cached_summary(video, "chapters", store)
+    if cached and None not in cached:
+        return cached
     obj = YouTubeTranscribeSummarize(youtube_video=video)
-    outline = obj.convert_timestamps_to_timedelta(obj.youtube_video.chapters)
-    sections = obj.link_content_to_outline(content=obj.youtube_video.transcript, outline=outline)
-    
-
-    chap_summaries = []
-    for section in sections:
-        chap_summary = gpt.get_chapter_summary(section, api_key=api_key)
-        chap_summaries.append(chap_summary)
+    sections = build_sections(video)
+    chap_summaries = list(cached) if cached and len(cached) == len(sections) else [None] * len(sections)
+
+    missing = [index for index, summary in enumerate(chap_summaries) if summary is None]
+    groups = pack_sections(sections, missing) if pack else [[index] for index in missing]
+
+    def summarize_group(group: list[int]) -> list[str]:
+        return _complete_group(
+            [sections[index] for index in group],
+            lambda section: gpt.get_chapter_summary(section, api_key=api_key, deadline=deadline),
+            lambda packed: gpt.get_packed_chapter_summaries(packed, api_key=api_key, deadline=deadline),
+            obj.logger,
+        )
 
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(summarize_group, group): group for group in groups}
+    if on_chapter is not None:
+        for future, group in futures.items():
+            future.add_done_callback(
+                lambda future, group=group: future.cancelled() or future.exception()
+                or [on_chapter(index, summary) for index, summary in zip(group, future.result())]
+            )
+    done, not_done = wait(futures, timeout=deadline.remaining() if deadline else None)
+    # Do not wait for stuck calls, they end on their own once the request timeout has passed
+    executor.shutdown(wait=False, cancel_futures=True)
+    errors, failed = [], {}
+    for future in done:
+        try:
+            for index, summary in zip(futures[future], future.result()):
+                chap_summaries[index] = summary
+        except Exception as e:
+            obj.logger.error(f"Summary of chapters {futures[future]} failed: {e}")
+            errors.append(e)
+            failed.update((index, str(e) or type(e).__name__) for index in futures[future])
+    if errors and all(summary is None for summary in chap_summaries) and not not_done:
+        raise errors[0]
+
+    hedging = gpt.hedging_stats()
+    if hedging and hedging["p99"] is not None:
+        obj.logger.info(
+            f"Hedged {hedging['hedges']} of {hedging['requests']} requests ({hedging['hedge_wins']} won), "
+            f"p99 {hedging['p99']:.1f}s vs. at least {hedging['p99_without_hedging']:.1f}s without hedging"
+        )
+    video.summaries["chapters"] = chap_summaries
+    missing = missing_chapters(video)
+    if missing:
+        obj.logger.warning(f"{len(missing)} of {len(sections)} chapters missing ({len(failed)} failed), returning partial result")
+        return with_missing_chapters(chap_summaries, sections, failed)
+    store_summary(video, "chapters", chap_summaries, store, sections=sections)
     return chap_summaries
 
 
-def create_shorts_by_chapters(video: YouTubeVideo, api_key: str) -> list[str]:
-
-    obj = YouTubeTranscribeSummarize(youtube_video=video)
-    outline = obj.convert_timestamps_to_timedelta(obj.youtube_video.chapters)
-    sections = obj.link_content_to_outline(content=obj.youtube_video.transcript, outline=outline, short_form=True)
+def create_shorts_by_chapters(
+    video: YouTubeVideo, api_key: str, store: SummaryStore | None = None, deadline: Deadline | None = None,
+    pack: bool = PACK_SMALL_SECTIONS,
+) -> list[dict]:
+    """
+    Creates a voiceover script for a Short per chapter.
+    Args:
+        video (YouTubeVideo): The YouTube video object.
+        api_key (str): The OpenAI API key.
+        store (SummaryStore, optional): Persistent store to look up and save the result.
+        deadline (Deadline, optional): The deadline of the job.
+        pack (bool): Handle adjacent small sections in one request per step, see pack_sections(). Defaults to PACK_SMALL_SECTIONS.
+    Returns:
+        list[dict]: The scripts with keys 'heading' and 'script'.
+    Raises:
+        DeadlineExceeded: If the deadline expires before all scripts are written.
+    """
+    cached = cached_summary(video, "shorts", store)
+    if cached:
+        return cached
+    sections = build_sections(video, short_form=True)
+    groups = pack_sections(sections) if pack else [[index] for index in range(len(sections))]
     shorts_per_chapter = []
-    for section in sections:
-        chapter_script = gpt.rework_transcript_to_sentences(section)
-        shorts_script = gpt.create_shorts_script(chapter_script)
-        shorts_per_chapter.append(
-            {
-                "heading": section["heading"],
-                "script": shorts_script,
-            }
+    for group in groups:
+        chapter_scripts = _complete_group(
+            [sections[index] for index in group],
+            lambda section: gpt.rework_transcript_to_sentences(section, deadline=deadline),
+            lambda items: gpt.rework_transcripts_to_sentences(items, deadline=deadline),
+        )
+        shorts_scripts = _complete_group(
+            chapter_scripts,
+            lambda chapter_script: gpt.create_shorts_script(chapter_script, deadline=deadline),
+            lambda scripts: gpt.create_shorts_scripts(scripts, deadline=deadline),
         )
+        for index, shorts_script in zip(group, shorts_scripts):
+            shorts_per_chapter.append(
+                {
+                    "heading": sections[index]["heading"],
+                    "script": shorts_script,
+                }
+            )
+    store_summary(video, "shorts", shorts_per_chapter, store, sections=sections)
     return shorts_per_chapter
 
 
-def summary_entire_video(video: YouTubeVideo, api_key: str) -> str:
+def condensed_source(video: YouTubeVideo, include_video_summary: bool = False) -> str | None:
+    """
+    Returns already generated summaries of the video that can replace the raw transcript as model input.
+    Args:
+        video (YouTubeVideo): The YouTube video object.
+        include_video_summary (bool): Whether a cached whole-video summary may be used. Defaults to False.
+    Returns:
+        str: The cached whole-video summary or the joined chapter summaries.
+        None: If nothing has been summarized yet.
+    """
+    if include_video_summary and video.summaries.get("video"):
+        return video.summaries["video"]
+    chapter_summaries = video.summaries.get("chapters")
+    if chapter_summaries and None not in chapter_summaries:
+        return "\n\n".join(chapter_summaries)
+    return None
+
+
+def summary_entire_video(
+    video: YouTubeVideo, api_key: str, hierarchical: bool = True, store: SummaryStore | None = None,
+    deadline: Deadline | None = None,
+) -> str:
     """
     Summarizes the entire YouTube video.
-    Converts the transcript into a single string and generates a summary.
+    If chapter summaries already exist and hierarchical is set, the summary is built from them.
+    Otherwise the cleaned transcript is converted into a single string and summarized.
     Args:
         video (YouTubeVideo): The YouTube video object.
         api_key (str): The OpenAI API key.
+        hierarchical (bool): Derive the summary from cached chapter summaries if available. Defaults to True.
+        store (SummaryStore, optional): Persistent store to look up and save the result.
+        deadline (Deadline, optional): The deadline of the job.
     Returns:
         str: The summary of the entire video.
     """
+    cached = cached_summary(video, "video", store)
+    if cached:
+        return cached
     obj = YouTubeTranscribeSummarize(youtube_video=video)
-    unified_transcript = " ".join([item["text"] for item in obj.youtube_video.transcript])
-    summary = gpt.get_whole_transcript_summary(unified_transcript, api_key=api_key)
+    if hierarchical:
+        cached_summary(video, "chapters", store)
+    condensed = condensed_source(video) if hierarchical else None
+    if condensed:
+        obj.logger.info(f"Building whole-video summary from {len(video.summaries['chapters'])} chapter summaries")
+        summary = gpt.get_unified_summary(api_key=api_key, sections=condensed, deadline=deadline)
+    else:
+        unified_transcript = preprocessing.compact_transcript(obj.youtube_video.transcript)
+        summary = gpt.get_whole_transcript_summary(unified_transcript, api_key=api_key, deadline=deadline)
+    store_summary(video, "video", summary, store)
     return summary
 
 
-def summary_in_one_sentence(video: YouTubeVideo, api_key: str) -> str:
+def _request_tokens(request: dict) -> int:
+    return preprocessing.estimate_tokens("".join(message["content"] for message in request["messages"]))
+
+
+def combined_request_savings(video: YouTubeVideo, sections: list[dict] | None = None) -> dict:
+    """
+    Compares the input of the combined request with separate requests for the chapter summaries, the
+    whole-video summary and the one-sentence summary from the transcript.
+    Args:
+        video (YouTubeVideo): The loaded video.
+        sections (list[dict], optional): The linked sections. Defaults to build_sections(video).
+    Returns:
+        dict: keys 'combined' and 'separate', each with 'requests' and 'input_tokens'.
+    """
+    sections = sections if sections is not None else build_sections(video)
+    transcript = preprocessing.compact_transcript(video.transcript)
+    separate = [gpt.chapter_summary_request(section) for section in sections] + [
+        gpt.whole_transcript_summary_request(transcript),
+        gpt.one_sentence_summary_request(transcript, video.title or ""),
+    ]
+    return {
+        "combined": {"requests": 1, "input_tokens": _request_tokens(gpt.combined_summary_request(sections, video.title or ""))},
+        "separate": {"requests": len(separate), "input_tokens": sum(_request_tokens(request) for request in separate)},
+    }
+
+
+def summary_combined(
+    video: YouTubeVideo, api_key: str, store: SummaryStore | None = None, deadline: Deadline | None = None,
+    max_tokens: int = COMBINED_MAX_TOKENS,
+) -> dict | None:
+    """
+    Generates the chapter summaries, the whole-video summary and the one-sentence summary in one request and puts
+    each result into the cache of its mode, so the summary functions of these modes return it without a request.
+    Chapters missing in the answer are summarized on their own, a missing video or sentence summary is derived
+    from the chapters. The routing statistics report the combined requests under the task "combined".
+    Args:
+        video (YouTubeVideo): The YouTube video object.
+        api_key (str): The OpenAI API key.
+        store (SummaryStore, optional): Persistent store to look up and save the results.
+        deadline (Deadline, optional): The deadline of the job.
+        max_tokens (int): Maximum section tokens of a video for the combined request. Defaults to COMBINED_MAX_TOKENS.
+    Returns:
+        dict: The results keyed by mode ("chapters", "video", "sentence").
+        None: If the video is too long, one of the modes is already generated or the request failed.
+            The modes are then generated separately.
+    """
+    if any(cached_summary(video, mode, store) for mode in COMBINED_MODES):
+        return None
+    obj = YouTubeTranscribeSummarize(youtube_video=video)
+    sections = build_sections(video)
+    tokens = sum(preprocessing.estimate_tokens(section["content"]) for section in sections)
+    if tokens > max_tokens:
+        obj.logger.info(f"Video has {tokens} tokens, too long for a combined request (max. {max_tokens})")
+        return None
+    try:
+        products = gpt.get_combined_summary(sections, video.title or "", api_key=api_key, deadline=deadline)
+    except Exception as e:
+        obj.logger.error(f"Combined summary failed, falling back to separate requests: {e}")
+        return None
+
+    video.summaries["chapters"] = products["chapters"]
+    if None in products["chapters"]:
+        chapters = summary_by_chapters(video, api_key, store=store, deadline=deadline)
+    else:
+        chapters = products["chapters"]
+        store_summary(video, "chapters", chapters, store, sections=sections)
+    results = {"chapters": chapters}
+    for mode, summarize in (("video", summary_entire_video), ("sentence", summary_in_one_sentence)):
+        if products[mode]:
+            store_summary(video, mode, products[mode], store)
+            results[mode] = products[mode]
+        else:
+            results[mode] = summarize(video, api_key, store=store, deadline=deadline)
+    return results
+
+
+def summary_in_one_sentence(
+    video: YouTubeVideo, api_key: str, hierarchical: bool = True, store: SummaryStore | None = None,
+    deadline: Deadline | None = None,
+) -> str:
     """
     Generates a one-sentence summary of the entire YouTube video.
-    Converts the transcript into a single string and generates a summary.
+    If a whole-video summary or chapter summaries already exist and hierarchical is set, they are used as input.
+    Otherwise the cleaned transcript is converted into a single string and summarized.
     Args:
         video (YouTubeVideo): The YouTube video object.
         api_key (str): The OpenAI API key.
+        hierarchical (bool): Derive the sentence from cached summaries if available. Defaults to True.
+        store (SummaryStore, optional): Persistent store to look up and save the result.
+        deadline (Deadline, optional): The deadline of the job.
     Returns:
         str: The one-sentence summary of the entire video.
     """
+    cached = cached_summary(video, "sentence", store)
+    if cached:
+        return cached
     obj = YouTubeTranscribeSummarize(youtube_video=video)
-    unified_transcript = " ".join([item["text"] for item in obj.youtube_video.transcript])
-    summary = gpt.get_one_sentence_summary(unified_transcript, obj.youtube_video.title, api_key=api_key)
+    if hierarchical and not cached_summary(video, "video", store):
+        cached_summary(video, "chapters", store)
+    condensed = condensed_source(video, include_video_summary=True) if hierarchical else None
+    if condensed:
+        obj.logger.info("Building one-sentence summary from cached summaries")
+        source = condensed
+    else:
+        source = preprocessing.compact_transcript(obj.youtube_video.transcript)
+    summary = gpt.get_one_sentence_summary(source, obj.youtube_video.title, api_key=api_key, deadline=deadline)
+    store_summary(video, "sentence", summary, store)
     return summary
 
 
@@ -0,0 +1,205 @@
+"""
+This module answers questions about a single video from the passages of its transcript that match the question.
+The transcript is cut into short passages with their start time and chapter heading and indexed with BM25 in memory,
+on the CPU and without network access. Only the best passages are sent to the model, so a question about a two-hour
+video costs a small prompt instead of a summary of the whole transcript. The index is built once per video and
+transcript track and kept in an LRU cache, so follow-up questions only pay for the lookup and the answer.
+Classes:
+    TranscriptIndex: BM25 index over the transcript passages of one video.
+Functions:
+    split_passages: Cuts a transcript into passages with start time, end time and chapter heading.
+    get_index: Returns the cached index of a video, building it on first use.
+    retrieve: Returns the passages that match a question best.
+    ask: Answers a question about a video and returns the cited passages.
+"""
+# Native Libraries
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+# User-defined Libraries
+try:
+    import src.gpt_functions as gpt
+    from src.deadline import Deadline
+    from src.preprocessing import chapter_starts, clean_transcript, estimate_tokens, format_timestamp, heading_at
+    from src.youtube_video import YouTubeVideo
+    from src.logger import Logger
+except ImportError:
+    import gpt_functions as gpt
+    from deadline import Deadline
+    from preprocessing import chapter_starts, clean_transcript, estimate_tokens, format_timestamp, heading_at
+    from youtube_video import YouTubeVideo
+    from logger import Logger
+
+
+# Target length of a passage, about 30-45 seconds of speech
+PASSAGE_TOKENS = 120
+# Passages sent to the model per question
+TOP_PASSAGES = 6
+# Videos whose index is kept in memory
+INDEX_CACHE_SIZE = 16
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TERM_REGEX = re.compile(r"\w+", re.UNICODE)
+# Words that occur in almost every passage and question, in English and German
+STOPWORDS = frozenset("""
+    a an the and or of to in on at is are was were be been it its this that these those what which who whom how why when where
+    do does did can could would should will with for from by as about you your we our they them he she i me my not no so if
+    der die das und oder ist sind war ein eine einen dem den des zu im in am an auf mit für von wie was wer warum wann wo
+    nicht kein ich du er sie es wir ihr
+""".split())
+
+logger = Logger.create_logger(name="VideoQA")
+_index_cache: "OrderedDict[tuple, TranscriptIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def _terms(text: str) -> list[str]:
+    return [term for term in TERM_REGEX.findall(text.lower()) if term not in STOPWORDS]
+
+
+def split_passages(transcript: list[dict], chapters: list[dict] | None = None, passage_tokens: int = PASSAGE_TOKENS) -> list[dict]:
+    """
+    Cuts the cleaned transcript into passages of about passage_tokens tokens.
+    Args:
+        transcript (list[dict]): Transcript entries with 'text', 'start' and 'duration' keys.
+        chapters (list[dict], optional): Chapters used to attach a heading to every passage.
+        passage_tokens (int): Target length of a passage. Defaults to PASSAGE_TOKENS.
+    Returns:
+        list[dict]: Passages with 'start' and 'end' (seconds), 'heading' (str | None) and 'text'.
+    """
+    starts = chapter_starts(chapters)
+    passages, texts, tokens, start = [], [], 0, None
+    for entry in clean_transcript(transcript or []):
+        if start is None:
+            start = float(entry["start"])
+        texts.append(entry["text"])
+        tokens += estimate_tokens(entry["text"])
+        if tokens >= passage_tokens:
+            end = float(entry["start"]) + float(entry.get("duration", 0))
+            passages.append({"start": start, "end": end, "heading": heading_at(starts, start), "text": " ".join(texts)})
+            texts, tokens, start = [], 0, None
+    if texts:
+        end = float(entry["start"]) + float(entry.get("duration", 0))
+        passages.append({"start": start, "end": end, "heading": heading_at(starts, start), "text": " ".join(texts)})
+    return passages
+
+
+class TranscriptIndex:
+    """
+    BM25 index over the transcript passages of one video.
+    Attributes:
+        passages (list[dict]): The indexed passages, see split_passages().
+    """
+    def __init__(self, passages: list[dict]):
+        self.passages = passages
+        self._term_counts = [Counter(_terms(passage["text"])) for passage in passages]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        self._idf = {
+            term: math.log(1 + (len(passages) - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def search(self, query: str, limit: int = TOP_PASSAGES) -> list[dict]:
+        """
+        Returns the passages that match the query best.
+        Args:
+            query (str): Free text, e.g. the question of the user.
+            limit (int): Maximum number of passages. Defaults to TOP_PASSAGES.
+        Returns:
+            list[dict]: Copies of the matching passages with a 'score' key, best matches first.
+                Passages that share no term with the query are not returned.
+        """
+        terms = [term for term in set(_terms(query)) if term in self._idf]
+        scores = []
+        for position, counts in enumerate(self._term_counts):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[position] / (self._average_length or 1))
+            score = sum(
+                self._idf[term] * counts[term] * (BM25_K1 + 1) / (counts[term] + norm)
+                for term in terms if term in counts
+            )
+            if score > 0:
+                scores.append((score, position))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [{**self.passages[position], "score": score} for score, position in scores[:limit]]
+
+
+def get_index(video: YouTubeVideo) -> TranscriptIndex:
+    """
+    Returns the index of the current transcript of a video, building it on first use.
+    Indexes are cached per video and transcript language for the last INDEX_CACHE_SIZE videos.
+    Args:
+        video (YouTubeVideo): The loaded video.
+    Returns:
+        TranscriptIndex: The index of the transcript.
+    """
+    key = (video.video_id, video.transcript_language, len(video.transcript or []))
+    with _index_lock:
+        if key in _index_cache:
+            _index_cache.move_to_end(key)
+            return _index_cache[key]
+    index = TranscriptIndex(split_passages(video.transcript, video.chapters))
+    logger.info(f"Indexed {len(index.passages)} transcript passages of {video.video_id}")
+    with _index_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def retrieve(video: YouTubeVideo, question: str, limit: int = TOP_PASSAGES) -> list[dict]:
+    """
+    Returns the passages that match a question best, in the order they occur in the video.
+    If no passage shares a term with the question (e.g. "What is the main point?"), passages spread evenly
+    over the video are returned instead, so the model still sees an outline of the whole video.
+    Args:
+        video (YouTubeVideo): The loaded video.
+        question (str): The question of the user.
+        limit (int): Maximum number of passages. Defaults to TOP_PASSAGES.
+    Returns:
+        list[dict]: The passages, see TranscriptIndex.search().
+    """
+    index = get_index(video)
+    hits = index.search(question, limit)
+    if not hits and index.passages:
+        count = len(index.passages)
+        positions = sorted({int((bucket + 0.5) * count / limit) for bucket in range(min(limit, count))})
+        hits = [{**index.passages[position], "score": 0.0} for position in positions]
+    return sorted(hits, key=lambda passage: passage["start"])
+
+
+def _format_passage(passage: dict) -> str:
+    heading = f" ({passage['heading']})" if passage["heading"] else ""
+    return f"[{format_timestamp(passage['start'])}]{heading} {passage['text']}"
+
+
+def ask(
+    video: YouTubeVideo, question: str, api_key: str, deadline: Deadline | None = None, limit: int = TOP_PASSAGES
+) -> dict:
+    """
+    Answers a question about a video from the transcript passages that match it.
+    Args:
+        video (YouTubeVideo): The loaded video.
+        question (str): The question of the user.
+        api_key (str): The OpenAI API key.
+        deadline (Deadline, optional): The deadline of the job.
+        limit (int): Maximum number of passages sent to the model. Defaults to TOP_PASSAGES.
+    Returns:
+        dict: 'answer' (str) with the cited timestamps and 'passages' (list[dict]), the passages the answer is
+            based on, each with a 'url' that opens the video at the passage.
+    Raises:
+        ValueError: If the question is empty or the video has no transcript.
+    """
+    if not question or not question.strip():
+        raise ValueError("The question is empty.")
+    if not video.transcript:
+        raise ValueError(f"Video {video.video_id} has no transcript.")
+    passages = retrieve(video, question, limit)
+    answer = gpt.answer_question(question, [_format_passage(passage) for passage in passages], video.title or "", api_key=api_key, deadline=deadline)
+    for passage in passages:
+        passage["url"] = f"https://www.youtube.com/watch?v={video.video_id}&t={int(passage['start'])}s"
+    return {"answer": answer, "passages": passages}
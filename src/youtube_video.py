@@ -4,55 +4,343 @@ Classes:
     YouTubeVideo: A class to represent a YouTube video and extract its metadata, description, chapters, and transcript.
 """
 # Native Libraries
+import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-# External Libraries
-import requests
-from bs4 import BeautifulSoup
-from youtube_transcript_api import YouTubeTranscriptApi
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Iterator
+from urllib.parse import urlparse, parse_qs
+# External Libraries (bs4, requests and youtube_transcript_api are imported on first use)
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 # User-defined Imports
+from src.deadline import Deadline, DeadlineExceeded
 from src.logger import Logger
+from src.profiling import profiled
+from src.preprocessing import format_timestamp
+
+
+# A chapter line in the description: optional bullet, timestamp at the start of the line, optional separator, title.
+# A time of day ("12:30 pm", "9:45 a.m.") is not a timestamp.
+CHAPTER_LINE_REGEX = re.compile(
+    r"^[ \t]*(?:[-•►▶*][ \t]*)?\(?(\d{1,2}:\d{2}(?::\d{2})?)\)?(?![ \t]*(?i:[ap]\.?m)\b)[ \t]*(?:[-–—:|][ \t]+)?(\S.*?)[ \t]*$",
+    re.MULTILINE,
+)
+# YouTube only shows chapters if there are at least three of them and the first one starts at 0:00
+MIN_CHAPTERS = 3
+INITIAL_DATA_MARKERS = ("ytInitialData", "ytInitialPlayerResponse")
+DEFAULT_LANGUAGES = ("en", "de")
+# Number of videos whose transcript tracks are kept in memory
+TRANSCRIPT_CACHE_SIZE = 64
+# Fields that are parsed from the watch page, loaded by get_data() while the transcript is fetched
+PAGE_FIELDS = ("title", "channel", "duration", "description", "chapters_available", "chapters")
+# Intermediate results of page parsing, released once the page fields are known
+PAGE_CACHE_FIELDS = ("soup", "initial_data", "structured_chapters")
+
+# Set on first use by _list_transcripts()
+YouTubeTranscriptApi = None
+
+
+def _timestamp_to_seconds(timestamp: str) -> int:
+    seconds = 0
+    for part in timestamp.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def _add_end_timestamp(item: dict) -> dict:
+    item["timestamp"] = timedelta(seconds=float(item['start']) + float(item['duration']))
+    return item
+
+
+@lru_cache(maxsize=TRANSCRIPT_CACHE_SIZE)
+def _list_transcripts(video_id: str) -> tuple:
+    """
+    Lists the available transcript tracks of a video once per process.
+    """
+    global YouTubeTranscriptApi
+    if YouTubeTranscriptApi is None:
+        from youtube_transcript_api import YouTubeTranscriptApi
+    return tuple(YouTubeTranscriptApi.list_transcripts(video_id))
+
+
+@lru_cache(maxsize=TRANSCRIPT_CACHE_SIZE * 2)
+def _fetch_transcript(video_id: str, language_code: str, is_generated: bool) -> tuple[dict, ...]:
+    """
+    Fetches a single transcript track once per process.
+    """
+    for track in _list_transcripts(video_id):
+        if track.language_code == language_code and track.is_generated == is_generated:
+            return tuple(track.fetch())
+    raise LookupError(f"No {language_code} transcript track for video {video_id}")
+
+
+def rank_transcripts(tracks, languages=DEFAULT_LANGUAGES) -> list:
+    """
+    Orders transcript tracks by preference: tracks in one of the requested languages first,
+    manually created before generated ones, then by the order of the requested languages.
+    Args:
+        tracks: Transcript tracks with 'language_code' and 'is_generated' attributes.
+        languages (tuple[str]): Preferred language codes, e.g. ("de", "en").
+    Returns:
+        list: The tracks sorted from best to worst.
+    """
+    def key(track):
+        language = track.language_code.split("-")[0].lower()
+        wanted = language in languages
+        return (not wanted, track.is_generated, languages.index(language) if wanted else 0)
+    return sorted(tracks, key=key)
+
+
+def parse_description_chapters(description: str) -> list[dict] | None:
+    """
+    Finds chapters in a video description in a single pass over the text.
+    Only timestamps at the start of a line count. The chapters have to start at 0:00 and be strictly increasing;
+    lines that would break the order (e.g. a stray time in a later paragraph) are skipped.
+    Args:
+        description (str): The description of the YouTube video.
+    Returns:
+        list[dict]: The chapters with 'timestamp' and 'content' keys.
+        None: If the description does not contain valid chapters.
+    """
+    if not description:
+        return None
+    chapters = []
+    last_seconds = -1
+    for match in CHAPTER_LINE_REGEX.finditer(description):
+        timestamp, title = match.groups()
+        seconds = _timestamp_to_seconds(timestamp)
+        if not chapters and seconds != 0:
+            continue
+        if seconds <= last_seconds:
+            continue
+        chapters.append({"timestamp": timestamp, "content": title.strip()})
+        last_seconds = seconds
+    return chapters if len(chapters) >= MIN_CHAPTERS else None
 
 
 class YouTubeVideo(Logger):
+    def __new__(cls, *args, **kwargs):
+        # Every video carries its own data, so several of them must be able to coexist
+        return object.__new__(cls)
+
     def __init__(self, url):
         self.url = url
         self.logger = self.create_logger(name=self.__class__.__name__) 
         self.logger.info(f"Creating YouTubeVideo object for URL: {url}")
+        # Generated summaries keyed by mode ("chapters", "video", "sentence"), reused across requests
+        self.summaries: dict = {}
+        self.languages: tuple = DEFAULT_LANGUAGES
+        self.transcript_language: str | None = None
+        self._deadline: Deadline | None = None
     
-    def get_data(self):
-        self.soup = self._get_metadata()
-        self.title = self._get_title()
-        self.channel = self._get_channel()
-        self.duration = self._get_duration()
-        self.description = self._get_description()
-        self.chapters_available: bool = self._check_for_timestamps()
-        self.transcript = self._get_transcript()
-        self.chapters = self._extract_chapters()
+    @property
+    def video_id(self) -> str:
+        """
+        Extracts the video ID from watch, short (youtu.be) and embed/shorts URLs.
+        Returns:
+            str: The YouTube video ID.
+        """
+        parsed = urlparse(self.url if "://" in self.url else f"https://{self.url}")
+        query_id = parse_qs(parsed.query).get("v")
+        if query_id:
+            return query_id[0]
+        path = parsed.path.rstrip("/")
+        if path:
+            return path.split("/")[-1]
+        return self.url.split('=')[-1]
+
+    @profiled
+    def get_data(self, languages: tuple = DEFAULT_LANGUAGES, deadline: Deadline | None = None, lazy: bool = False):
+        """
+        Loads the data of the video.
+        All fields are memoized properties that are fetched or parsed on first access. The page and the transcript
+        do not depend on each other, so get_data() loads them at the same time.
+        Args:
+            languages (tuple[str]): Preferred transcript languages. Defaults to ("en", "de").
+            deadline (Deadline, optional): The deadline of the job, bounds the page request and the wait for the transcript.
+            lazy (bool): Only configure the video and leave every field to its first access. Defaults to False.
+        Raises:
+            DeadlineExceeded: If the transcript has not been fetched before the deadline.
+        """
+        self.languages = tuple(languages)
+        self._deadline = deadline
+        if lazy:
+            return
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            transcript = executor.submit(getattr, self, "transcript")
+            self.release_page()
+            try:
+                transcript.result(timeout=deadline.remaining() if deadline else None)
+            except TimeoutError:
+                # youtube_transcript_api has no timeout of its own; the stuck fetch ends in the background
+                raise DeadlineExceeded("deadline expired while fetching the transcript") from None
+        finally:
+            executor.shutdown(wait=False)
         self.logger.info(f"Data successfully retrieved for Video")
 
+    @profiled
+    def release_page(self) -> None:
+        """
+        Parses all page fields and then drops the parsed page (soup and embedded page data).
+        The DOM of a watch page is many times larger than everything the summarizers need from it.
+        """
+        for field in PAGE_FIELDS:
+            getattr(self, field)
+        for field in PAGE_CACHE_FIELDS:
+            self.__dict__.pop(field, None)
+
+    def __getstate__(self) -> dict:
+        # Pickle only the compact snapshot: no parsed page, logger or deadline
+        return {key: value for key, value in self.__dict__.items() if key not in PAGE_CACHE_FIELDS + ("logger", "_deadline")}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.logger = self.create_logger(name=self.__class__.__name__)
+        self._deadline = None
+
+    @cached_property
+    def soup(self) -> "BeautifulSoup":
+        return self._get_metadata(self._deadline)
+
+    @cached_property
+    def initial_data(self) -> dict:
+        return self._get_initial_data()
+
+    @cached_property
+    def title(self) -> str | None:
+        return self._get_title()
+
+    @cached_property
+    def channel(self) -> str | None:
+        return self._get_channel()
+
+    @cached_property
+    def duration(self) -> timedelta | None:
+        return self._get_duration()
+
+    @cached_property
+    def description(self) -> str:
+        return self._get_description()
+
+    @cached_property
+    def transcript(self) -> list[dict] | None:
+        return self._get_transcript(self.languages)
+
+    @cached_property
+    def structured_chapters(self) -> list[dict] | None:
+        return self._get_structured_chapters()
+
+    @cached_property
+    def chapters_available(self) -> bool:
+        return bool(self.structured_chapters) or self._check_for_timestamps()
+
+    @cached_property
+    def chapters(self) -> list[dict] | None:
+        return self.structured_chapters or self._extract_chapters()
+
     
-    def _get_metadata(self) -> BeautifulSoup:
+    def _get_metadata(self, deadline: Deadline | None = None) -> "BeautifulSoup":
         """
         Fetches and parses the metadata from the given URL.
-        This method sends a GET request to the specified URL, retrieves the HTML content,
-        and parses it using BeautifulSoup to extract metadata.
+        This method fetches the HTML content through the shared, pooled HTTP session (revalidating a cached copy
+        if there is one) and parses it using BeautifulSoup to extract metadata.
         Args:
-            url (str): The URL from which to fetch the metadata.
+            deadline (Deadline, optional): The deadline of the job, bounds the request timeout.
         Returns:
             BeautifulSoup: A BeautifulSoup object containing the parsed HTML content.
         Raises:
             requests.exceptions.HTTPError: If the HTTP request returned an unsuccessful status code.
+            DeadlineExceeded: If the deadline has already expired.
         """
         self.logger.info(f"Getting metadata from {self.url}")
-        response = requests.get(self.url)
-        response.raise_for_status()
-        html = response.content
+        timeout = None
+        if deadline is not None:
+            deadline.check()
+            timeout = deadline.timeout()
+        from src import http_client
+        html = http_client.fetch(self.url, timeout=timeout)
+        return self.parse_metadata(html)
+
+
+    @profiled
+    def parse_metadata(self, html: bytes | str) -> "BeautifulSoup":
+        """
+        Parses a downloaded watch page. Used by _get_metadata() and by callers that fetch the page themselves.
+        """
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html, features="html.parser")
         self.logger.info(f"Successfully retrieved metadata from {self.url}")
         return soup
 
 
+    @profiled
+    def _get_initial_data(self) -> dict:
+        """
+        Extracts the JSON objects ytInitialData and ytInitialPlayerResponse embedded in the watch page.
+        Returns:
+            dict: The parsed objects keyed by their variable name (missing or broken objects are left out).
+        """
+        initial_data = {}
+        decoder = json.JSONDecoder()
+        for script in self.soup.find_all("script"):
+            text = script.string or ""
+            for marker in INITIAL_DATA_MARKERS:
+                if marker in initial_data:
+                    continue
+                match = re.search(rf"\b{marker}\s*=\s*{{", text)
+                if not match:
+                    continue
+                try:
+                    initial_data[marker], _ = decoder.raw_decode(text, match.end() - 1)
+                except ValueError as e:
+                    self.logger.error(f"Could not parse {marker}: {e}")
+        self.logger.info(f"Found embedded page data: {', '.join(initial_data) or 'none'}")
+        return initial_data
+
+
+    def _get_structured_chapters(self) -> list[dict] | None:
+        """
+        Reads the chapter markers of the player bar from ytInitialData.
+        These also exist for chapters that are not written in the description.
+        Returns:
+            list[dict]: The chapters with 'timestamp' and 'content' keys in the same format as _extract_chapters().
+            None: If the page data contains no chapters.
+        """
+        renderers = []
+        stack = [self.initial_data.get("ytInitialData")]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if "chapterRenderer" in node:
+                    renderers.append(node["chapterRenderer"])
+                    continue
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+
+        chapters = []
+        seen_starts = set()
+        for renderer in renderers:
+            try:
+                start = int(renderer["timeRangeStartMillis"]) // 1000
+                title = renderer["title"].get("simpleText") or "".join(run["text"] for run in renderer["title"]["runs"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if start in seen_starts:
+                continue
+            seen_starts.add(start)
+            chapters.append((start, {"timestamp": format_timestamp(start), "content": title.strip()}))
+        if not chapters:
+            self.logger.info(f"No chapter markers found in page data.")
+            return None
+        chapters.sort(key=lambda chapter: chapter[0])
+        self.logger.info(f"Found {len(chapters)} chapter markers in page data.")
+        return [chapter for _, chapter in chapters]
+
+
     def _get_title(self):
         """
         Retrieves the title of a YouTube video.
@@ -90,14 +378,17 @@ class YouTubeVideo(Logger):
         Args:
             soup (BeautifulSoup): A BeautifulSoup object containing the parsed HTML of a YouTube page.
         Returns:
-            str: The duration of the video if found, otherwise "Duration not found".
+            timedelta: The duration of the video if found.
+            None: If the page has no duration or it could not be parsed.
         """
         self.logger.info(f"Getting duration ...")
         duration_tag = self.soup.find("meta", itemprop="duration")
-        duration = duration_tag["content"] if duration_tag else "Duration not found"
+        if not duration_tag:
+            self.logger.warning("Duration not found")
+            return None
         # Convert the ISO 8601 duration to timedelta object
         try:
-            duration = re.search(r"PT(\d+H)?(\d+M)?(\d+S)?", duration).groups()
+            duration = re.search(r"PT(\d+H)?(\d+M)?(\d+S)?", duration_tag["content"]).groups()
             duration = timedelta(
                 hours=int(duration[0][:-1]) if duration[0] else 0,
                 minutes=int(duration[1][:-1]) if duration[1] else 0,
@@ -107,7 +398,7 @@ class YouTubeVideo(Logger):
 
         except Exception as e:
             self.logger.error(f"An error occurred while parsing the duration: {e}")
-            duration = "Duration not found"
+            duration = None
         
         return duration
     
@@ -120,6 +411,10 @@ class YouTubeVideo(Logger):
         Returns:
             str: The description of the YouTube video.
         """
+        video_details = self.initial_data.get("ytInitialPlayerResponse", {}).get("videoDetails", {})
+        if video_details.get("shortDescription") is not None:
+            return video_details["shortDescription"]
+
         try:
             # Attempt to extract the description using regex
             description_regex = re.compile(r'(?<=shortDescription":").*?(?=","isCrawlable)')
@@ -144,14 +439,34 @@ class YouTubeVideo(Logger):
         raise Exception("Description not found.")
 
 
+    def set_language(self, languages: tuple) -> bool:
+        """
+        Switches the transcript to the best track for the given languages.
+        Track list and fetched tracks are cached per video, so switching back and forth needs no new request.
+        Summaries of the previous transcript are discarded if the track changes.
+        Args:
+            languages (tuple[str]): Preferred language codes, e.g. ("de", "en").
+        Returns:
+            bool: True if a different transcript track is used now.
+        """
+        previous_language = self.transcript_language
+        self.languages = tuple(languages)
+        self.transcript = self._get_transcript(self.languages)
+        changed = self.transcript_language != previous_language
+        if changed:
+            self.summaries = {}
+        return changed
+
+
     def _check_for_timestamps(self) -> bool:
         """
-        Checks if the description contains "0:00" or "00:00".
+        Checks if the description contains valid chapters (line-anchored timestamps starting at 0:00, strictly increasing).
         Returns:
-            bool: True if "0:00" or "00:00" is found in the description, False otherwise.
+            bool: True if chapters are found in the description, False otherwise.
         """
         self.logger.info(f"Checking for timestamps in description ...")
-        if "0:00" in self.description or "00:00" in self.description:
+        self._description_chapters = parse_description_chapters(self.description)
+        if self._description_chapters:
             self.logger.info(f"Timestamps found in description.")
             return True
         else:
@@ -159,26 +474,20 @@ class YouTubeVideo(Logger):
             return False
         
         
+    @profiled
     def _convert_transcript_to_timedelta(self, data: list[dict]) -> list[dict]:
         """
-        Converts transcript data to include end time, minutes, seconds, and timestamp.
+        Converts transcript data to include the timestamp of its end.
+        Only the timestamp is added: every entry of a long transcript is kept for the whole session.
         Args:
             data (list of dict): A list of dictionaries where each dictionary represents a transcript item 
                 with 'start' and 'duration' keys.
         Returns:
-            list of dict: The modified list of dictionaries with additional keys:
-                - 'end_time': The end time of the transcript item.
-                - 'minutes': The minute part of the end time.
-                - 'seconds': The second part of the end time.
+            list of dict: The modified list of dictionaries with the additional key:
                 - 'timestamp': A timedelta object representing the end time.
         """
         for item in data:
-            item["end_time"] = item['start'] + item['duration']
-            end_time = float(item['start']) + float(item['duration'])
-            minutes, seconds = divmod(end_time, 60)
-            item["minutes"] = minutes
-            item["seconds"] = seconds
-            item["timestamp"] = timedelta(minutes=item["minutes"], seconds=item["seconds"])
+            _add_end_timestamp(item)
 
         return data
         
@@ -186,6 +495,7 @@ class YouTubeVideo(Logger):
     def _extract_chapters(self):
         """
         If available, extract the chapters from the description of a YouTube video.
+        Reuses the result of _check_for_timestamps() instead of parsing the description again.
         Args:
             description (str): The description of the YouTube video.
         Returns:
@@ -195,34 +505,47 @@ class YouTubeVideo(Logger):
             return None
         
         self.logger.info(f"Extracting chapters ...")
-        chapters = []
+        chapters = getattr(self, "_description_chapters", None)
+        if chapters is None:
+            chapters = parse_description_chapters(self.description)
+        return chapters
+    
 
-        timestamp_regex = re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\b")
+    def iter_transcript(self, languages: tuple | None = None) -> Iterator[dict]:
         """
-        Explanation:
-        1. b: This is a word boundary anchor. It asserts a position at the start or end of a word. 
-            This ensures that the timestamp is not part of a larger word.
-        2. \d{1,2}: This matches one or two digits. It represents the hours part of the timestamp, allowing for values from 0 to 99.
-        3. :: This matches the colon character : which separates hours from minutes.
-        4. \d{2}: This matches exactly two digits. It represents the minutes part of the timestamp, allowing for values from 00 to 59.
-        5. (?::\d{2})?: This is a non-capturing group (?: ... ) that matches the colon : followed by exactly two digits \d{2}. 
-            The ? at the end makes this group optional, meaning it can match zero or one time. 
-            This part represents the optional seconds part of the timestamp, allowing for values from 00 to 59.
-        6. b: Another word boundary anchor to ensure the timestamp is not part of a larger word.
+        Yields the timestamped entries of the best transcript track one at a time, without keeping them on the video.
+        Used by the streaming pipeline for very long videos, see streaming.py. The transcript property is not touched
+        and the track is fetched without the process-wide track cache: every entry is released once it is yielded.
+        Args:
+            languages (tuple[str], optional): Preferred language codes. Defaults to the languages of the video.
+        Yields:
+            dict: Copies of the transcript entries with the additional 'timestamp' key (timedelta of the end).
+        Raises:
+            LookupError: If no transcript is available for the video.
         """
-        timestamps = timestamp_regex.findall(self.description)
-        chapter_titles = re.split(timestamp_regex, self.description)[1:]
+        video_id = self.video_id
+        tracks = rank_transcripts(_list_transcripts(video_id), tuple(languages or self.languages))
+        if not tracks:
+            raise LookupError(f"No transcript available for video {video_id}")
+        track = tracks[0]
+        self.transcript_language = track.language_code
+        entries = track.fetch()
+        if isinstance(entries, list):
+            # Pop from the end of the reversed list, so yielded entries are not referenced any more
+            entries.reverse()
+            while entries:
+                yield _add_end_timestamp(entries.pop())
+        else:
+            for item in entries:
+                yield _add_end_timestamp(dict(item))
 
-        for timestamp, title in zip(timestamps, chapter_titles):
-            chapters.append({"timestamp": timestamp, "content": title.strip()})
-        return chapters
-    
 
-    def _get_transcript(self, languages=("en", "de")) -> list[dict]:
+    def _get_transcript(self, languages=DEFAULT_LANGUAGES) -> list[dict]:
         """
         Retrieves the transcript of a YouTube video and converts it to a timestamped format.
+        The available tracks are listed once and ranked with rank_transcripts(); the best track is fetched.
         Args:
-            url (str): The URL of the YouTube video.
+            languages (tuple[str]): Preferred language codes. Defaults to ("en", "de").
         Returns:
             list: A list of dictionaries containing the transcript with timestamps if successful.
             None: If an error occurs during the retrieval process.
@@ -230,18 +553,25 @@ class YouTubeVideo(Logger):
             Exception: If an error occurs while retrieving the transcript.
         """
         self.logger.info(f"Getting transcript ...")
-        video_id = self.url.split('=')[-1]
+        video_id = self.video_id
 
         try:
-            data = YouTubeTranscriptApi.get_transcript(video_id, languages=languages)
+            tracks = rank_transcripts(_list_transcripts(video_id), tuple(languages))
+            if not tracks:
+                self.logger.error(f"No transcript available for this video.")
+                return None
+            track = tracks[0]
+            data = _fetch_transcript(video_id, track.language_code, track.is_generated)
             if not data:
                 self.logger.error(f"No transcript available for this video.")
                 return None
-            timestamped_data = self._convert_transcript_to_timedelta(data)
-            self.logger.info(f"Successfully retrieved transcript")
+            self.transcript_language = track.language_code
+            # The cached track is shared, so convert copies of its entries
+            timestamped_data = self._convert_transcript_to_timedelta([dict(item) for item in data])
+            kind = "generated" if track.is_generated else "manual"
+            self.logger.info(f"Successfully retrieved {kind} transcript ({track.language_code})")
             return timestamped_data
         
         except Exception as e:
             self.logger.error(f"An error occurred while retrieving the transcript: {e}")
             return None
-
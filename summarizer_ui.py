@@ -1,23 +1,84 @@
 # Import necessary libraries
 import re
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 # User Defined Libraries
+import src.planner as planner
+import src.profiling as profiling
 import src.transcribe_summarize as ts
+import src.video_qa as video_qa
+from src.deadline import Deadline
+from src.preprocessing import format_timestamp
+from src.prefetch import Prefetcher, PREFETCH_ENABLED
+from src.summary_store import SummaryStore
+
+
+# Seconds a summary job may take before the finished part is shown
+JOB_TIMEOUT = 90
+
+
+@st.cache_resource
+def get_summary_store() -> SummaryStore:
+    # One store per process, shared by all sessions
+    return SummaryStore()
+
 
 st.title("YouTube Video Summarizer")
 
+# Full-text search over all stored transcripts and summaries
+search_query = st.sidebar.text_input("Search stored videos:")
+if search_query:
+    for hit in get_summary_store().search(search_query):
+        start = int(hit["start_seconds"] or 0)
+        st.sidebar.markdown(
+            f"**{hit['title']}** ([{start // 60}:{start % 60:02d}](https://www.youtube.com/watch?v={hit['video_id']}&t={start}s))  \n"
+            f"{hit['heading'] or ''} — {hit['snippet']}"
+        )
+
+# Speculatively summarize the loaded video in the background (costs API calls even if no button is clicked)
+prefetch_enabled = st.sidebar.checkbox("Prefetch summaries in the background", value=PREFETCH_ENABLED)
+if "prefetcher" not in st.session_state:
+    st.session_state.prefetcher = Prefetcher()
+
+
+# Short videos get the chapter, video and sentence summaries from one request on the first click
+combined_enabled = st.sidebar.checkbox("Generate chapter, video and sentence summaries together", value=ts.COMBINED_ENABLED)
+
+
+def wait_for_prefetch(mode: str) -> None:
+    # A click during a running prefetch picks up its result instead of sending the same requests again
+    st.session_state.prefetcher.wait(st.session_state.youtube_video, mode, timeout=JOB_TIMEOUT)
+
+
+def summarize_together() -> None:
+    # Fills the caches of all combined modes, the clicked mode then returns its result without a request
+    if combined_enabled:
+        ts.summary_combined(
+            st.session_state.youtube_video, api_key=st.secrets["API_KEY"], store=get_summary_store(), deadline=Deadline(JOB_TIMEOUT)
+        )
+
+
 # Input for YouTube URL
 youtube_url = st.text_input("Enter YouTube URL:")
 video = None
 
 # Button to generate summary
 if st.button("Clear"):
+    st.session_state.prefetcher.cancel()
     for key in st.session_state.keys():
         del st.session_state[key]
     st.rerun()
 
 # Dropdown to select the language of the video
-language = st.selectbox("Select the language of the video:", ["English", "Deutsch"], key="video_language")
+LANGUAGES = {"English": ("en", "de"), "Deutsch": ("de", "en")}
+language = st.selectbox("Select the language of the video:", list(LANGUAGES), key="video_language")
+
+# Switching the language of a loaded video uses the cached transcript tracks
+if 'youtube_video' in st.session_state and st.session_state.youtube_video:
+    if st.session_state.youtube_video.languages != LANGUAGES[language]:
+        # A running prefetch belongs to the previous transcript track
+        st.session_state.prefetcher.cancel()
+        st.session_state.youtube_video.set_language(LANGUAGES[language])
 
 if st.button("Load Video"):
     if youtube_url:
@@ -29,29 +90,33 @@ if st.button("Load Video"):
         if not youtube_regex.match(youtube_url):
             st.write("Please enter a valid YouTube URL.")
         else:
-            with st.spinner('Getting video ...'):
+            with st.spinner('Getting video ...'), profiling.profile_run("ui-load"):
+                st.session_state.prefetcher.cancel()
                 video = ts.YouTubeVideo(url=youtube_url)
-                video.get_data()
+                video.get_data(languages=LANGUAGES[language], lazy=True)
                 st.session_state.youtube_video = video
-                has_description = bool(st.session_state.youtube_video.description)
-                has_transcript = bool(st.session_state.youtube_video.transcript)
+                # Fetch the transcript while the page is loaded, so title and duration show up first
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    transcript_loading = executor.submit(getattr, video, "transcript")
+                    st.markdown("### Video Attributes:")
+                    st.markdown(f"- **Channel:** {video.channel}")
+                    st.markdown(f"- **Title:** {video.title}")
+                    st.markdown(f"- **Duration:** {video.duration or 'unknown'}")
+                    st.markdown(f"- **Description available:** {bool(video.description)}")
+                    st.markdown(f"- **Timestamped Chapters available:** {bool(video.chapters_available)}")
+                    # Only the parsed fields stay in the session, not the page
+                    video.release_page()
+                    has_transcript = bool(transcript_loading.result())
+                st.markdown(f"- **Transcript available:** {has_transcript}")
+                if has_transcript and prefetch_enabled:
+                    st.session_state.prefetcher.start(video, api_key=st.secrets["API_KEY"], store=get_summary_store())
                 if not has_transcript:
                     st.error(
                         "Transcript not available for this video. Please try again. \
                         Opening the Video Transcript in your browser and then trying again may resolve the issue."
                         )
-                if st.session_state.youtube_video:
-                    st.success("Video retrieved successfully!")
-                    st.markdown("### Video Attributes:")
-                    st.markdown(f"- **Channel:** {st.session_state.youtube_video.channel}")
-                    st.markdown(f"- **Title:** {st.session_state.youtube_video.title}")
-                    st.markdown(f"- **Duration:** {st.session_state.youtube_video.duration}")
-                    st.markdown(f"- **Description available:** {bool(st.session_state.youtube_video.description)}")
-                    st.markdown(f"- **Transcript available:** {bool(st.session_state.youtube_video.transcript)}")
-                    st.markdown(f"- **Timestamped Chapters available:** {bool(st.session_state.youtube_video.chapters_available)}")
-
                 else:
-                    st.error("Failed to retrieve video. Please try again.")
+                    st.success("Video retrieved successfully!")
     else:
         st.write("Please enter a valid YouTube URL.")
 
@@ -67,37 +132,61 @@ if 'youtube_video' in st.session_state and st.session_state.youtube_video:
 
     with col1:
         if st.button("Summarize by Chapters"):
-            with st.spinner('Summarizing video by chapters...'):
-                summary_by_chapters_result = ts.summary_by_chapters(
-                    video=st.session_state.youtube_video, 
-                    api_key=st.secrets["API_KEY"]
+            with st.spinner('Summarizing video by chapters...'), profiling.profile_run("ui-chapters"):
+                wait_for_prefetch("chapters")
+                summarize_together()
+                summary_by_chapters_result = planner.summarize_planned(
+                    st.session_state.youtube_video,
+                    "chapters",
+                    api_key=st.secrets["API_KEY"],
+                    store=get_summary_store(),
+                    deadline=Deadline(JOB_TIMEOUT),
+                    combined=combined_enabled,
+                    on_plan=lambda plan: st.caption(planner.format_plan(plan)),
                 )
 
     with col2:
         if st.button("Summarize Entire Video"):
-            with st.spinner('Summarizing entire video...'):
-                summary_entire_video_result = ts.summary_entire_video(
-                    video=st.session_state.youtube_video, 
-                    api_key=st.secrets["API_KEY"]
+            with st.spinner('Summarizing entire video...'), profiling.profile_run("ui-video"):
+                wait_for_prefetch("video")
+                summarize_together()
+                summary_entire_video_result = planner.summarize_planned(
+                    st.session_state.youtube_video,
+                    "video",
+                    api_key=st.secrets["API_KEY"],
+                    store=get_summary_store(),
+                    deadline=Deadline(JOB_TIMEOUT),
+                    combined=combined_enabled,
+                    on_plan=lambda plan: st.caption(planner.format_plan(plan)),
                 )
 
     with col3:
         if st.button("One Sentence Summary"):
-            with st.spinner('Summarizing video in one sentence...'):
+            with st.spinner('Summarizing video in one sentence...'), profiling.profile_run("ui-sentence"):
+                wait_for_prefetch("sentence")
+                summarize_together()
                 summary_one_sentence_result = ts.summary_in_one_sentence(
                     video=st.session_state.youtube_video, 
                     api_key=st.secrets["API_KEY"], 
+                    store=get_summary_store(),
+                    deadline=Deadline(JOB_TIMEOUT),
                 )
 
     with col4:
         if st.button("Shorts by Chapters"):
-            with st.spinner('Generating ideas for Shorts by chapters...'):
+            with st.spinner('Generating ideas for Shorts by chapters...'), profiling.profile_run("ui-shorts"):
+                wait_for_prefetch("shorts")
                 shorts_by_chapters_result = ts.create_shorts_by_chapters(
                     video=st.session_state.youtube_video, 
-                    api_key=st.secrets["API_KEY"]
+                    api_key=st.secrets["API_KEY"],
+                    store=get_summary_store(),
+                    deadline=Deadline(JOB_TIMEOUT),
                 )
 
     if summary_by_chapters_result:
+        missing = ts.missing_chapters(st.session_state.youtube_video)
+        if missing:
+            st.warning(f"{len(missing)} chapters are missing, see the notes below. Click 'Summarize by Chapters' again to retry them.")
         st.write("Summary by Chapters:")
         st.write(f"### {st.session_state.youtube_video.title}")
         st.write(f"#### by {st.session_state.youtube_video.channel}")
@@ -118,3 +207,19 @@ if 'youtube_video' in st.session_state and st.session_state.youtube_video:
     if summary_one_sentence_result:
         st.write("One Sentence Summary:")
         st.write(summary_one_sentence_result)
+
+    # Questions are answered from the best matching transcript passages, the index is built once per video
+    question = st.text_input("Ask the video:")
+    if st.button("Ask") and question.strip():
+        with st.spinner('Searching the transcript...'), profiling.profile_run("ui-ask"):
+            qa_result = video_qa.ask(
+                st.session_state.youtube_video,
+                question,
+                api_key=st.secrets["API_KEY"],
+                deadline=Deadline(JOB_TIMEOUT),
+            )
+        st.write(qa_result["answer"])
+        st.markdown("  \n".join(
+            f"[{format_timestamp(passage['start'])}]({passage['url']}) {passage['heading'] or ''}"
+            for passage in qa_result["passages"]
+        ))
@@ -9,10 +9,16 @@ from yaml.loader import SafeLoader
 import src.transcribe_summarize as ts
 
 
-with open('config.yaml') as file:
-    config = yaml.load(file, Loader=SafeLoader)
-# Pre-hashing all plain text passwords once
-stauth.Hasher.hash_passwords(config['credentials'])
+@st.cache_resource
+def load_auth_config() -> dict:
+    # Hashing is slow on purpose, so the passwords are hashed once per process instead of on every rerun
+    with open('config.yaml') as file:
+        config = yaml.load(file, Loader=SafeLoader)
+    stauth.Hasher.hash_passwords(config['credentials'])
+    return config
+
+
+config = load_auth_config()
 
 
 authenticator = stauth.Authenticate(
@@ -68,7 +74,7 @@ elif st.session_state['authentication_status']:
                         st.markdown("### Video Attributes:")
                         st.markdown(f"- **Channel:** {st.session_state.youtube_video.channel}")
                         st.markdown(f"- **Title:** {st.session_state.youtube_video.title}")
-                        st.markdown(f"- **Duration:** {st.session_state.youtube_video.duration}")
+                        st.markdown(f"- **Duration:** {st.session_state.youtube_video.duration or 'unknown'}")
                         st.markdown(f"- **Description available:** {bool(st.session_state.youtube_video.description)}")
                         st.markdown(f"- **Transcript available:** {bool(st.session_state.youtube_video.transcript)}")
                         st.markdown(f"- **Timestamped Chapters available:** {bool(st.session_state.youtube_video.chapters)}")
@@ -0,0 +1,128 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# Native Libraries
+import json
+import tempfile
+import threading
+from datetime import timedelta
+# External Libraries
+import requests
+from bs4 import BeautifulSoup
+# User-defined Imports
+import src.transcribe_summarize as ts
+from src.api_server import create_server
+from src.summary_store import SummaryStore
+from src.youtube_video import YouTubeVideo
+
+
+URL = "https://www.youtube.com/watch?v=api"
+
+
+def fake_get_data(video, languages=None, deadline=None, lazy=False):
+    video.title = "Whales explained"
+    video.channel = "Ocean Channel"
+    video.duration = timedelta(minutes=3)
+    video.description = "0:00 Intro\n1:00 Main\n2:00 Outro"
+    video.transcript_language = "en"
+    video.chapters = [
+        {"timestamp": "0:00", "content": "Intro"},
+        {"timestamp": "1:00", "content": "Main"},
+        {"timestamp": "2:00", "content": "Outro"},
+    ]
+    video.transcript = [
+        {"text": f"line {second}", "start": second, "duration": 2.0, "timestamp": timedelta(seconds=second + 2)}
+        for second in range(0, 180, 5)
+    ]
+
+
+def read_events(response) -> list[tuple[str, dict]]:
+    events, event = [], None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+class Test_ApiServer(unittest.TestCase):
+    def setUp(self):
+        self.store = SummaryStore(os.path.join(tempfile.mkdtemp(), "store.db"))
+        self.server = create_server(port=0, store=self.store, api_key="key")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        patcher = mock.patch.object(YouTubeVideo, "get_data", autospec=True, side_effect=fake_get_data)
+        self.get_data = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+
+    def test_health(self):
+        self.assertEqual(requests.get(f"{self.base_url}/health").json(), {"status": "ok"})
+
+    def test_load_video(self):
+        response = requests.post(f"{self.base_url}/videos", json={"url": URL})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["video_id"], "api")
+        self.assertEqual(body["language"], "en")
+        self.assertEqual(body["duration_seconds"], 180)
+        self.assertEqual(body["stored_modes"], [])
+        self.assertEqual(self.store.get_video("api")["title"], "Whales explained")
+
+    def test_load_video_without_duration(self):
+        def page_without_duration(video, languages=None, deadline=None, lazy=False):
+            fake_get_data(video, languages, deadline, lazy)
+            # The duration is read from a page that has no duration meta tag
+            del video.duration
+            video.soup = BeautifulSoup('<html><head><meta property="og:title" content="Live"></head></html>', features="html.parser")
+
+        self.get_data.side_effect = page_without_duration
+        response = requests.post(f"{self.base_url}/videos", json={"url": URL})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["duration_seconds"])
+        self.assertIsNone(self.store.get_video("api")["duration_seconds"])
+
+    @mock.patch.object(ts.gpt, "get_chapter_summary", side_effect=lambda section, api_key, **kwargs: f"## {section['heading']}")
+    def test_streams_chapters_and_returns_stored_result(self, summary):
+        response = requests.post(f"{self.base_url}/summaries/chapters", json={"url": URL, "stream": True}, stream=True)
+        self.assertEqual(response.headers["Content-Type"], "text/event-stream")
+        events = read_events(response)
+        chapters = sorted((data["index"], data["summary"]) for event, data in events if event == "chapter")
+        self.assertEqual(chapters, [(0, "## Intro"), (1, "## Main"), (2, "## Outro")])
+        self.assertEqual([event for event, _ in events[-2:]], ["result", "done"])
+        self.assertFalse(events[-2][1]["cached"])
+
+        # A second request with the transcript language is answered from the store without loading the video
+        self.get_data.reset_mock()
+        summary.reset_mock()
+        body = requests.post(f"{self.base_url}/summaries/chapters", json={"url": URL, "language": "en"}).json()
+        self.assertTrue(body["cached"])
+        self.assertEqual(body["result"], ["## Intro", "## Main", "## Outro"])
+        self.get_data.assert_not_called()
+        summary.assert_not_called()
+
+    @mock.patch.object(ts.gpt, "get_whole_transcript_summary", return_value="The whole video")
+    def test_summary_without_stream(self, whole):
+        response = requests.post(f"{self.base_url}/summaries/video", json={"url": URL})
+        self.assertEqual(response.json()["result"], "The whole video")
+        self.assertEqual(requests.post(f"{self.base_url}/videos", json={"url": URL}).json()["stored_modes"], ["video"])
+
+    @mock.patch.object(ts.gpt, "get_one_sentence_summary", side_effect=RuntimeError("model unavailable"))
+    def test_errors(self, sentence):
+        self.assertEqual(requests.post(f"{self.base_url}/summaries/poem", json={"url": URL}).status_code, 404)
+        self.assertEqual(requests.post(f"{self.base_url}/summaries/video", json={}).status_code, 400)
+        self.assertEqual(requests.post(f"{self.base_url}/summaries/sentence", json={"url": URL}).status_code, 500)
+        events = read_events(requests.post(f"{self.base_url}/summaries/sentence", json={"url": URL, "stream": True}, stream=True))
+        self.assertEqual(events, [("error", {"error": "model unavailable"})])
+
+
+if __name__ == '__main__':
+    unittest.main()
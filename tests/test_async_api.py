@@ -0,0 +1,164 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# Native Libraries
+import asyncio
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+# External Libraries
+import httpx
+# User-defined Imports
+import src.http_client as http_client
+import src.model_router as model_router
+from src.async_api import AsyncSummarizer
+from src.deadline import Deadline
+from src.youtube_video import YouTubeVideo
+
+
+PAGE_HTML = """<html><head>
+    <meta property="og:title" content="Whales explained">
+    <link itemprop="name" content="Ocean Channel">
+    <meta itemprop="duration" content="PT12M5S">
+    <script>var ytInitialPlayerResponse = {"videoDetails": {"shortDescription": "All about whales"}};</script>
+    </head></html>"""
+
+
+def transcript(languages=None):
+    return [{"text": "Whales are large.", "start": 0.0, "duration": 2.0, "timestamp": timedelta(seconds=2)}]
+
+
+class FakeStream:
+    def __init__(self, text: str):
+        self.chunks = [text[:5], text[5:]]
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        content = self.chunks.pop(0)
+        finish_reason = None if self.chunks else "stop"
+        await asyncio.sleep(0)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeOpenAI:
+    """
+    Answers every request after a fixed latency and keeps track of the requests in flight.
+    """
+    def __init__(self, latency: float = 0.0, slow_headings: tuple = ()):
+        self.latency = latency
+        self.slow_headings = slow_headings
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options):
+        return self
+
+    async def create(self, timeout=None, **kwargs):
+        self.requests.append(kwargs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            content = kwargs["messages"][-1]["content"]
+            await asyncio.sleep(10 if any(heading in content for heading in self.slow_headings) else self.latency)
+        finally:
+            self.in_flight -= 1
+        text = f"answer for {kwargs['model']}"
+        if kwargs.get("stream"):
+            return FakeStream(text)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text), finish_reason="stop")])
+
+
+def page_transport() -> httpx.MockTransport:
+    return httpx.MockTransport(lambda request: httpx.Response(200, text=PAGE_HTML))
+
+
+class Test_AsyncSummarizer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        http_client.clear_cache()
+        patcher = mock.patch.object(YouTubeVideo, "_get_transcript", side_effect=transcript)
+        self.get_transcript = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_load_video(self):
+        async with httpx.AsyncClient(transport=page_transport()) as http:
+            async with AsyncSummarizer("key", http=http, openai_client=FakeOpenAI()) as summarizer:
+                video = await summarizer.load_video("https://www.youtube.com/watch?v=async")
+        self.assertEqual(video.title, "Whales explained")
+        self.assertEqual(video.description, "All about whales")
+        self.assertEqual(video.transcript[0]["text"], "Whales are large.")
+        # The parsed page is released like in get_data()
+        self.assertNotIn("soup", video.__dict__)
+
+    async def test_summaries_use_cache(self):
+        openai = FakeOpenAI()
+        async with httpx.AsyncClient(transport=page_transport()) as http:
+            async with AsyncSummarizer("key", http=http, openai_client=openai) as summarizer:
+                video = await summarizer.load_video("https://www.youtube.com/watch?v=async")
+                video.chapters = [{"timestamp": "0:00", "content": "Intro"}, {"timestamp": "0:01", "content": "Outro"}]
+                chapters = await summarizer.summary_by_chapters(video)
+                summary = await summarizer.summary_entire_video(video)
+                self.assertEqual(await summarizer.summary_by_chapters(video), chapters)
+        self.assertEqual(len(chapters), 2)
+        self.assertTrue(all(chapter.startswith("answer for") for chapter in chapters))
+        self.assertEqual(summary, video.summaries["video"])
+        # Two chapters, one unified summary from them and no request for the cached chapters
+        self.assertEqual(len(openai.requests), 3)
+        self.assertTrue(openai.requests[0]["stream"])
+
+    async def test_partial_chapters_on_deadline(self):
+        openai = FakeOpenAI(slow_headings=("Stuck",))
+        async with AsyncSummarizer("key", http=mock.Mock(), openai_client=openai) as summarizer:
+            video = YouTubeVideo("https://www.youtube.com/watch?v=partial")
+            video.transcript = YouTubeVideo._convert_transcript_to_timedelta(
+                video, [{"text": f"caption {index}", "start": index * 60.0, "duration": 5.0} for index in range(2)]
+            )
+            video.chapters = [{"timestamp": "0:00", "content": "Intro"}, {"timestamp": "1:00", "content": "Stuck"}]
+            started = time.monotonic()
+            result = await summarizer.summary_by_chapters(video, deadline=Deadline(0.3))
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertIn("not summarized in time", result[1])
+        self.assertIsNone(video.summaries["chapters"][1])
+
+    async def test_many_videos_on_one_loop(self):
+        # 200 videos with 0.05s per request finish in about the latency of a single video
+        openai = FakeOpenAI(latency=0.05)
+        urls = [f"https://www.youtube.com/watch?v=video{index}" for index in range(200)]
+        async with httpx.AsyncClient(transport=page_transport()) as http:
+            async with AsyncSummarizer("key", http=http, openai_client=openai, max_concurrent_requests=100) as summarizer:
+                started = time.monotonic()
+                results = await summarizer.summarize_many(urls, mode="sentence")
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(len(results), 200)
+        self.assertTrue(all(isinstance(result, str) for result in results))
+        self.assertEqual(openai.max_in_flight, 100)
+
+    async def test_cascade_is_shared_with_sync_calls(self):
+        model_router.reset_stats()
+        async with AsyncSummarizer("key", http=mock.Mock(), openai_client=FakeOpenAI()) as summarizer:
+            with mock.patch.object(summarizer, "_complete_once", side_effect=[("cut off", "length"), ("complete answer", "stop")]) as complete:
+                result = await summarizer.complete_text("video", messages=[{"role": "user", "content": "transcript " * 100}])
+        self.assertEqual(result, "complete answer")
+        self.assertEqual([call.kwargs["model"] for call in complete.call_args_list], ["gpt-4o-mini", "gpt-4o"])
+        self.assertEqual(model_router.routing_stats()["video:gpt-4o-mini"]["escalations"], 1)
+
+    async def test_unknown_mode(self):
+        async with AsyncSummarizer("key", http=mock.Mock(), openai_client=FakeOpenAI()) as summarizer:
+            with self.assertRaises(ValueError):
+                await summarizer.summarize("https://www.youtube.com/watch?v=async", mode="poem")
+
+
+if __name__ == '__main__':
+    unittest.main()
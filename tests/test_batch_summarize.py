@@ -0,0 +1,131 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+import tempfile
+# Native Libraries
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+# User-defined Imports
+import src.batch_summarize as batch
+from src.youtube_video import YouTubeVideo
+
+
+class LocalBatchStub:
+    """
+    Imitates the files and batches endpoints of the OpenAI client and answers every request in the batch file locally.
+    """
+    def __init__(self, fail_custom_ids=(), drop_custom_ids=()):
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+        self.fail_custom_ids = set(fail_custom_ids)
+        # Requests without an output line, like those of an expired batch
+        self.drop_custom_ids = set(drop_custom_ids)
+        self._files = {}
+        self._batches = {}
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self._files)}"
+        self._files[file_id] = file.read().decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        output = []
+        for line in self._files[input_file_id].splitlines():
+            request = json.loads(line)
+            if request["custom_id"] in self.drop_custom_ids:
+                continue
+            if request["custom_id"] in self.fail_custom_ids:
+                output.append({"custom_id": request["custom_id"], "response": {"status_code": 500, "body": {}}, "error": None})
+                continue
+            answer = f"summary of {request['body']['messages'][1]['content']}"
+            output.append({
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": answer}}]}},
+                "error": None,
+            })
+        output_file_id = f"file-{len(self._files)}"
+        self._files[output_file_id] = "\n".join(json.dumps(line) for line in output)
+        batch_id = f"batch-{len(self._batches)}"
+        self._batches[batch_id] = SimpleNamespace(id=batch_id, status="completed", output_file_id=output_file_id, error_file_id=None)
+        return self._batches[batch_id]
+
+    def _retrieve_batch(self, batch_id):
+        return self._batches[batch_id]
+
+
+def make_video(video_id, chapters):
+    video = YouTubeVideo(f"https://www.youtube.com/watch?v={video_id}")
+    video.title = f"Title {video_id}"
+    video.channel = "Channel"
+    video.chapters = chapters
+    video.transcript = [
+        {"text": f"{video_id} line {second}", "start": second, "timestamp": timedelta(seconds=second + 1)}
+        for second in range(0, 180, 10)
+    ]
+    return video
+
+
+class Test_BatchSummarize(unittest.TestCase):
+    def setUp(self):
+        self.videos = [
+            make_video("aaa", [{"timestamp": "0:00", "content": "Intro"}, {"timestamp": "1:30", "content": "Main"}]),
+            make_video("bbb", None),
+        ]
+        self.path = os.path.join(tempfile.mkdtemp(), "batch.jsonl")
+
+    def test_custom_ids(self):
+        requests = batch.build_batch_requests(self.videos)
+        custom_ids = [request["custom_id"] for request in requests]
+        self.assertEqual(custom_ids, ["aaa::chapter::0", "aaa::chapter::1", "aaa::video", "bbb::chapter::0", "bbb::video"])
+
+    def test_results_are_matched_to_videos(self):
+        client = LocalBatchStub()
+        batch.write_batch_file(batch.build_batch_requests(self.videos), self.path)
+        batch_id = batch.submit_batch(self.path, client)
+        finished = batch.wait_for_batch(batch_id, client, poll_interval=0)
+        results = batch.collect_results(finished, client, self.videos)
+
+        self.assertEqual(len(results["aaa"]["chapters"]), 2)
+        self.assertIn("Intro", results["aaa"]["chapters"][0])
+        self.assertIn("Main", results["aaa"]["chapters"][1])
+        self.assertIsNotNone(results["bbb"]["video"])
+        self.assertEqual(len(results["bbb"]["chapters"]), 1)
+        self.assertIn("bbb line 0", results["bbb"]["chapters"][0])
+        self.assertEqual(self.videos[0].summaries["chapters"], results["aaa"]["chapters"])
+
+    def test_failed_requests_are_reported(self):
+        client = LocalBatchStub(fail_custom_ids={"aaa::chapter::1"})
+        batch.write_batch_file(batch.build_batch_requests(self.videos), self.path)
+        finished = batch.wait_for_batch(batch.submit_batch(self.path, client), client, poll_interval=0)
+        results = batch.collect_results(finished, client, self.videos)
+
+        self.assertEqual(results["aaa"]["errors"][0]["custom_id"], "aaa::chapter::1")
+        self.assertNotIn("chapters", self.videos[0].summaries)
+
+    def test_missing_output_lines_keep_their_place(self):
+        self.videos[0].chapters.append({"timestamp": "2:30", "content": "Outro"})
+        client = LocalBatchStub(drop_custom_ids={"aaa::chapter::1"})
+        batch.write_batch_file(batch.build_batch_requests(self.videos), self.path)
+        finished = batch.wait_for_batch(batch.submit_batch(self.path, client), client, poll_interval=0)
+        results = batch.collect_results(finished, client, self.videos)
+
+        chapters = results["aaa"]["chapters"]
+        self.assertEqual(len(chapters), 3)
+        self.assertIn("Intro", chapters[0])
+        self.assertIsNone(chapters[1])
+        self.assertIn("Outro", chapters[2])
+        self.assertEqual(results["aaa"]["errors"], [{"custom_id": "aaa::chapter::1", "error": "missing from batch output"}])
+        self.assertNotIn("chapters", self.videos[0].summaries)
+        self.assertIsNotNone(results["aaa"]["video"])
+        self.assertEqual(results["bbb"]["errors"], [])
+        self.assertIn("chapters", self.videos[1].summaries)
+
+
+if __name__ == '__main__':
+    unittest.main()
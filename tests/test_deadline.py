@@ -0,0 +1,85 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# Native Libraries
+import time
+# User-defined Imports
+import src.gpt_functions as gpt
+from src.deadline import Deadline, DeadlineExceeded
+
+
+class Test_Deadline(unittest.TestCase):
+    def test_without_limit(self):
+        deadline = Deadline()
+        self.assertIsNone(deadline.remaining())
+        self.assertEqual(deadline.timeout(30), 30)
+        self.assertFalse(deadline.expired)
+
+    def test_expires(self):
+        deadline = Deadline(0.05)
+        self.assertLessEqual(deadline.timeout(30), 0.05)
+        time.sleep(0.06)
+        self.assertTrue(deadline.expired)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.check()
+
+    def test_cancel(self):
+        deadline = Deadline(60)
+        deadline.cancel()
+        self.assertTrue(deadline.expired)
+        self.assertTrue(deadline.cancelled)
+        self.assertIsInstance(DeadlineExceeded(), TimeoutError)
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.choices = [mock.Mock(delta=mock.Mock(content=content))]
+
+
+class FakeStream:
+    def __init__(self, contents, deadline):
+        self.contents, self.deadline, self.closed = contents, deadline, False
+
+    def __iter__(self):
+        for content in self.contents:
+            yield FakeChunk(content)
+            self.deadline.cancel()
+
+    def close(self):
+        self.closed = True
+
+
+class Test_CompletionDeadline(unittest.TestCase):
+    @mock.patch.object(gpt, "get_client")
+    def test_timeout_is_bounded_by_deadline(self, client):
+        gpt._create_completion("key", Deadline(5), model="m", messages=[])
+        timeout = client.return_value.chat.completions.create.call_args.kwargs["timeout"]
+        self.assertLessEqual(timeout, 5)
+        self.assertEqual(client.call_args.kwargs["max_retries"], 0)
+
+    @mock.patch.object(gpt, "get_client")
+    def test_default_timeout(self, client):
+        gpt._create_completion("key", model="m", messages=[])
+        self.assertEqual(client.return_value.chat.completions.create.call_args.kwargs["timeout"], gpt.REQUEST_TIMEOUT)
+
+    @mock.patch.object(gpt, "get_client")
+    def test_expired_deadline_sends_no_request(self, client):
+        deadline = Deadline(60)
+        deadline.cancel()
+        with self.assertRaises(DeadlineExceeded):
+            gpt._create_completion("key", deadline, model="m", messages=[])
+        client.assert_not_called()
+
+    def test_stream_is_closed_when_deadline_expires(self):
+        deadline = Deadline(60)
+        stream = FakeStream(["a", "b", "c"], deadline)
+        with self.assertRaises(DeadlineExceeded):
+            gpt._read_stream(stream, deadline)
+        self.assertTrue(stream.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# Native Libraries
+import itertools
+import threading
+import time
+# User-defined Imports
+import src.gpt_functions as gpt
+from src.deadline import Deadline, DeadlineExceeded
+from src.hedging import Hedger
+
+
+class Test_Hedger(unittest.TestCase):
+    def warm_up(self, hedger: Hedger, count: int = 20):
+        for _ in range(count):
+            hedger.run(lambda attempt_deadline: "fast")
+
+    def test_no_hedging_before_enough_samples(self):
+        hedger = Hedger(min_samples=5, min_delay=0.01)
+        self.assertIsNone(hedger.hedge_delay())
+        self.assertEqual(hedger.run(lambda attempt_deadline: "answer"), "answer")
+        self.assertEqual(hedger.stats()["hedges"], 0)
+
+    def test_slow_request_is_hedged_and_cancelled(self):
+        hedger = Hedger(min_samples=20, min_delay=0.05, max_hedge_rate=0.5)
+        self.warm_up(hedger)
+        calls = itertools.count()
+        cancelled = threading.Event()
+
+        def call(attempt_deadline):
+            if next(calls) == 0:
+                # The first attempt hangs until it is cancelled, like a stuck stream
+                while not attempt_deadline.expired:
+                    time.sleep(0.01)
+                cancelled.set()
+                raise DeadlineExceeded("cancelled")
+            return "hedged"
+
+        started = time.monotonic()
+        self.assertEqual(hedger.run(call), "hedged")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(cancelled.wait(1))
+        stats = hedger.stats()
+        self.assertEqual(stats["hedges"], 1)
+        self.assertEqual(stats["hedge_wins"], 1)
+        self.assertGreaterEqual(stats["p99_without_hedging"], stats["p50"])
+
+    def test_hedge_rate_is_capped(self):
+        hedger = Hedger(min_samples=20, min_delay=0.01, max_hedge_rate=0.05)
+        self.warm_up(hedger)
+        for _ in range(10):
+            hedger.run(lambda attempt_deadline: time.sleep(0.05) or "slow")
+        stats = hedger.stats()
+        self.assertLessEqual(stats["hedges"], 0.05 * stats["requests"] + 1)
+        self.assertLessEqual(stats["hedge_rate"], 0.05)
+
+    def test_respects_job_deadline(self):
+        hedger = Hedger()
+        with self.assertRaises(DeadlineExceeded):
+            hedger.run(lambda attempt_deadline: time.sleep(0.5), deadline=Deadline(0.05))
+
+
+class FakeStream:
+    """
+    A streamed completion that yields its chunks with a delay between them until it is closed.
+    """
+    def __init__(self, text: str, delay: float = 0.0):
+        self.text, self.delay = text, delay
+        self.sent = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for index, word in enumerate(self.text.split(" ")):
+            if self.closed.wait(self.delay if index else 0):
+                return
+            self.sent += 1
+            last = index == len(self.text.split(" ")) - 1
+            yield mock.Mock(choices=[mock.Mock(delta=mock.Mock(content=word + ("" if last else " ")), finish_reason="stop" if last else None)])
+
+    def close(self):
+        self.closed.set()
+
+
+class Test_ConfigureHedging(unittest.TestCase):
+    def tearDown(self):
+        gpt.configure_hedging(enabled=False)
+
+    @mock.patch.object(gpt, "get_client")
+    def test_requests_go_through_hedger(self, client):
+        client.return_value.chat.completions.create.side_effect = lambda **kwargs: FakeStream("summary")
+        self.assertIsNone(gpt.hedging_stats())
+        gpt.configure_hedging(min_samples=1)
+        self.assertEqual(gpt.get_whole_transcript_summary("transcript", api_key="key"), "summary")
+        self.assertEqual(gpt.hedging_stats()["requests"], 1)
+        # Hedged attempts are streamed, so the losing one can be closed
+        self.assertTrue(client.return_value.chat.completions.create.call_args.kwargs["stream"])
+
+    @mock.patch.object(gpt, "get_client")
+    def test_client_retries_without_job_deadline(self, client):
+        client.return_value.chat.completions.create.side_effect = lambda **kwargs: FakeStream("summary")
+        gpt.configure_hedging(min_samples=1)
+        gpt.get_whole_transcript_summary("transcript", api_key="key")
+        client.assert_called_with("key")
+        gpt.get_whole_transcript_summary("transcript", api_key="key", deadline=Deadline(10))
+        client.assert_called_with("key", max_retries=0)
+
+    @mock.patch.object(gpt, "get_client")
+    def test_losing_attempt_is_stopped(self, client):
+        slow = FakeStream(" ".join(["word"] * 200), delay=0.05)
+        fast = FakeStream("fast answer")
+        streams = iter([slow, fast])
+        client.return_value.chat.completions.create.side_effect = lambda **kwargs: next(streams)
+        hedger = gpt.configure_hedging(min_samples=1, min_delay=0.05, max_hedge_rate=1.0)
+        hedger._latencies.append(0.01)
+
+        # A whole-video summary is not streamed without hedging
+        self.assertEqual(gpt.get_whole_transcript_summary("transcript", api_key="key"), "fast answer")
+        self.assertTrue(slow.closed.wait(1))
+        time.sleep(0.1)
+        self.assertLess(slow.sent, 10)
+        self.assertEqual(hedger.stats()["hedge_wins"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
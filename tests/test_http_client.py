@@ -0,0 +1,97 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+# Native Libraries
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# User-defined Imports
+import src.http_client as http_client
+
+
+PAGE = b"<html><head><title>Whales</title></head><body>" + b"whale " * 2000 + b"</body></html>"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+
+    def do_GET(self):
+        PageHandler.requests_seen.append({
+            "path": self.path,
+            "if_none_match": self.headers.get("If-None-Match"),
+            "accept_encoding": self.headers.get("Accept-Encoding"),
+            "client_port": self.client_address[1],
+        })
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = gzip.compress(PAGE)
+        self.send_response(200)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/etag":
+            self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Test_HttpClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        PageHandler.requests_seen = []
+        http_client.clear_cache()
+
+    def test_decompresses_and_negotiates_gzip(self):
+        self.assertEqual(http_client.fetch(f"{self.base_url}/plain"), PAGE)
+        self.assertIn("gzip", PageHandler.requests_seen[0]["accept_encoding"])
+
+    def test_revalidates_with_etag(self):
+        first = http_client.fetch(f"{self.base_url}/etag")
+        second = http_client.fetch(f"{self.base_url}/etag")
+        self.assertEqual(first, second)
+        self.assertIsNone(PageHandler.requests_seen[0]["if_none_match"])
+        self.assertEqual(PageHandler.requests_seen[1]["if_none_match"], '"v1"')
+
+    def test_pages_without_validators_are_not_cached(self):
+        http_client.fetch(f"{self.base_url}/plain")
+        http_client.fetch(f"{self.base_url}/plain")
+        self.assertIsNone(PageHandler.requests_seen[1]["if_none_match"])
+        self.assertEqual(len(http_client._page_cache), 0)
+
+    def test_reuses_connection(self):
+        for _ in range(3):
+            http_client.fetch(f"{self.base_url}/plain")
+        self.assertEqual(len({request["client_port"] for request in PageHandler.requests_seen}), 1)
+
+    def test_raises_on_error_status(self):
+        with self.assertRaises(http_client.requests.exceptions.HTTPError):
+            http_client.fetch(f"{self.base_url}/missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+# Native Libraries
+import json
+import subprocess
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Seconds the UI backend may take to import; openai alone used to take about 0.4s
+IMPORT_TIME_BUDGET = float(os.getenv("TUBE_TLDR_IMPORT_BUDGET", "0.3"))
+HEAVY_MODULES = ("openai", "bs4", "requests", "youtube_transcript_api", "numpy")
+MEASURE = """
+import json, sys, time
+started = time.perf_counter()
+import src.transcribe_summarize, src.prefetch, src.summary_store
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "heavy": [name for name in %r if name in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import() -> dict:
+    # A fresh interpreter per run, so nothing is imported yet
+    output = subprocess.run([sys.executable, "-c", MEASURE], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class Test_ImportTime(unittest.TestCase):
+    def test_heavy_dependencies_are_imported_lazily(self):
+        self.assertEqual(measure_import()["heavy"], [])
+
+    def test_import_time_budget(self):
+        # The fastest of three runs, to keep the check stable on busy machines
+        seconds = min(measure_import()["seconds"] for _ in range(3))
+        self.assertLess(seconds, IMPORT_TIME_BUDGET, f"Importing the app took {seconds:.3f}s")
+
+
+if __name__ == '__main__':
+    unittest.main()
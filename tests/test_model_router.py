@@ -0,0 +1,80 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# External Libraries
+import httpx
+import openai
+# User-defined Imports
+import src.gpt_functions as gpt
+import src.model_router as model_router
+
+
+class Test_Route(unittest.TestCase):
+    def tearDown(self):
+        model_router.configure_routing()
+        model_router.reset_stats()
+
+    def test_budget_scales_with_input(self):
+        small = model_router.route("chapter", 300)
+        large = model_router.route("chapter", 2500)
+        self.assertEqual(small[0], ("gpt-4o-mini", 256))
+        self.assertEqual(large[0], ("gpt-4o-mini", 875))
+        self.assertEqual(model_router.route("chapter", 100_000)[0][1], 1024)
+
+    def test_cheap_first_cascade(self):
+        attempts = model_router.route("shorts", 800)
+        self.assertEqual([model for model, _ in attempts], ["gpt-4o-mini", "gpt-4o"])
+        self.assertGreater(attempts[1][1], attempts[0][1])
+
+    def test_pinned_model_and_disabled_cascade(self):
+        self.assertEqual(model_router.route("chapter", 300, model="gpt-4o"), [("gpt-4o", 256)])
+        model_router.configure_routing(cascade=False)
+        self.assertEqual(len(model_router.route("chapter", 300)), 1)
+        self.assertEqual(model_router.route_label(), "gpt-4o-mini")
+
+    def test_targets_skip_models(self):
+        model_router.configure_routing(max_cost=0.0)
+        # No model meets the target: the cheapest one is used
+        self.assertEqual(model_router.route("video", 5000)[0][0], "gpt-4o-mini")
+        model_router.MODEL_PROFILES["slow-mini"] = {"input_cost": 0.1, "output_cost": 0.1, "overhead": 30, "tokens_per_second": 1}
+        with mock.patch.object(model_router, "CASCADE", ("slow-mini", "gpt-4o")):
+            model_router.configure_routing(max_latency=60)
+            self.assertEqual(model_router.route("chapter", 300)[0][0], "gpt-4o")
+        del model_router.MODEL_PROFILES["slow-mini"]
+
+
+class Test_Cascade(unittest.TestCase):
+    def setUp(self):
+        model_router.reset_stats()
+
+    @mock.patch.object(gpt, "_complete_once", side_effect=[("cut off", "length"), ("complete answer", "stop")])
+    def test_escalates_on_cut_off_answer(self, complete):
+        result = gpt.get_whole_transcript_summary("transcript " * 100, api_key="key")
+        self.assertEqual(result, "complete answer")
+        self.assertEqual([call.kwargs["model"] for call in complete.call_args_list], ["gpt-4o-mini", "gpt-4o"])
+        stats = model_router.routing_stats()
+        self.assertEqual(stats["video:gpt-4o-mini"]["escalations"], 1)
+        self.assertEqual(stats["video:gpt-4o"]["calls"], 1)
+
+    @mock.patch.object(gpt, "_complete_once", side_effect=[RuntimeError("overloaded"), ("answer", "stop")])
+    def test_escalates_on_error(self, complete):
+        self.assertEqual(gpt.get_one_sentence_summary("transcript", api_key="key"), "answer")
+
+    def test_authentication_error_is_not_escalated(self):
+        response = httpx.Response(401, request=httpx.Request("POST", "https://api.openai.com"))
+        error = openai.AuthenticationError("invalid key", response=response, body=None)
+        with mock.patch.object(gpt, "_complete_once", side_effect=error) as complete:
+            with self.assertRaises(openai.AuthenticationError):
+                gpt.get_unified_summary("key", "## A")
+            self.assertEqual(complete.call_count, 1)
+
+    @mock.patch.object(gpt, "_complete_once", return_value=("still cut off", "length"))
+    def test_last_attempt_is_returned(self, complete):
+        self.assertEqual(gpt.get_whole_transcript_summary("transcript", api_key="key"), "still cut off")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# User-defined Imports
+import src.planner as planner
+from src.youtube_video import YouTubeVideo
+
+
+def make_video(chapters: int, captions_per_chapter: int) -> YouTubeVideo:
+    video = YouTubeVideo("https://www.youtube.com/watch?v=plan")
+    video.title = "Whales"
+    video.transcript = video._convert_transcript_to_timedelta([
+        {"text": f"caption {index} about whales and the songs they sing", "start": index * 5.0, "duration": 4.0}
+        for index in range(chapters * captions_per_chapter)
+    ])
+    seconds = captions_per_chapter * 5
+    video.chapters = [
+        {"timestamp": f"{index * seconds // 3600}:{index * seconds // 60 % 60:02d}:{index * seconds % 60:02d}", "content": f"Topic {index}"}
+        for index in range(chapters)
+    ]
+    return video
+
+
+class Test_Planner(unittest.TestCase):
+    def test_short_video_is_summarized_in_one_call(self):
+        plan = planner.plan_video(make_video(chapters=6, captions_per_chapter=10), "chapters", combined=True, pack=True)
+        # All chapters fit into one packed request, which is cheaper than the combined request with three products
+        self.assertEqual((plan["strategy"], plan["calls"]), ("merged", 1))
+        self.assertEqual(plan["stats"]["chapters"], 6)
+        single = next(alternative for alternative in plan["alternatives"] if alternative["strategy"] == "single")
+        self.assertTrue(single["feasible"])
+        self.assertEqual(single["calls"], 1)
+
+    def test_many_small_chapters_are_merged(self):
+        plan = planner.plan_video(make_video(chapters=60, captions_per_chapter=15), "chapters", combined=True, pack=True)
+        self.assertEqual(plan["strategy"], "merged")
+        chapters = next(alternative for alternative in plan["alternatives"] if alternative["strategy"] == "chapters")
+        self.assertLess(plan["calls"], chapters["calls"])
+        self.assertLess(plan["cost"], chapters["cost"])
+        self.assertFalse(next(alternative for alternative in plan["alternatives"] if alternative["strategy"] == "single")["feasible"])
+
+    def test_long_chapters_fan_out(self):
+        plan = planner.plan_video(make_video(chapters=8, captions_per_chapter=200), "chapters", combined=True, pack=True)
+        self.assertEqual((plan["strategy"], plan["calls"]), ("chapters", 8))
+
+    def test_video_mode(self):
+        self.assertEqual(planner.plan_video(make_video(chapters=4, captions_per_chapter=10), "video")["strategy"], "single")
+        plan = planner.plan_video(make_video(chapters=8, captions_per_chapter=200), "video")
+        self.assertEqual((plan["strategy"], plan["calls"]), ("map_reduce", 9))
+
+    def test_latency_target(self):
+        video = make_video(chapters=60, captions_per_chapter=15)
+        plans = [plan for plan in planner.candidate_plans(video, "chapters", combined=True, pack=True) if plan["feasible"]]
+        plan = planner.plan_video(video, "chapters", max_latency=0.1, combined=True, pack=True)
+        self.assertEqual(plan["latency"], min(candidate["latency"] for candidate in plans))
+
+    def test_format_plan(self):
+        plan = planner.plan_video(make_video(chapters=6, captions_per_chapter=10), "chapters", combined=True, pack=True)
+        self.assertRegex(planner.format_plan(plan), r"^chapters/merged: 1 call, \d+ input \+ \d+ output tokens, ~[\d.]+s, ~\$[\d.]+$")
+
+    def test_opt_in_strategies_are_only_planned_when_enabled(self):
+        video = make_video(chapters=60, captions_per_chapter=15)
+        for mode in ("chapters", "video"):
+            plans = planner.candidate_plans(video, mode, combined=False, pack=False)
+            self.assertFalse(any(plan["pack"] for plan in plans))
+        strategies = [plan["strategy"] for plan in planner.candidate_plans(video, "chapters", combined=False, pack=False)]
+        self.assertEqual(strategies, ["chapters"])
+        strategies = [plan["strategy"] for plan in planner.candidate_plans(video, "chapters", combined=True, pack=False)]
+        self.assertEqual(strategies, ["single", "chapters"])
+        # The short video that is merged into one request above takes one request per chapter without the flags
+        plan = planner.plan_video(make_video(chapters=6, captions_per_chapter=10), "chapters", combined=False, pack=False)
+        self.assertEqual((plan["strategy"], plan["calls"]), ("chapters", 6))
+
+    @mock.patch.object(planner.ts, "summary_by_chapters", return_value=["## A", "## B", "## C"])
+    def test_cached_results_are_not_planned(self, chapters):
+        video = make_video(chapters=3, captions_per_chapter=5)
+        video.summaries["chapters"] = ["## A", "## B", "## C"]
+        with mock.patch.object(planner, "plan_video") as plan_video:
+            result = planner.summarize_planned(video, "chapters", api_key="key", pack=False)
+        plan_video.assert_not_called()
+        self.assertEqual(result, ["## A", "## B", "## C"])
+        self.assertFalse(chapters.call_args.kwargs["pack"])
+        plans = []
+        with mock.patch.object(planner.ts, "summary_entire_video", return_value="The video"):
+            self.assertEqual(planner.summarize_planned(video, "video", api_key="key", on_plan=plans.append), "The video")
+        self.assertEqual([plan["mode"] for plan in plans], ["video"])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            planner.candidate_plans(make_video(chapters=3, captions_per_chapter=5), "shorts")
+
+    @mock.patch.object(planner.ts, "summary_entire_video", return_value="The video")
+    @mock.patch.object(planner.ts, "summary_by_chapters", return_value=["## A"])
+    def test_run_plan(self, chapters, whole):
+        video = make_video(chapters=3, captions_per_chapter=5)
+        self.assertEqual(planner.run_plan(video, {"mode": "chapters", "strategy": "merged", "pack": True}, api_key="key"), ["## A"])
+        self.assertTrue(chapters.call_args.kwargs["pack"])
+        self.assertEqual(planner.run_plan(video, {"mode": "video", "strategy": "map_reduce", "pack": False}, api_key="key"), "The video")
+        self.assertFalse(chapters.call_args.kwargs["pack"])
+        whole.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
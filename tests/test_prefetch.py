@@ -0,0 +1,65 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# Native Libraries
+import threading
+import time
+# User-defined Imports
+import src.prefetch as prefetch
+from src.prefetch import Prefetcher
+from src.youtube_video import YouTubeVideo
+
+
+class Test_Prefetcher(unittest.TestCase):
+    def setUp(self):
+        self.video = YouTubeVideo("https://www.youtube.com/watch?v=X4DpDM9jmqo")
+        self.video.transcript = [{"text": "hello", "start": 0.0}]
+        self.prefetcher = Prefetcher()
+
+    def tearDown(self):
+        self.prefetcher.cancel()
+
+    def test_fills_cache_in_background(self):
+        def summarize(video, api_key, store, deadline):
+            video.summaries["chapters"] = ["## Intro"]
+
+        with mock.patch.dict(prefetch.SUMMARY_FUNCTIONS, {"chapters": summarize}):
+            self.prefetcher.start(self.video, api_key="key", modes=("chapters",))
+            self.assertTrue(self.prefetcher.wait(self.video, "chapters", timeout=5))
+        self.assertEqual(self.video.summaries["chapters"], ["## Intro"])
+
+    def test_cancel_stops_running_job(self):
+        started, stopped = threading.Event(), threading.Event()
+
+        def summarize(video, api_key, store, deadline):
+            started.set()
+            while not deadline.expired:
+                time.sleep(0.01)
+            stopped.set()
+
+        with mock.patch.dict(prefetch.SUMMARY_FUNCTIONS, {"chapters": summarize, "video": mock.Mock()}):
+            self.prefetcher.start(self.video, api_key="key")
+            self.assertTrue(started.wait(5))
+            self.prefetcher.cancel()
+            self.assertTrue(stopped.wait(5))
+            # The queued mode never runs and a click does not wait for it
+            self.assertFalse(self.prefetcher.wait(self.video, "video", timeout=0))
+            prefetch.SUMMARY_FUNCTIONS["video"].assert_not_called()
+
+    def test_wait_ignores_other_videos(self):
+        other = YouTubeVideo("https://www.youtube.com/watch?v=other")
+        with mock.patch.dict(prefetch.SUMMARY_FUNCTIONS, {"chapters": mock.Mock()}):
+            self.prefetcher.start(self.video, api_key="key", modes=("chapters",))
+            self.assertFalse(self.prefetcher.wait(other, "chapters", timeout=0))
+
+    def test_no_prefetch_without_transcript(self):
+        self.video.transcript = None
+        self.prefetcher.start(self.video, api_key="key")
+        self.assertFalse(self.prefetcher.wait(self.video, "chapters", timeout=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
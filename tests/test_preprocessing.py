@@ -0,0 +1,69 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+# Native Libraries
+from datetime import timedelta
+# User-defined Imports
+import src.preprocessing as preprocessing
+
+
+class Test_CleanTranscript(unittest.TestCase):
+    def test_removes_sound_markers_and_fillers(self):
+        self.assertEqual(preprocessing.clean_caption_text("[Music]  so uh this is   ♪ great"), "so this is great")
+
+    def test_keeps_german_um(self):
+        self.assertEqual(preprocessing.clean_caption_text("wir treffen uns um acht"), "wir treffen uns um acht")
+
+    def test_removes_rolling_duplicates(self):
+        transcript = [
+            {"text": "welcome back to the channel", "start": 0.0},
+            {"text": "to the channel today we talk", "start": 2.0},
+            {"text": "today we talk", "start": 4.0},
+            {"text": "[Applause]", "start": 5.0},
+            {"text": "about whales", "start": 6.0},
+        ]
+        cleaned = preprocessing.clean_transcript(transcript)
+        self.assertEqual(
+            [entry["text"] for entry in cleaned],
+            ["welcome back to the channel", "today we talk", "about whales"]
+        )
+        self.assertEqual([entry["start"] for entry in cleaned], [0.0, 2.0, 6.0])
+        self.assertEqual(transcript[1]["text"], "to the channel today we talk")
+
+    def test_keeps_single_repeated_word(self):
+        transcript = [{"text": "this is very"}, {"text": "very important"}]
+        cleaned = preprocessing.clean_transcript(transcript)
+        self.assertEqual(cleaned[1]["text"], "very important")
+
+
+class Test_CompactSection(unittest.TestCase):
+    def test_compact_section(self):
+        section = {
+            "timestamp": timedelta(minutes=1, seconds=20),
+            "timestr": "1:20",
+            "heading": "Gibt es Delfine?",
+            "content": "Ja,  es gibt  sie.",
+        }
+        compact = preprocessing.compact_section(section)
+        self.assertEqual(compact, "## Gibt es Delfine? (1:20)\nJa, es gibt sie.")
+        self.assertLess(preprocessing.estimate_tokens(compact), preprocessing.estimate_tokens(str(section)))
+
+    def test_compact_section_with_transcript(self):
+        section = {
+            "timestamp": timedelta(hours=1),
+            "heading": "Chapter 1",
+            "content": "Hello world",
+            "transcript": [{"text": "Hello world", "timestamp": timedelta(hours=1, seconds=2), "timestr": 3600.5}],
+        }
+        compact = preprocessing.compact_section(section)
+        self.assertEqual(compact, "## Chapter 1 (1:00:00)\nHello world\n[1:00:00] Hello world")
+
+    def test_format_timestamp(self):
+        self.assertEqual(preprocessing.format_timestamp(65), "1:05")
+        self.assertEqual(preprocessing.format_timestamp(timedelta(hours=2, minutes=3, seconds=4)), "2:03:04")
+
+
+if __name__ == '__main__':
+    unittest.main()
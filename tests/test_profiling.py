@@ -0,0 +1,70 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+# Native Libraries
+import pstats
+import tempfile
+import threading
+# User-defined Imports
+import src.profiling as profiling
+
+
+@profiling.profiled
+def parse_captions(count: int) -> int:
+    return sum(len(str(index)) for index in range(count))
+
+
+@profiling.profiled
+def link_sections(count: int) -> int:
+    # Nested marked calls are part of the outer measurement
+    return parse_captions(count) + 1
+
+
+class Test_Profiling(unittest.TestCase):
+    def setUp(self):
+        self.config = dict(profiling._config)
+        self.output_dir = tempfile.mkdtemp()
+        profiling.configure_profiling(enabled=True, sample_rate=1.0, output_dir=self.output_dir)
+
+    def tearDown(self):
+        profiling._config.update(self.config)
+
+    def test_marked_functions_are_plain_outside_runs(self):
+        self.assertEqual(link_sections(10), 11)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    def test_writes_profile_of_all_threads(self):
+        with profiling.profile_run("test") as run:
+            link_sections(10_000)
+            worker = threading.Thread(target=parse_captions, args=(10_000,))
+            worker.start()
+            worker.join()
+        self.assertTrue(run.path.endswith(".prof"))
+        self.assertTrue(os.path.exists(run.path.replace(".prof", ".txt")))
+        functions = {name for _, _, name in pstats.Stats(run.path).stats}
+        self.assertTrue({"link_sections", "parse_captions"} <= functions)
+        # parse_captions ran once nested in link_sections and once in the worker thread
+        calls = {name: stat[1] for (_, _, name), stat in pstats.Stats(run.path).stats.items()}
+        self.assertEqual(calls["parse_captions"], 2)
+
+    def test_unsampled_runs_are_not_profiled(self):
+        profiling.configure_profiling(enabled=True, sample_rate=0.0)
+        with profiling.profile_run("test") as run:
+            link_sections(10)
+        self.assertIsNone(run)
+        with profiling.profile_run("test", enabled=True) as run:
+            link_sections(10)
+        self.assertIsNotNone(run.path)
+
+    def test_disabled(self):
+        profiling.configure_profiling(enabled=False)
+        with profiling.profile_run("test") as run:
+            link_sections(10)
+        self.assertIsNone(run)
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# Native Libraries
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+# User-defined Imports
+import src.preprocessing as preprocessing
+import src.streaming as streaming
+import src.youtube_video as youtube_video
+import src.transcribe_summarize as ts
+from src.youtube_video import YouTubeVideo
+
+
+def caption_stream(count: int, consumed: list | None = None):
+    # Generates captions on the fly, like a track that is read entry by entry
+    for index in range(count):
+        if consumed is not None:
+            consumed.append(index)
+        text = f"caption {index} about streams and the long videos they produce" + ("." if index % 7 == 6 else "")
+        yield {"text": text, "start": index * 4.0, "duration": 3.5, "timestamp": timedelta(seconds=index * 4.0 + 3.5)}
+
+
+def make_video(captions: int, chapters: bool = True) -> YouTubeVideo:
+    video = YouTubeVideo("https://www.youtube.com/watch?v=stream")
+    video.title = "Livestream"
+    video.transcript = list(caption_stream(captions))
+    video.chapters = [
+        {"timestamp": preprocessing.format_timestamp(index * captions * 4 // 5), "content": f"Part {index}"}
+        for index in range(5)
+    ] if chapters else None
+    return video
+
+
+class Test_Streaming(unittest.TestCase):
+    def test_sections_match_regular_path(self):
+        for chapters in (True, False):
+            video = make_video(captions=900, chapters=chapters)
+            expected = ts.build_sections(video, segmentation="tokens")
+            streamed = list(streaming.iter_sections(preprocessing.iter_clean_transcript(video.transcript), video.chapters))
+            self.assertEqual(
+                [(section["heading"], section["timestamp"], section["content"]) for section in streamed],
+                [(section["heading"], section["timestamp"], section["content"]) for section in expected],
+            )
+
+    def test_small_last_section_is_not_merged_beyond_the_maximum(self):
+        entries = [
+            {"text": f"caption number {index} talks about a topic", "start": index * 3.0, "duration": 3.0, "timestamp": timedelta(seconds=index * 3.0 + 3.0)}
+            for index in range(170)
+        ]
+        limits = {"target_tokens": 1000, "min_tokens": 500, "max_tokens": 1500}
+        expected = ts.YouTubeTranscribeSummarize(youtube_video=YouTubeVideo("https://www.youtube.com/watch?v=max")).link_transcript_without_outline(entries, **limits)
+        streamed = list(streaming.iter_sections(iter(entries), **limits))
+        self.assertEqual(len(streamed), 2)
+        self.assertEqual([section["content"] for section in streamed], [section["content"] for section in expected])
+        self.assertEqual([section["timestamp"] for section in streamed], [section["timestamp"] for section in expected])
+
+    def test_sections_are_yielded_while_the_transcript_is_read(self):
+        consumed = []
+        sections = streaming.iter_sections(caption_stream(5000, consumed))
+        first = next(sections)
+        self.assertEqual(first["heading"], "Chapter 1")
+        self.assertLess(len(consumed), 1000)
+
+    def test_requests_in_flight_are_bounded(self):
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def summarize(section, api_key, deadline=None):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return f"## {section['heading']}"
+
+        consumed = []
+        sections = streaming.iter_sections(caption_stream(6000, consumed), target_tokens=300, min_tokens=100, max_tokens=500)
+        with mock.patch.object(streaming.gpt, "get_chapter_summary", side_effect=summarize):
+            results = streaming.iter_chapter_summaries(sections, api_key="key", max_in_flight=3)
+            first = next(results)
+            # The first summary is emitted long before the transcript has been assembled
+            self.assertLess(len(consumed), 1000)
+            rest = list(results)
+        self.assertEqual(first["summary"], "## Chapter 1")
+        self.assertEqual([result["index"] for result in [first] + rest], list(range(len(rest) + 1)))
+        self.assertLessEqual(peak[0], 3)
+
+    # A plain function instead of a mock, which would keep every section in its call list
+    @mock.patch.object(streaming.gpt, "get_chapter_summary", new=lambda section, api_key, deadline=None: "## summary")
+    def test_peak_memory_does_not_grow_with_length(self):
+        def peak(captions: int) -> int:
+            # The track delivers raw entries lazily, the pipeline must not collect or cache them
+            track = mock.Mock(language_code="en", is_generated=False)
+            track.fetch.side_effect = lambda: (
+                {key: entry[key] for key in ("text", "start", "duration")} for entry in caption_stream(captions)
+            )
+            video = YouTubeVideo(f"https://www.youtube.com/watch?v=live{captions}")
+            video.chapters = None
+            with mock.patch.object(youtube_video, "_list_transcripts", return_value=(track,)), \
+                    mock.patch.object(youtube_video, "_fetch_transcript") as cached_fetch:
+                tracemalloc.start()
+                try:
+                    for _ in streaming.stream_chapter_summaries(video, api_key="key", max_in_flight=4):
+                        pass
+                    return tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                    cached_fetch.assert_not_called()
+                    self.assertNotIn("transcript", video.__dict__)
+
+        short, long = peak(5_000), peak(50_000)
+        self.assertLess(long, short * 1.5)
+
+    def test_fetched_track_is_released(self):
+        entries = [{"text": f"caption {index}", "start": index * 4.0, "duration": 3.5} for index in range(100)]
+        track = mock.Mock(language_code="en", is_generated=False)
+        track.fetch.return_value = entries
+        video = YouTubeVideo("https://www.youtube.com/watch?v=released")
+        with mock.patch.object(youtube_video, "_list_transcripts", return_value=(track,)):
+            stream = video.iter_transcript()
+            first = next(stream)
+            self.assertEqual(first["timestamp"], timedelta(seconds=3.5))
+            self.assertEqual(len(entries), 99)
+            self.assertEqual([entry["start"] for entry in stream][-1], 99 * 4.0)
+        self.assertEqual(entries, [])
+        self.assertEqual(video.transcript_language, "en")
+
+    def test_failed_chapters_are_none(self):
+        def summarize(section, api_key, deadline=None):
+            if section["heading"] == "Part 2":
+                raise RuntimeError("model unavailable")
+            return f"## {section['heading']}"
+
+        video = make_video(captions=500)
+        with mock.patch.object(streaming.gpt, "get_chapter_summary", side_effect=summarize):
+            results = list(streaming.stream_chapter_summaries(video, api_key="key"))
+        self.assertEqual([result["summary"] for result in results], ["## Part 0", "## Part 1", None, "## Part 3", "## Part 4"])
+
+    @mock.patch.object(streaming.gpt, "get_unified_summary", side_effect=lambda api_key, sections, deadline=None: "partial")
+    @mock.patch.object(streaming.gpt, "get_chapter_summary", side_effect=lambda section, api_key, deadline=None: "x" * 400)
+    def test_video_summary_folds_chapter_summaries(self, summary, unified):
+        video = make_video(captions=500)
+        chapters = []
+        with mock.patch.object(streaming, "REDUCE_TOKEN_BUDGET", 200):
+            self.assertEqual(streaming.stream_video_summary(video, api_key="key", on_chapter=chapters.append), "partial")
+        self.assertEqual(len(chapters), 5)
+        # Every second chapter summary exceeds the budget together with the partial summary before it
+        self.assertEqual(unified.call_count, 3)
+        self.assertEqual(video.summaries["video"], "partial")
+
+
+if __name__ == '__main__':
+    unittest.main()
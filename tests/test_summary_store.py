@@ -0,0 +1,144 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# Native Libraries
+import tempfile
+import time
+from datetime import timedelta
+# User-defined Imports
+import src.transcribe_summarize as ts
+from src.summary_store import SummaryStore
+from src.youtube_video import YouTubeVideo
+
+
+def make_video(video_id="abc", channel="Channel"):
+    video = YouTubeVideo(f"https://www.youtube.com/watch?v={video_id}")
+    video.title = f"Title {video_id}"
+    video.channel = channel
+    video.duration = timedelta(minutes=12)
+    video.description = "0:00 Intro\n1:00 Main\n2:00 Outro"
+    video.transcript_language = "en"
+    video.chapters = [{"timestamp": "0:00", "content": "Intro"}, {"timestamp": "1:00", "content": "Main"}]
+    video.transcript = [
+        {"text": f"line {second}", "start": second, "duration": 2.0, "timestamp": timedelta(seconds=second + 2)}
+        for second in range(0, 120, 5)
+    ]
+    return video
+
+
+class Test_SummaryStore(unittest.TestCase):
+    def setUp(self):
+        self.store = SummaryStore(os.path.join(tempfile.mkdtemp(), "store.db"))
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_roundtrip(self):
+        video = make_video()
+        self.store.save_video(video)
+        self.store.save_summaries("abc", "chapters", "gpt-4o-mini", ["## Intro", "## Main"], language="en")
+        self.assertEqual(self.store.get_video("abc")["duration_seconds"], 720)
+        self.assertEqual([row["content"] for row in self.store.get_summaries("abc", "chapters", "gpt-4o-mini", "en")], ["## Intro", "## Main"])
+        self.assertEqual(self.store.get_summaries("abc", "chapters", "gpt-4o", "en"), [])
+        self.assertEqual(self.store.get_summaries("abc", "chapters", "gpt-4o-mini", "de"), [])
+
+    def test_saving_replaces_previous_result(self):
+        self.store.save_summaries("abc", "video", "gpt-4o-mini", ["old"])
+        self.store.save_summaries("abc", "video", "gpt-4o-mini", ["new"])
+        self.assertEqual([row["content"] for row in self.store.get_summaries("abc", "video", "gpt-4o-mini")], ["new"])
+
+    def test_videos_by_channel(self):
+        for index in range(3):
+            self.store.save_video(make_video(f"v{index}", channel="A" if index < 2 else "B"))
+        self.assertEqual({video["video_id"] for video in self.store.videos_by_channel("A")}, {"v0", "v1"})
+
+    def test_lookup_is_fast(self):
+        for index in range(500):
+            self.store.save_summaries(f"v{index}", "video", "gpt-4o-mini", [f"summary {index}"], language="en")
+        started = time.perf_counter()
+        rows = self.store.get_summaries("v250", "video", "gpt-4o-mini", "en")
+        self.assertLess(time.perf_counter() - started, 0.01)
+        self.assertEqual(rows[0]["content"], "summary 250")
+
+
+class Test_SummaryStore_Search(unittest.TestCase):
+    def setUp(self):
+        self.store = SummaryStore(os.path.join(tempfile.mkdtemp(), "store.db"))
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_transcript_hits_have_heading_and_offset(self):
+        video = make_video()
+        video.transcript[15]["text"] = "the humpback whales sing at night"
+        self.store.save_video(video)
+        hits = self.store.search("humpback whale")
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0]["video_id"], "abc")
+        self.assertEqual(hits[0]["heading"], "Main")
+        self.assertEqual(hits[0]["start_seconds"], 70.0)
+        self.assertIn("**humpback**", hits[0]["snippet"])
+
+    def test_indexing_is_incremental(self):
+        video = make_video()
+        self.store.save_video(video)
+        self.assertEqual(self.store.index_transcript("abc", video.transcript), 0)
+        self.assertGreater(self.store.index_transcript("abc", video.transcript, replace=True), 0)
+        self.assertEqual(len(self.store.search("line")), len(self.store.search("line", kind="transcript")))
+
+    def test_summaries_are_searchable_and_replaced(self):
+        self.store.save_summaries("abc", "chapters", "gpt-4o-mini", ["## Intro\n- about dolphins"], headings=["Intro"], starts=[0.0])
+        self.assertEqual(self.store.search("dolphins")[0]["kind"], "summary:chapters")
+        self.store.save_summaries("abc", "chapters", "gpt-4o-mini", ["## Intro\n- about sharks"], headings=["Intro"], starts=[0.0])
+        self.assertEqual(self.store.search("dolphins"), [])
+        self.assertEqual(len(self.store.search("sharks")), 1)
+
+    def test_ranking_and_query_syntax(self):
+        self.store.save_summaries("a", "video", "m", ["whales whales whales and more whales"])
+        self.store.save_summaries("b", "video", "m", ["one whale among many other topics of the show"])
+        hits = self.store.search('"whales (')
+        self.assertEqual([hit["video_id"] for hit in hits], ["a"])
+        hits = self.store.search("whal")
+        self.assertEqual([hit["video_id"] for hit in hits], ["a", "b"])
+
+    def test_search_thousands_of_videos_is_fast(self):
+        for index in range(2000):
+            self.store.save_summaries(f"v{index}", "video", "m", [f"episode {index} covers topic{index % 50} in depth"])
+        started = time.perf_counter()
+        hits = self.store.search("topic7 depth")
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual(len(hits), 10)
+
+
+class Test_SummaryStore_Integration(unittest.TestCase):
+    def setUp(self):
+        self.store = SummaryStore(os.path.join(tempfile.mkdtemp(), "store.db"))
+
+    def tearDown(self):
+        self.store.close()
+
+    @mock.patch.object(ts.gpt, "get_chapter_summary", side_effect=lambda section, api_key, **kwargs: f"## {section['heading']}")
+    def test_repeat_request_is_a_lookup(self, chapter_summary):
+        first = ts.summary_by_chapters(make_video(), api_key="key", store=self.store)
+        self.assertEqual(chapter_summary.call_count, 2)
+        self.assertEqual(len(self.store.get_sections("abc")), 2)
+
+        # A new session with a freshly loaded video
+        second = ts.summary_by_chapters(make_video(), api_key="key", store=self.store)
+        self.assertEqual(second, first)
+        self.assertEqual(chapter_summary.call_count, 2)
+
+    @mock.patch.object(ts.gpt, "create_shorts_script", return_value="script")
+    @mock.patch.object(ts.gpt, "rework_transcript_to_sentences", return_value="sentences")
+    def test_shorts_are_stored_with_headings(self, rework, shorts):
+        ts.create_shorts_by_chapters(make_video(), api_key="key", store=self.store)
+        cached = ts.create_shorts_by_chapters(make_video(), api_key="key", store=self.store)
+        self.assertEqual(cached, [{"heading": "Intro", "script": "script"}, {"heading": "Main", "script": "script"}])
+        self.assertEqual(shorts.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+# Native Libraries
+import random
+import time
+from datetime import timedelta
+# User-defined Imports
+from src.preprocessing import estimate_tokens
+from src.topic_segmentation import segment_by_topics
+
+
+TOPICS = [
+    "whales dolphins ocean swimming pod calves migration sonar plankton krill",
+    "fishing quota trawler harbour catch nets sustainable stocks cod herring",
+    "politics government election parliament policy budget minister votes law",
+    "biology university studies lecture exam professor degree research thesis",
+    "expedition travel boat camera filming storms arctic ice weather crew",
+]
+FILLER = "and then we look at it and you see that it is there so it goes on like this".split()
+
+
+def make_transcript(topic_sequence: list[int], captions_per_topic: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    content = []
+    for topic in topic_sequence:
+        words = TOPICS[topic].split()
+        for _ in range(captions_per_topic):
+            text = " ".join(rng.choice(words) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(10))
+            content.append({"text": text, "start": len(content) * 3.0, "duration": 3.0})
+    return content
+
+
+def section_tokens(content: list[dict], sections: list[dict], block_size: int = 8) -> list[int]:
+    # Counted like segment_by_topics(): per block of captions, plus one token per caption
+    starts = [next(index for index, entry in enumerate(content) if entry["start"] == section["timestamp"].total_seconds())
+              for section in sections] + [len(content)]
+    tokens = []
+    for start, end in zip(starts, starts[1:]):
+        blocks = [" ".join(entry["text"] for entry in content[i:min(i + block_size, end)]) for i in range(start, end, block_size)]
+        tokens.append(sum(estimate_tokens(block) + block_size for block in blocks))
+    return tokens
+
+
+class Test_SegmentByTopics(unittest.TestCase):
+    def test_boundaries_follow_topic_changes(self):
+        content = make_transcript([0, 1, 2, 3], captions_per_topic=160)
+        sections = segment_by_topics(content, min_tokens=300, max_tokens=4000)
+        self.assertEqual(len(sections), 4)
+        topic_starts = [index * 160 * 3.0 for index in range(4)]
+        for section, topic_start in zip(sections, topic_starts):
+            # Boundaries fall on block edges, so allow one block of captions (8 x 3 s)
+            self.assertLessEqual(abs(section["timestamp"].total_seconds() - topic_start), 24.0)
+
+    def test_headings_describe_the_topic(self):
+        content = make_transcript([0, 1], captions_per_topic=160)
+        sections = segment_by_topics(content, min_tokens=300, max_tokens=4000)
+        self.assertTrue(any(word in sections[0]["heading"].lower() for word in TOPICS[0].split()))
+        self.assertTrue(any(word in sections[1]["heading"].lower() for word in TOPICS[1].split()))
+
+    def test_section_format_and_limits(self):
+        content = make_transcript([0, 1, 2, 3, 4] * 2, captions_per_topic=100)
+        sections = segment_by_topics(content, min_tokens=300, max_tokens=1200)
+        self.assertEqual(sections[0]["timestr"], "0:00")
+        self.assertIsInstance(sections[0]["timestamp"], timedelta)
+        self.assertEqual(" ".join(section["content"] for section in sections), " ".join(entry["text"] for entry in content))
+        tokens = section_tokens(content, sections)
+        self.assertGreater(len(tokens), 1)
+        for number, count in enumerate(tokens):
+            self.assertLessEqual(count, 1200, f"Section {number} has {count} tokens")
+        for number, count in enumerate(tokens[:-1]):
+            self.assertGreaterEqual(count, 300, f"Section {number} has {count} tokens")
+
+    def test_empty_transcript(self):
+        self.assertEqual(segment_by_topics([]), [])
+
+
+class Test_SegmentByTopics_Benchmark(unittest.TestCase):
+    def test_three_hour_transcript_under_one_second(self):
+        # A caption every 3 seconds for 3 hours
+        content = make_transcript(list(range(5)) * 6, captions_per_topic=120)
+        self.assertEqual(len(content), 3 * 60 * 60 // 3)
+        started = time.perf_counter()
+        sections = segment_by_topics(content)
+        elapsed = time.perf_counter() - started
+        self.assertLess(elapsed, 1.0, f"Segmented {len(content)} captions into {len(sections)} sections in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    unittest.main()
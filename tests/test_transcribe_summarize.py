@@ -3,11 +3,18 @@ import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 # Testing
 import unittest
+from unittest import mock
 # Native Libraries
+import tempfile
+import threading
+import time
 from datetime import timedelta
 # External Libraries
 from bs4 import BeautifulSoup
 # User-defined Imports
+import src.transcribe_summarize as ts
+from src.deadline import Deadline
+from src.summary_store import SummaryStore
 from src.transcribe_summarize import YouTubeTranscribeSummarize
 from src.youtube_video import YouTubeVideo
 
@@ -55,7 +62,7 @@ class Test_YouTubeVideo_GetDuration(unittest.TestCase):
         video.soup = video._get_metadata()
         duration = video._get_duration()
         self.assertIsInstance(duration, timedelta)
-        self.assertNotEqual(duration, "Duration not found")
+        self.assertGreater(duration, timedelta(0))
 
 class Test_YouTubeVideo_GetDescription(unittest.TestCase):
     def test_get_description(self):
@@ -101,5 +108,272 @@ class Test_YouTubeTranscribeSummarize_GetOutline(unittest.TestCase):
         self.assertEqual(outline, expected_output)
 
 
+class Test_HierarchicalSummaries(unittest.TestCase):
+    def setUp(self):
+        self.video = YouTubeVideo("https://www.youtube.com/watch?v=X4DpDM9jmqo")
+        self.video.title = "Title"
+        self.video.transcript = [{"text": "raw transcript"}]
+
+    @mock.patch.object(ts.gpt, "get_whole_transcript_summary", return_value="from transcript")
+    @mock.patch.object(ts.gpt, "get_unified_summary", return_value="from chapters")
+    def test_entire_video_uses_chapter_summaries(self, unified, whole):
+        self.video.summaries["chapters"] = ["## A", "## B"]
+        summary = ts.summary_entire_video(self.video, api_key="key")
+        self.assertEqual(summary, "from chapters")
+        self.assertEqual(unified.call_args.kwargs["sections"], "## A\n\n## B")
+        whole.assert_not_called()
+
+    @mock.patch.object(ts.gpt, "get_whole_transcript_summary", return_value="from transcript")
+    def test_entire_video_falls_back_to_transcript(self, whole):
+        summary = ts.summary_entire_video(self.video, api_key="key")
+        self.assertEqual(summary, "from transcript")
+        self.assertEqual(whole.call_args.args[0], "raw transcript")
+
+    @mock.patch.object(ts.gpt, "get_one_sentence_summary", return_value="sentence")
+    def test_one_sentence_prefers_video_summary(self, one_sentence):
+        self.video.summaries["chapters"] = ["## A"]
+        self.video.summaries["video"] = "- whole video"
+        ts.summary_in_one_sentence(self.video, api_key="key")
+        self.assertEqual(one_sentence.call_args.args[0], "- whole video")
+        self.assertEqual(self.video.summaries["sentence"], "sentence")
+
+
+class Test_StoredRoutingPolicy(unittest.TestCase):
+    def setUp(self):
+        self.config = dict(ts.model_router._config)
+        self.store = SummaryStore(os.path.join(tempfile.mkdtemp(), "store.db"))
+
+    def tearDown(self):
+        ts.model_router._config.update(self.config)
+        self.store.close()
+
+    def make_video(self) -> YouTubeVideo:
+        video = YouTubeVideo("https://www.youtube.com/watch?v=X4DpDM9jmqo")
+        video.title, video.channel, video.duration, video.description = "Title", "Channel", timedelta(minutes=1), ""
+        video.chapters = None
+        video.transcript = [{"text": "raw transcript", "start": 0.0}]
+        return video
+
+    @mock.patch.object(ts.gpt, "get_whole_transcript_summary", side_effect=["with cascade", "mini only"])
+    def test_results_are_keyed_by_the_current_policy(self, whole):
+        ts.model_router.configure_routing(cascade=True)
+        self.assertEqual(ts.summary_entire_video(self.make_video(), api_key="key", store=self.store), "with cascade")
+        # A policy change after import must neither reuse nor overwrite the results of the other policy
+        ts.model_router.configure_routing(cascade=False)
+        self.assertEqual(ts.summary_entire_video(self.make_video(), api_key="key", store=self.store), "mini only")
+        self.assertEqual(self.store.get_summaries("X4DpDM9jmqo", "video", "gpt-4o-mini")[0]["content"], "mini only")
+        self.assertEqual(self.store.get_summaries("X4DpDM9jmqo", "video", "gpt-4o-mini>gpt-4o")[0]["content"], "with cascade")
+
+
+class Test_SummaryDeadline(unittest.TestCase):
+    def setUp(self):
+        self.video = YouTubeVideo("https://www.youtube.com/watch?v=X4DpDM9jmqo")
+        self.video.transcript = self.video._convert_transcript_to_timedelta(
+            [{"text": f"caption {index}", "start": index * 60.0, "duration": 5.0} for index in range(3)]
+        )
+        self.video.chapters = [
+            {"timestamp": "0:00", "content": "Intro"},
+            {"timestamp": "1:00", "content": "Stuck"},
+            {"timestamp": "2:00", "content": "Outro"},
+        ]
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def fake_summary(self, section, api_key, deadline=None):
+        if section["heading"] == "Stuck" and not self.release.is_set():
+            self.release.wait(5)
+        return f"## {section['heading']}"
+
+    def test_returns_partial_result_and_retries_missing(self):
+        with mock.patch.object(ts.gpt, "get_chapter_summary", side_effect=self.fake_summary) as summary:
+            started = time.monotonic()
+            result = ts.summary_by_chapters(self.video, api_key="key", deadline=Deadline(0.3))
+            self.assertLess(time.monotonic() - started, 2)
+            self.assertEqual(result[0], "## Intro")
+            self.assertIn("not summarized in time", result[1])
+            self.assertEqual(ts.missing_chapters(self.video), [1])
+
+            self.release.set()
+            summary.reset_mock()
+            result = ts.summary_by_chapters(self.video, api_key="key", deadline=Deadline(5))
+            self.assertEqual(result, ["## Intro", "## Stuck", "## Outro"])
+            self.assertEqual([call.args[0]["heading"] for call in summary.call_args_list], ["Stuck"])
+            self.assertEqual(ts.missing_chapters(self.video), [])
+
+    def test_failed_chapters_are_not_shown_as_timeouts(self):
+        def summary(section, api_key, deadline=None):
+            if section["heading"] == "Stuck":
+                raise RuntimeError("model unavailable")
+            return f"## {section['heading']}"
+
+        with mock.patch.object(ts.gpt, "get_chapter_summary", side_effect=summary):
+            result = ts.summary_by_chapters(self.video, api_key="key", deadline=Deadline(5))
+        self.assertIn("failed: model unavailable", result[1])
+        self.assertNotIn("in time", result[1])
+        self.assertEqual(ts.missing_chapters(self.video), [1])
+
+    @mock.patch.object(ts.gpt, "get_unified_summary", return_value="from chapters")
+    @mock.patch.object(ts.gpt, "get_whole_transcript_summary", return_value="from transcript")
+    def test_partial_chapters_are_not_used_for_video_summary(self, whole, unified):
+        self.video.summaries["chapters"] = ["## Intro", None, "## Outro"]
+        self.assertEqual(ts.summary_entire_video(self.video, api_key="key"), "from transcript")
+        unified.assert_not_called()
+
+
+class Test_PackedSections(unittest.TestCase):
+    def setUp(self):
+        self.video = YouTubeVideo("https://www.youtube.com/watch?v=X4DpDM9jmqo")
+        self.video.transcript = self.video._convert_transcript_to_timedelta(
+            [{"text": f"caption {index} about whales", "start": index * 60.0, "duration": 5.0} for index in range(10)]
+        )
+        self.video.chapters = [{"timestamp": f"{index}:00", "content": f"Topic {index}"} for index in range(10)]
+
+    def test_pack_sections(self):
+        small = {"heading": "Small", "content": "word " * 40}
+        large = {"heading": "Large", "content": "word " * 2000}
+        sections = [small, small, large, small, small, small]
+        self.assertEqual(ts.pack_sections(sections, token_budget=200), [[0, 1], [2], [3, 4, 5]])
+        self.assertEqual(ts.pack_sections(sections, token_budget=150), [[0, 1], [2], [3, 4], [5]])
+        # Only adjacent sections are packed
+        self.assertEqual(ts.pack_sections(sections, indices=[0, 3, 5]), [[0], [3], [5]])
+
+    def test_parse_packed_results(self):
+        self.assertEqual(ts.gpt.parse_packed_results('{"p0": "## A", "p1": " "}', 3), ["## A", None, None])
+        self.assertEqual(ts.gpt.parse_packed_results('{"p0": "## A"', 2), [None, None])
+        request = ts.gpt.packed_request("Summarize.", ["one", "two"])
+        self.assertEqual(request["response_format"]["json_schema"]["schema"]["required"], ["p0", "p1"])
+        self.assertIn("### Part p1\ntwo", request["messages"][1]["content"])
+
+    def test_packs_chapters_and_retries_invalid_parts(self):
+        def packed(sections, api_key, deadline=None):
+            # The answer for the third section is missing
+            return [f"## {section['heading']}" if index != 2 else None for index, section in enumerate(sections)]
+
+        with mock.patch.object(ts.gpt, "get_packed_chapter_summaries", side_effect=packed) as packed_summary, \
+                mock.patch.object(ts.gpt, "get_chapter_summary", side_effect=lambda section, api_key, deadline=None: "retried") as single:
+            result = ts.summary_by_chapters(self.video, api_key="key", pack=True)
+        self.assertEqual(packed_summary.call_count, 1)
+        self.assertEqual(single.call_count, 1)
+        self.assertEqual(result[2], "retried")
+        self.assertEqual(result[:2] + result[3:], [f"## Topic {index}" for index in range(10) if index != 2])
+
+    def test_packs_shorts(self):
+        with mock.patch.object(ts.gpt, "rework_transcripts_to_sentences", side_effect=lambda items, deadline=None: ["text"] * len(items)) as rework, \
+                mock.patch.object(ts.gpt, "create_shorts_scripts", side_effect=lambda scripts, deadline=None: ["script"] * len(scripts)) as shorts:
+            result = ts.create_shorts_by_chapters(self.video, api_key="key", pack=True)
+        self.assertEqual((rework.call_count, shorts.call_count), (1, 1))
+        self.assertEqual([item["heading"] for item in result], [f"Topic {index}" for index in range(10)])
+
+    def test_packing_saves_prompt_tokens(self):
+        sections = ts.build_sections(self.video)
+        separate = [ts.gpt.chapter_summary_request(section) for section in sections]
+        packed = [ts.gpt.packed_request(ts.gpt.CHAPTER_SUMMARY_PROMPT, [ts.preprocessing.compact_section(sections[index]) for index in group])
+                  for group in ts.pack_sections(sections)]
+
+        def tokens(requests):
+            return sum(ts.preprocessing.estimate_tokens("".join(m["content"] for m in r["messages"])) for r in requests)
+
+        self.assertEqual((len(separate), len(packed)), (10, 1))
+        self.assertLess(tokens(packed), tokens(separate) / 3)
+
+
+class Test_CombinedSummary(unittest.TestCase):
+    def setUp(self):
+        self.video = YouTubeVideo("https://www.youtube.com/watch?v=X4DpDM9jmqo")
+        self.video.title = "Whales"
+        self.video.transcript = self.video._convert_transcript_to_timedelta(
+            [{"text": f"caption {index} about whales and their songs", "start": index * 60.0, "duration": 5.0} for index in range(6)]
+        )
+        self.video.chapters = [{"timestamp": f"{index}:00", "content": f"Topic {index}"} for index in range(6)]
+
+    def answer(self, chapters=6, video="The video", sentence="#### Whales\nOne sentence."):
+        return {"chapters": [f"## Topic {index}" if index < chapters else None for index in range(6)], "video": video, "sentence": sentence}
+
+    def test_fills_all_caches_with_one_request(self):
+        with mock.patch.object(ts.gpt, "get_combined_summary", return_value=self.answer()) as combined, \
+                mock.patch.object(ts.gpt, "get_chapter_summary") as chapter, \
+                mock.patch.object(ts.gpt, "get_whole_transcript_summary") as whole, \
+                mock.patch.object(ts.gpt, "get_one_sentence_summary") as sentence:
+            results = ts.summary_combined(self.video, api_key="key")
+            self.assertEqual(ts.summary_by_chapters(self.video, api_key="key"), results["chapters"])
+            self.assertEqual(ts.summary_entire_video(self.video, api_key="key"), "The video")
+            self.assertEqual(ts.summary_in_one_sentence(self.video, api_key="key"), results["sentence"])
+        combined.assert_called_once()
+        for separate in (chapter, whole, sentence):
+            separate.assert_not_called()
+
+    def test_missing_products_are_generated_separately(self):
+        with mock.patch.object(ts.gpt, "get_combined_summary", return_value=self.answer(chapters=5, video=None)), \
+                mock.patch.object(ts.gpt, "get_chapter_summary", return_value="## Topic 5") as chapter, \
+                mock.patch.object(ts.gpt, "get_unified_summary", return_value="From chapters") as unified:
+            results = ts.summary_combined(self.video, api_key="key")
+        self.assertEqual(results["chapters"][5], "## Topic 5")
+        self.assertEqual(results["video"], "From chapters")
+        chapter.assert_called_once()
+        unified.assert_called_once()
+
+    def test_long_or_cached_videos_are_not_combined(self):
+        with mock.patch.object(ts.gpt, "get_combined_summary") as combined:
+            self.assertIsNone(ts.summary_combined(self.video, api_key="key", max_tokens=10))
+            self.video.summaries["video"] = "cached"
+            self.assertIsNone(ts.summary_combined(self.video, api_key="key"))
+        combined.assert_not_called()
+
+    def test_parse_combined_summary(self):
+        products = ts.gpt.parse_combined_summary('{"chapters": {"p0": "## A"}, "video": "V", "sentence": ""}', 2)
+        self.assertEqual(products, {"chapters": ["## A", None], "video": "V", "sentence": None})
+        self.assertEqual(ts.gpt.parse_combined_summary("not json", 1), {"chapters": [None], "video": None, "sentence": None})
+
+    def test_saves_requests_and_input_tokens(self):
+        savings = ts.combined_request_savings(self.video)
+        self.assertEqual(savings["separate"]["requests"], 8)
+        self.assertLess(savings["combined"]["input_tokens"], savings["separate"]["input_tokens"])
+
+
+class Test_LinkTranscriptWithoutOutline(unittest.TestCase):
+    def setUp(self):
+        self.obj = YouTubeTranscribeSummarize(youtube_video=YouTubeVideo("https://www.youtube.com/watch?v=X4DpDM9jmqo"))
+        # 600 captions of ~10 tokens, every 10th ends a sentence, a long pause after caption 305
+        self.content = []
+        for index in range(600):
+            start = index * 3.0 + (5.0 if index > 305 else 0.0)
+            text = f"caption number {index} talks about a topic" + ("." if index % 10 == 9 else "")
+            self.content.append({"text": text, "start": start, "duration": 2.9})
+
+    def test_sections_are_token_balanced(self):
+        sections = self.obj.link_transcript_without_outline(self.content, target_tokens=1000, min_tokens=300, max_tokens=1500)
+        sizes = [ts.preprocessing.estimate_tokens(section["content"]) for section in sections]
+        self.assertGreater(len(sections), 3)
+        self.assertTrue(all(300 <= size <= 1500 for size in sizes), sizes)
+        self.assertEqual(" ".join(section["content"] for section in sections), " ".join(entry["text"] for entry in self.content))
+
+    def test_sections_end_at_sentences(self):
+        sections = self.obj.link_transcript_without_outline(self.content, target_tokens=1000, min_tokens=300, max_tokens=1500)
+        for section in sections[:-1]:
+            self.assertTrue(section["content"].endswith("."))
+
+    def test_section_format(self):
+        sections = self.obj.link_transcript_without_outline(self.content)
+        self.assertEqual(sections[0]["timestr"], "0:00")
+        self.assertEqual(sections[0]["heading"], "Chapter 1")
+        self.assertIsInstance(sections[-1]["timestamp"], timedelta)
+        self.assertGreater(sections[-1]["timestamp"], sections[0]["timestamp"])
+
+    def test_small_remainder_is_merged(self):
+        sections = self.obj.link_transcript_without_outline(self.content[:120], target_tokens=1000, min_tokens=500, max_tokens=1500)
+        self.assertEqual(len(sections), 1)
+
+    def test_merge_keeps_the_maximum_size(self):
+        # Without sentence ends or pauses every section is closed at the maximum size
+        content = [{"text": f"caption number {index} talks about a topic", "start": index * 3.0, "duration": 3.0} for index in range(170)]
+        sections = self.obj.link_transcript_without_outline(content, target_tokens=1000, min_tokens=500, max_tokens=1500)
+        sizes = [ts.preprocessing.estimate_tokens(section["content"]) for section in sections]
+        self.assertEqual(len(sections), 2)
+        self.assertTrue(all(size <= 1500 for size in sizes), sizes)
+        self.assertEqual(" ".join(section["content"] for section in sections), " ".join(entry["text"] for entry in content))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
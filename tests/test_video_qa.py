@@ -0,0 +1,88 @@
+# Let Python locate the source code
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+# Testing
+import unittest
+from unittest import mock
+# User-defined Imports
+import src.video_qa as video_qa
+from src.youtube_video import YouTubeVideo
+
+
+TOPICS = ["whales sing long songs underwater", "coral reefs bleach in warm water", "octopus arms can taste food"]
+
+
+def make_video(video_id: str = "qa", captions: int = 300) -> YouTubeVideo:
+    video = YouTubeVideo(f"https://www.youtube.com/watch?v={video_id}")
+    video.title = "Ocean facts"
+    video.transcript_language = "en"
+    # Every topic is talked about for a third of the video
+    video.transcript = video._convert_transcript_to_timedelta([
+        {"text": f"{TOPICS[index * len(TOPICS) // captions]} number {index}", "start": index * 5.0, "duration": 4.0}
+        for index in range(captions)
+    ])
+    video.chapters = [
+        {"timestamp": "0:00", "content": "Whales"},
+        {"timestamp": "8:20", "content": "Reefs"},
+        {"timestamp": "16:40", "content": "Octopus"},
+    ]
+    return video
+
+
+class Test_VideoQA(unittest.TestCase):
+    def setUp(self):
+        video_qa._index_cache.clear()
+
+    def test_split_passages(self):
+        video = make_video()
+        passages = video_qa.split_passages(video.transcript, video.chapters, passage_tokens=50)
+        self.assertGreater(len(passages), 10)
+        self.assertEqual(passages[0]["start"], 0.0)
+        self.assertEqual(passages[-1]["end"], 299 * 5.0 + 4.0)
+        self.assertEqual(passages[0]["heading"], "Whales")
+        self.assertEqual(passages[-1]["heading"], "Octopus")
+        self.assertTrue(all(a["end"] <= b["start"] for a, b in zip(passages, passages[1:])))
+
+    def test_search_ranks_matching_passages(self):
+        video = make_video()
+        hits = video_qa.get_index(video).search("Which animal can taste with its arms?", limit=3)
+        self.assertEqual(len(hits), 3)
+        self.assertTrue(all(hit["heading"] == "Octopus" for hit in hits))
+        self.assertGreaterEqual(hits[0]["score"], hits[-1]["score"])
+        self.assertEqual(video_qa.get_index(video).search("the of and"), [])
+
+    def test_index_is_built_once_per_transcript(self):
+        video = make_video()
+        with mock.patch.object(video_qa, "split_passages", wraps=video_qa.split_passages) as split:
+            first = video_qa.get_index(video)
+            self.assertIs(video_qa.get_index(video), first)
+            self.assertIs(video_qa.get_index(make_video()), first)
+            split.assert_called_once()
+            video.transcript_language = "de"
+            self.assertIsNot(video_qa.get_index(video), first)
+
+    def test_cache_is_bounded(self):
+        for index in range(video_qa.INDEX_CACHE_SIZE + 3):
+            video_qa.get_index(make_video(f"qa{index}", captions=10))
+        self.assertEqual(len(video_qa._index_cache), video_qa.INDEX_CACHE_SIZE)
+
+    def test_retrieve_without_matching_terms_spreads_over_the_video(self):
+        passages = video_qa.retrieve(make_video(), "What is the gist?", limit=3)
+        self.assertEqual([passage["heading"] for passage in passages], ["Whales", "Reefs", "Octopus"])
+
+    @mock.patch.object(video_qa.gpt, "answer_question", return_value="Coral reefs bleach in warm water (8:20).")
+    def test_ask(self, answer):
+        result = video_qa.ask(make_video(), "Why do reefs bleach?", api_key="key", limit=2)
+        self.assertEqual(result["answer"], "Coral reefs bleach in warm water (8:20).")
+        self.assertEqual(len(result["passages"]), 2)
+        self.assertTrue(result["passages"][0]["url"].startswith("https://www.youtube.com/watch?v=qa&t="))
+        question, passages, title = answer.call_args.args
+        self.assertEqual(title, "Ocean facts")
+        self.assertEqual(len(passages), 2)
+        self.assertRegex(passages[0], r"^\[\d+:\d\d\] \(Reefs\) coral reefs bleach")
+        with self.assertRaises(ValueError):
+            video_qa.ask(make_video(), "  ", api_key="key")
+
+
+if __name__ == '__main__':
+    unittest.main()
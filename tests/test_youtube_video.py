@@ -3,8 +3,21 @@ import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 # Testing
 import unittest
+from unittest import mock
+# Native Libraries
+import gc
+import json
+import pickle
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+# External Libraries
+from bs4 import BeautifulSoup
 # User-defined Imports
-from src.youtube_video import YouTubeVideo
+import src.youtube_video as youtube_video
+from src.deadline import Deadline, DeadlineExceeded
+from src.youtube_video import YouTubeVideo, parse_description_chapters, rank_transcripts
 from src.logger import Logger
 
 
@@ -194,5 +207,227 @@ class Test_YouTubeVideo_extract_chapters(unittest.TestCase):
         self.assertEqual(function_output, expected_output)
 
 
+class Test_ParseDescriptionChapters(unittest.TestCase):
+    def test_ignores_stray_times(self):
+        description = """
+            Join us live at 12:30 pm for the Q&A!
+            0:00 Intro
+            2:15 - Setup
+            05:40 | Results
+            Recorded 9:45 in the morning.
+            12:30 pm was the time of the meeting
+            13:05 A.M. is not a chapter either
+            14:00 Amazing outro
+        """
+        expected_output = [
+            {"timestamp": "0:00", "content": "Intro"},
+            {"timestamp": "2:15", "content": "Setup"},
+            {"timestamp": "05:40", "content": "Results"},
+            {"timestamp": "14:00", "content": "Amazing outro"},
+        ]
+        self.assertEqual(parse_description_chapters(description), expected_output)
+
+    def test_skips_non_monotonic_times(self):
+        description = "0:00 Intro\n3:00 Main\n1:00 Rewind\n5:00 Outro"
+        chapters = parse_description_chapters(description)
+        self.assertEqual([chapter["timestamp"] for chapter in chapters], ["0:00", "3:00", "5:00"])
+
+    def test_requires_start_at_zero(self):
+        self.assertIsNone(parse_description_chapters("1:00 One\n2:00 Two\n3:00 Three"))
+
+    def test_requires_three_chapters(self):
+        self.assertIsNone(parse_description_chapters("0:00 Intro\n1:00 Outro"))
+
+
+class Test_YouTubeVideo_StructuredChapters(unittest.TestCase):
+    def make_video(self, initial_data):
+        html = f"""<html><head><script>var ytInitialData = {json.dumps(initial_data)};</script>
+            <script>var ytInitialPlayerResponse = {{"videoDetails": {{"shortDescription": "Line 1\\n0:00 Intro"}}}};</script>
+            </head></html>"""
+        video = YouTubeVideo("https://www.youtube.com/watch?v=abc")
+        video.soup = BeautifulSoup(html, features="html.parser")
+        video.initial_data = video._get_initial_data()
+        return video
+
+    def test_chapters_from_player_bar(self):
+        markers = {"markersMap": [{"key": "DESCRIPTION_CHAPTERS", "value": {"chapters": [
+            {"chapterRenderer": {"title": {"simpleText": "Intro"}, "timeRangeStartMillis": 0}},
+            {"chapterRenderer": {"title": {"simpleText": "Deep dive"}, "timeRangeStartMillis": 95000}},
+            {"chapterRenderer": {"title": {"runs": [{"text": "Q&A"}]}, "timeRangeStartMillis": 3725000}},
+        ]}}]}
+        video = self.make_video({"playerOverlays": {"playerBar": {"multiMarkersPlayerBarRenderer": markers}}})
+        expected_output = [
+            {"timestamp": "0:00", "content": "Intro"},
+            {"timestamp": "1:35", "content": "Deep dive"},
+            {"timestamp": "1:02:05", "content": "Q&A"},
+        ]
+        self.assertEqual(video._get_structured_chapters(), expected_output)
+
+    def test_no_chapters_in_player_data(self):
+        video = self.make_video({"contents": {}})
+        self.assertIsNone(video._get_structured_chapters())
+
+    def test_description_from_player_response(self):
+        video = self.make_video({})
+        self.assertEqual(video._get_description(), "Line 1\n0:00 Intro")
+
+
+class FakeTrack:
+    def __init__(self, language_code, is_generated, fetches):
+        self.language_code = language_code
+        self.is_generated = is_generated
+        self.fetches = fetches
+
+    def fetch(self):
+        self.fetches.append(self.language_code)
+        return [{"text": f"{self.language_code} text", "start": 0.0, "duration": 2.0}]
+
+
+class Test_YouTubeVideo_Transcript(unittest.TestCase):
+    def setUp(self):
+        youtube_video._list_transcripts.cache_clear()
+        youtube_video._fetch_transcript.cache_clear()
+        self.fetches = []
+        self.tracks = [FakeTrack("en", True, self.fetches), FakeTrack("de", False, self.fetches), FakeTrack("fr", False, self.fetches)]
+
+    def test_rank_transcripts(self):
+        ranked = rank_transcripts(self.tracks, ("en", "de"))
+        self.assertEqual([(t.language_code, t.is_generated) for t in ranked], [("de", False), ("en", True), ("fr", False)])
+        generated_de = FakeTrack("de", True, self.fetches)
+        ranked = rank_transcripts(self.tracks + [generated_de], ("en", "de"))
+        self.assertIs(ranked[1], self.tracks[0])
+
+    def test_switching_language_uses_cache(self):
+        api = SimpleNamespace(list_transcripts=mock.Mock(return_value=self.tracks))
+        with mock.patch.object(youtube_video, "YouTubeTranscriptApi", api):
+            video = YouTubeVideo("https://www.youtube.com/watch?v=cached")
+            video.transcript = video._get_transcript(("de",))
+            video.summaries["video"] = "German summary"
+            self.assertTrue(video.set_language(("fr",)))
+            self.assertEqual(video.transcript[0]["text"], "fr text")
+            self.assertEqual(video.summaries, {})
+            video.set_language(("de",))
+            self.assertEqual(video.transcript[0]["text"], "de text")
+        api.list_transcripts.assert_called_once_with("cached")
+        self.assertEqual(self.fetches, ["de", "fr"])
+
+
+PAGE_HTML = """<html><head>
+    <meta property="og:title" content="Whales explained">
+    <link itemprop="name" content="Ocean Channel">
+    <meta itemprop="duration" content="PT12M5S">
+    <script>var ytInitialPlayerResponse = {"videoDetails": {"shortDescription": "All about whales"}};</script>
+    </head></html>"""
+
+
+class Test_YouTubeVideo_LazyFields(unittest.TestCase):
+    def setUp(self):
+        self.video = YouTubeVideo("https://www.youtube.com/watch?v=lazy")
+        self.page = mock.Mock(side_effect=lambda deadline=None: BeautifulSoup(PAGE_HTML, features="html.parser"))
+        self.transcript = mock.Mock(return_value=[{"text": "hello", "start": 0.0}])
+        self.video._get_metadata = self.page
+        self.video._get_transcript = self.transcript
+
+    def test_fields_load_on_first_access(self):
+        self.video.get_data(lazy=True)
+        self.page.assert_not_called()
+        self.assertEqual(self.video.title, "Whales explained")
+        self.assertEqual(self.video.channel, "Ocean Channel")
+        self.assertEqual(self.video.description, "All about whales")
+        self.page.assert_called_once()
+        self.transcript.assert_not_called()
+        self.assertEqual(self.video.transcript[0]["text"], "hello")
+        self.assertEqual(len(self.video.transcript), 1)
+        self.transcript.assert_called_once()
+
+    def test_get_data_loads_page_and_transcript_together(self):
+        transcript_started = threading.Event()
+
+        def page(deadline=None):
+            # The page only arrives after the transcript request has started
+            self.assertTrue(transcript_started.wait(5))
+            return BeautifulSoup(PAGE_HTML, features="html.parser")
+
+        def transcript(languages):
+            transcript_started.set()
+            return [{"text": "hello", "start": 0.0}]
+
+        self.video._get_metadata, self.video._get_transcript = page, transcript
+        self.video.get_data()
+        self.assertEqual(self.video.title, "Whales explained")
+        self.assertFalse(self.video.chapters_available)
+        self.assertIsNone(self.video.chapters)
+        self.assertEqual(len(self.video.transcript), 1)
+
+    def test_stuck_transcript_is_bounded_by_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.video._get_transcript = lambda languages: release.wait(5) and []
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            self.video.get_data(deadline=Deadline(0.2))
+        self.assertLess(time.monotonic() - started, 2)
+        # The page fields are loaded anyway
+        self.assertEqual(self.video.title, "Whales explained")
+
+    def test_missing_duration_is_none(self):
+        self.video._get_metadata = lambda deadline=None: BeautifulSoup(PAGE_HTML.replace('itemprop="duration"', ""), features="html.parser")
+        self.assertIsNone(self.video.duration)
+        self.assertEqual(self.video.title, "Whales explained")
+
+    def test_assigned_fields_are_kept(self):
+        self.video.transcript = [{"text": "assigned"}]
+        self.assertEqual(self.video.transcript, [{"text": "assigned"}])
+        self.transcript.assert_not_called()
+
+
+class Test_YouTubeVideo_Memory(unittest.TestCase):
+    def setUp(self):
+        player_data = {"contents": [{"item": {"text": f"related video {index}", "id": index}} for index in range(5000)]}
+        self.html = PAGE_HTML.replace("</head>", f"<script>var ytInitialData = {json.dumps(player_data)};</script></head>") + (
+            "<body>" + "".join(f'<div class="related"><a href="/watch?v={index}">Video {index}</a></div>' for index in range(5000)) + "</body>"
+        )
+        self.raw_transcript = [{"text": f"caption number {index}", "start": index * 2.0, "duration": 2.0} for index in range(3000)]
+
+    def load_video(self) -> YouTubeVideo:
+        video = YouTubeVideo("https://www.youtube.com/watch?v=memory")
+        video._get_metadata = lambda deadline=None: BeautifulSoup(self.html, features="html.parser")
+        video._get_transcript = lambda languages: video._convert_transcript_to_timedelta([dict(item) for item in self.raw_transcript])
+        video.get_data(lazy=True)
+        for field in youtube_video.PAGE_FIELDS + ("transcript",):
+            getattr(video, field)
+        del video._get_metadata, video._get_transcript
+        return video
+
+    def test_released_page_shrinks_session_memory(self):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            video = self.load_video()
+            gc.collect()
+            loaded = tracemalloc.get_traced_memory()[0] - baseline
+            video.release_page()
+            gc.collect()
+            released = tracemalloc.get_traced_memory()[0] - baseline
+        finally:
+            tracemalloc.stop()
+        # The parsed page dominates: a session keeps less than a fifth of the loaded objects
+        self.assertLess(released, loaded / 5)
+        self.assertEqual(video.title, "Whales explained")
+        self.assertEqual(set(video.transcript[0]), {"text", "start", "duration", "timestamp"})
+
+    def test_pickled_snapshot(self):
+        video = self.load_video()
+        video.summaries["video"] = "summary"
+        snapshot = pickle.dumps(video)
+        self.assertNotIn(b"related video", snapshot)
+        restored = pickle.loads(snapshot)
+        self.assertEqual(restored.title, "Whales explained")
+        self.assertEqual(restored.transcript, video.transcript)
+        self.assertEqual(restored.summaries, {"video": "summary"})
+        self.assertNotIn("soup", restored.__dict__)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file